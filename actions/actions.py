@@ -1,31 +1,219 @@
-from typing import Any, Text, Dict, List
+from typing import Any, Text, Dict, List, Optional
 from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
 from rasa_sdk.events import SlotSet, FollowupAction
-import re
+import os
 import difflib
-from .database import db
+from .async_database import async_db
+from .database import page_cursor, nearby_cursor
+from .geo import find_landmark
+from .analytics import analytics_writer
+from .parsing import budget_amount, parse_room_number, LAST_ROOM
+from .logs import env_float, env_int, get_logger
+from . import metrics
 
-def extract_budget_number(budget_str):
-    """Extract numeric budget value from strings like '15000 taka', '20000', etc."""
-    if budget_str is None:
+logger = get_logger(__name__)
+
+# Prometheus-style /metrics endpoint, only when METRICS_PORT is set
+metrics.start_metrics_server()
+
+TRANSPORT_LABELS = {'cng': 'CNG'}
+
+# place_type -> (plural, highlight shown when the area has such places)
+AREA_HIGHLIGHTS = {
+    'university': ('universities', 'Student-friendly area'),
+    'school': ('schools', 'Schools nearby'),
+    'market': ('markets', 'Shopping facilities nearby'),
+    'hospital': ('hospitals', 'Medical facilities available'),
+    'restaurant': ('restaurants', 'Food options easily accessible'),
+    'mosque': ('mosques', 'Mosques nearby'),
+    'transport': ('transport hubs', 'Transport hubs nearby'),
+}
+
+# Keep only property ids and search parameters in the search_results slot
+COMPACT_SEARCH_RESULTS = os.getenv('SEARCH_RESULTS_COMPACT', 'true').lower() == 'true'
+
+# Rooms shown per search reply and per "show more"
+SEARCH_PAGE_SIZE = max(env_int('SEARCH_PAGE_SIZE', 3), 1)
+
+# Rank results by relevance (price fit, amenities, rating, ...) instead of rent
+SEARCH_RANKING = os.getenv('SEARCH_RANKING', 'false').lower() == 'true'
+RANKING_TOP_K = max(env_int('RANKING_TOP_K', 30), 1)
+
+# Input channel of addons/streaming_channel.py, which renders rooms sent as JSON cards
+STREAMING_CHANNEL = 'streaming'
+
+# Radius used when the location is a landmark such as TSC
+GEO_RADIUS_METERS = env_float('GEO_DEFAULT_RADIUS_KM', 2.0) * 1000
+
+
+def serialize_room(room):
+    """Convert a database property row into the room dict stored in search_results."""
+    nearby = []
+    for place in room.get('nearby_places') or []:
+        if place.get('distance_meters') is not None:
+            nearby.append(f"{place['place_name']} ({place['distance_meters']}m)")
+        else:
+            nearby.append(place['place_name'])
+
+    transportation = []
+    for option in room.get('transportation') or []:
+        label = TRANSPORT_LABELS.get(option['transport_type'], option['transport_type'].title())
+        transportation.append(f"{label}: {option['details']}" if option.get('details') else label)
+
+    return {
+        "neighborhood": room['neighborhood'],
+        "price": int(room['rent_amount']),
+        "contact": room['owner_phone'],
+        "type": room['property_type'],
+        "furnished": bool(room['furnished']),
+        "occupancy": [room['occupancy_type']],
+        "gender_preference": room['occupancy_type'],
+        "amenities": room.get('amenities') or [],
+        "nearby": nearby,
+        "transportation": transportation,
+        "area_details": room['address'],
+        "description": room.get('description') or 'Room in ' + room['neighborhood'],
+        "advance": f"{room.get('advance_months', 2)} months rent"
+    }
+
+def format_room_summary(number, room):
+    """Short listing of a database property for search replies."""
+    response = f"🏠 **Room {number}: {room['neighborhood']}**\n"
+    response += f"💰 ৳{int(room['rent_amount'])}/month\n"
+    response += f"📞 Contact: {room['owner_phone']}\n"
+    response += f"👤 Owner: {room['owner_name']}\n"
+    if room.get('distance_meters') is not None:
+        response += f"📏 {room['distance_meters'] / 1000:.1f} km away\n"
+    return response + "\n"
+
+
+def room_card(number, room):
+    """The fields of format_room_summary as a JSON message for the streaming channel."""
+    card = {
+        'type': 'room_card',
+        'number': number,
+        'id': room.get('id'),
+        'title': room.get('title'),
+        'neighborhood': room['neighborhood'],
+        'area_name': room.get('area_name'),
+        'rent': int(room['rent_amount']),
+        'owner_phone': room['owner_phone'],
+        'owner_name': room['owner_name'],
+    }
+    if room.get('distance_meters') is not None:
+        card['distance_km'] = round(room['distance_meters'] / 1000, 1)
+    return card
+
+
+def utter_rooms(dispatcher, tracker, header, rooms, first_number=1, footer=""):
+    """Send a page of rooms as one Markdown message, or as the header then one card per room when streaming."""
+    if tracker.get_latest_input_channel() == STREAMING_CHANNEL:
+        dispatcher.utter_message(text=header)
+        for number, room in enumerate(rooms, first_number):
+            dispatcher.utter_message(json_message=room_card(number, room))
+        if footer:
+            dispatcher.utter_message(text=footer)
+        return
+
+    summaries = [format_room_summary(number, room) for number, room in enumerate(rooms, first_number)]
+    dispatcher.utter_message(text=f"{header}\n\n" + "".join(summaries) + footer)
+
+
+def format_area_profile(profile):
+    """Highlights, listing prices and transport modes from an area_profiles row."""
+    response = ""
+    for place_type, (plural, highlight) in AREA_HIGHLIGHTS.items():
+        count = profile['place_counts'].get(place_type)
+        if not count:
+            continue
+        detail = f"{count} {plural if count > 1 else place_type}"
+        nearest = (profile['nearest_places'].get(place_type) or [{}])[0]
+        if nearest.get('place_name'):
+            detail += f", nearest {nearest['place_name']}"
+            if nearest.get('distance_meters') is not None:
+                detail += f" ({nearest['distance_meters']}m)"
+        response += f"• {highlight}: {detail}\n"
+
+    if profile['transport_modes']:
+        modes = sorted(profile['transport_modes'].items(), key=lambda item: item[1], reverse=True)
+        labels = [TRANSPORT_LABELS.get(mode, mode.title()) for mode, _ in modes]
+        response += f"\n🚗 **Transportation:** {', '.join(labels)}\n"
+
+    if profile['available_listings']:
+        response += (f"\n🏠 **Rooms:** {profile['available_listings']} available, "
+                     f"from ৳{int(profile['min_rent'])} (average ৳{int(profile['avg_rent'])})/month\n")
+    return response
+
+
+def next_page_cursor(page, has_more, location, budget, preferences, shown, near=None, radius=None, ranked_ids=None):
+    """search_cursor slot value for fetching the page after `page`, or None."""
+    if ranked_ids:
+        # Ranked order can't be resumed from a keyset, so keep the remaining ranked ids
+        return {"location": location, "ranked_ids": ranked_ids, "shown": shown}
+    if not has_more or not page:
         return None
-        
-    # Convert to string if not already
-    budget_str = str(budget_str)
-    
-    # Extract numbers using regex
-    numbers = re.findall(r'\d+', budget_str)
-    if numbers:
-        return float(numbers[0])  # Take the first number found
-    
-    return None
+    search_cursor = {
+        "location": location,
+        "budget": budget,
+        "preferences": preferences,
+        "after": nearby_cursor(page[-1]) if near else page_cursor(page[-1]),
+        "shown": shown,
+    }
+    if near:
+        search_cursor["near"] = list(near)
+        search_cursor["radius"] = radius
+    return search_cursor
+
+
+async def search_page(location, budget, preferences, near=None, radius=None, after=None, ranked_ids=None):
+    """Fetch one page plus one extra row, by radius around `near`, from ranked ids, or by location."""
+    if ranked_ids:
+        return await async_db.get_properties_details(ranked_ids[:SEARCH_PAGE_SIZE + 1])
+    if near:
+        return await async_db.search_properties_near(
+            near[0], near[1], radius, budget, preferences, after=after, limit=SEARCH_PAGE_SIZE + 1
+        )
+    return await async_db.search_properties(location, budget, preferences, after=after, limit=SEARCH_PAGE_SIZE + 1)
+
+
+def compact_search_results(properties, location, budget, preferences):
+    """Slot payload for database results: ids plus the search that produced them."""
+    return {
+        "ids": [property_data['id'] for property_data in properties],
+        "location": location,
+        "budget": budget,
+        "preferences": preferences,
+    }
+
+
+RESULTS_UNAVAILABLE = "⚠️ I couldn't load your search results right now. Please try again in a moment."
+
+
+def room_unavailable(room_number):
+    return f"Room {room_number} is no longer available. Pick another room or search again for fresh listings."
+
+
+async def load_search_results(tracker: Tracker) -> Optional[List[Optional[Dict[Text, Any]]]]:
+    """Return the rooms in the search_results slot, hydrating compact payloads from the property cache.
+
+    Rooms keep the numbers they were shown with: a listing that no longer
+    exists is None in its place. None means the database couldn't be reached.
+    """
+    search_results = tracker.get_slot("search_results")
+    if isinstance(search_results, dict):
+        properties = await async_db.get_properties_details(search_results.get("ids") or [], keep_missing=True)
+        if properties is None:
+            return None
+        return [serialize_room(property_data) if property_data else None for property_data in properties]
+    return search_results or []
 
 class ActionTestDatabase(Action):
     def name(self) -> Text:
         return "action_test_database"
 
-    def run(self, dispatcher: CollectingDispatcher,
+    @metrics.timed_action
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
@@ -34,7 +222,7 @@ class ActionTestDatabase(Action):
         
         # Test database connection
         try:
-            properties = db.search_properties(location="dhaka", budget=15000, preferences=None)
+            properties = await async_db.search_properties(location="dhaka", budget=15000, preferences=None)
             if properties:
                 response = f"🎉 Database connection successful! Found {len(properties)} properties in database:\n\n"
                 for prop in properties[:2]:
@@ -55,7 +243,8 @@ class ActionSearchRooms(Action):
     def name(self) -> Text:
         return "action_search_rooms"
 
-    def run(self, dispatcher: CollectingDispatcher,
+    @metrics.timed_action
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
@@ -72,55 +261,55 @@ class ActionSearchRooms(Action):
             return []
 
         # Parse budget to handle strings like '15000 taka'
-        budget_number = extract_budget_number(budget)
+        budget_number = budget_amount(budget)
         if budget_number is None:
             dispatcher.utter_message(text="I couldn't understand your budget. Please specify a number like '15000' or '15000 taka'.")
             return []
         
+        search_cursor = None
+        # (header, rooms, footer) of a database result page, sent after the search succeeded
+        room_page = None
+
         # Search using database - fallback to demo data if database fails
         try:
-            matching_rooms = db.search_properties(location, budget_number, preferences)
-            
-            # Log search analytics (only if database is available)
-            try:
-                db.log_search_analytics(
-                    user_id=None,  # You can get user_id from session later
-                    location=location,
-                    budget=budget,
-                    preferences=preferences,
-                    results_count=len(matching_rooms)
+            # Landmarks ("near TSC") search by distance, everything else by area
+            near = find_landmark(location)
+            ranked_ids = None
+            if SEARCH_RANKING and not near:
+                ranked = await async_db.search_properties_ranked(
+                    location, budget_number, preferences, tracker.get_slot("occupancy_type"), RANKING_TOP_K
                 )
-            except:
-                pass  # Ignore analytics logging failures
+                matching_rooms = ranked[:SEARCH_PAGE_SIZE + 1]
+                ranked_ids = [room['id'] for room in ranked[SEARCH_PAGE_SIZE:]]
+            else:
+                matching_rooms = await search_page(location, budget_number, preferences, near, GEO_RADIUS_METERS)
+            
+            # Queue search analytics, written to the database in the background
+            analytics_writer.log_search_analytics(
+                user_id=None,  # You can get user_id from session later
+                location=location,
+                budget=budget_number,
+                preferences=preferences,
+                # The page plus its look-ahead row, not a total of every match
+                results_shown=len(matching_rooms)
+            )
             
             if matching_rooms:
-                response = f"🎉 Found {len(matching_rooms)} room(s) in {location.title()}:\n\n"
-                # Convert database results to serializable format
-                serializable_rooms = []
-                for i, room in enumerate(matching_rooms[:3], 1):
-                    response += f"🏠 **Room {i}: {room['neighborhood']}**\n"
-                    response += f"💰 ৳{int(room['rent_amount'])}/month\n"
-                    response += f"📞 Contact: {room['owner_phone']}\n"
-                    response += f"👤 Owner: {room['owner_name']}\n\n"
-                    
-                    # Create serializable room object
-                    serializable_room = {
-                        "neighborhood": room['neighborhood'],
-                        "price": int(room['rent_amount']),
-                        "contact": room['owner_phone'],
-                        "type": room['property_type'],
-                        "furnished": bool(room['furnished']),
-                        "occupancy": [room['occupancy_type']],
-                        "gender_preference": room['occupancy_type'],
-                        "amenities": room.get('amenities', []),
-                        "nearby": [],  # Will be populated from nearby_places if needed
-                        "transportation": [],  # Will be populated from transportation if needed
-                        "area_details": room['address'],
-                        "description": room.get('description', 'Room in ' + room['neighborhood']),
-                        "advance": f"{room.get('advance_months', 2)} months rent"
-                    }
-                    serializable_rooms.append(serializable_room)
-                matching_rooms = serializable_rooms
+                page = matching_rooms[:SEARCH_PAGE_SIZE]
+                has_more = len(matching_rooms) > SEARCH_PAGE_SIZE
+                if near:
+                    header = f"🎉 Found {len(page)}{'+' if has_more else ''} room(s) within {GEO_RADIUS_METERS / 1000:g} km of {location.title()}:"
+                else:
+                    header = f"🎉 Found {len(page)}{'+' if has_more else ''} room(s) in {location.title()}:"
+                room_page = (header, page, "➕ Say 'show more' to see more rooms." if has_more else "")
+                search_cursor = next_page_cursor(
+                    page, has_more, location, budget_number, preferences, len(page), near, GEO_RADIUS_METERS, ranked_ids
+                )
+
+                if COMPACT_SEARCH_RESULTS:
+                    matching_rooms = compact_search_results(page, location, budget_number, preferences)
+                else:
+                    matching_rooms = [serialize_room(room) for room in page]
             else:
                 # Fallback to demo data when no database results
                 matching_rooms = self._get_demo_rooms(location, budget)
@@ -135,7 +324,8 @@ class ActionSearchRooms(Action):
                     response += "Try:\n• Increasing your budget\n• Different location\n• Checking nearby areas"
                 
         except Exception as e:
-            print(f"Database error: {e}")
+            logger.error("Database error: %s", e)
+            room_page = None
             # Use demo data as fallback
             matching_rooms = self._get_demo_rooms(location, budget_number)
             if matching_rooms:
@@ -148,8 +338,12 @@ class ActionSearchRooms(Action):
                 response = "Sorry, I'm currently having technical difficulties. Please try again later or contact support."
                 matching_rooms = []
 
-        dispatcher.utter_message(text=response)
-        return [SlotSet("search_results", matching_rooms)]
+        if room_page:
+            header, page, footer = room_page
+            utter_rooms(dispatcher, tracker, header, page, footer=footer)
+        else:
+            dispatcher.utter_message(text=response)
+        return [SlotSet("search_results", matching_rooms), SlotSet("search_cursor", search_cursor)]
     
     def _get_demo_rooms(self, location, budget):
         """Fallback demo data when database is not available"""
@@ -187,56 +381,108 @@ class ActionSearchRooms(Action):
         ]
         
         # Filter by budget
-        budget_float = extract_budget_number(budget) if budget else 999999
+        budget_float = budget_amount(budget) or 999999
         filtered_rooms = [room for room in demo_rooms if room["price"] <= budget_float * 1.2]
         return filtered_rooms[:3]
 
+class ActionShowMoreRooms(Action):
+    def name(self) -> Text:
+        return "action_show_more_rooms"
+
+    @metrics.timed_action
+    async def run(self, dispatcher: CollectingDispatcher,
+            tracker: Tracker,
+            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+
+        search_cursor = tracker.get_slot("search_cursor")
+        if not search_cursor:
+            dispatcher.utter_message(text="There are no more rooms for this search. Try a new search with a different area or budget!")
+            return []
+
+        location = search_cursor["location"]
+        near = search_cursor.get("near")
+        radius = search_cursor.get("radius")
+        ranked_ids = search_cursor.get("ranked_ids")
+        rooms = await search_page(
+            location,
+            search_cursor.get("budget"),
+            search_cursor.get("preferences"),
+            near,
+            radius,
+            after=search_cursor.get("after"),
+            ranked_ids=ranked_ids
+        )
+        if not rooms:
+            dispatcher.utter_message(text="That's all the rooms I found for this search.")
+            return [SlotSet("search_cursor", None)]
+
+        page = rooms[:SEARCH_PAGE_SIZE]
+        has_more = len(rooms) > SEARCH_PAGE_SIZE
+        shown = search_cursor.get("shown", 0)
+
+        footer = "➕ Say 'show more' to see more rooms." if has_more else "That's all the rooms for this search."
+
+        # Append to the existing results so "room 5" keeps working
+        search_results = tracker.get_slot("search_results")
+        if isinstance(search_results, dict):
+            search_results = dict(search_results)
+            search_results["ids"] = list(search_results.get("ids") or []) + [room['id'] for room in page]
+        else:
+            search_results = list(search_results or []) + [serialize_room(room) for room in page]
+
+        utter_rooms(dispatcher, tracker, f"🏠 More rooms in {location.title()}:", page, shown + 1, footer)
+        return [
+            SlotSet("search_results", search_results),
+            SlotSet("search_cursor", next_page_cursor(
+                page, has_more, location, search_cursor.get("budget"), search_cursor.get("preferences"),
+                shown + len(page), near, radius, ranked_ids[SEARCH_PAGE_SIZE:] if ranked_ids else None
+            ))
+        ]
+
 class ActionGetRoomDetails(Action):
     def name(self) -> Text:
         return "action_get_room_details"
 
-    def run(self, dispatcher: CollectingDispatcher,
+    @metrics.timed_action
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         # Get the latest message to extract room number
         latest_message = tracker.latest_message.get('text', '').lower()
-        print(f"DEBUG: Latest message: '{latest_message}'")
-        
-        # Extract room number from user input
-        room_number = None
-        
-        # Check for exact matches first
-        if 'room 1' in latest_message or 'first room' in latest_message or latest_message.strip() == '1':
-            room_number = 1
-        elif 'room 2' in latest_message or 'second room' in latest_message or latest_message.strip() == '2':
-            room_number = 2
-        elif 'room 3' in latest_message or 'third room' in latest_message or latest_message.strip() == '3':
-            room_number = 3
-        # Fallback to simple number detection
-        elif '1' in latest_message and not any(x in latest_message for x in ['11', '12', '13', '21', '31']):
-            room_number = 1
-        elif '2' in latest_message and not any(x in latest_message for x in ['12', '21', '22', '23', '32']):
-            room_number = 2
-        elif '3' in latest_message and not any(x in latest_message for x in ['13', '23', '31', '32', '33']):
-            room_number = 3
-        
-        print(f"DEBUG: Detected room number: {room_number}")
+        logger.debug("Latest message: %r", latest_message)
+        
+        # Extract room number from user input ("room 12", "2nd", "দ্বিতীয়", "3")
+        room_number = parse_room_number(latest_message)
+        if room_number is None:
+            room_entity = next(tracker.get_latest_entity_values("room_number"), None)
+            room_number = parse_room_number(room_entity)
+        
+        logger.debug("Detected room number: %s", room_number)
         
         # Get search results from slot
-        search_results = tracker.get_slot("search_results")
-        print(f"DEBUG: Search results: {search_results}")
+        search_results = await load_search_results(tracker)
+        logger.debug("Loaded %s search results", len(search_results or []))
         
+        if search_results is None:
+            dispatcher.utter_message(text=RESULTS_UNAVAILABLE)
+            return []
         if not search_results:
             dispatcher.utter_message(text="Please search for rooms first, then ask for details.")
             return []
         
-        if room_number is None or room_number > len(search_results):
+        if room_number == LAST_ROOM:
+            room_number = len(search_results)
+
+        if room_number is None or not 1 <= room_number <= len(search_results):
             dispatcher.utter_message(text=f"Please specify which room (1-{len(search_results)}) you'd like details for.")
             return []
         
         # Get the selected room
         room = search_results[room_number - 1]
+        if room is None:
+            dispatcher.utter_message(text=room_unavailable(room_number))
+            return []
         
         # Create detailed response
         response = f"🏠 **Room {room_number} Details: {room['neighborhood']}**\n\n"
@@ -270,19 +516,26 @@ class ActionCompareRooms(Action):
     def name(self) -> Text:
         return "action_compare_rooms"
 
-    def run(self, dispatcher: CollectingDispatcher,
+    @metrics.timed_action
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
-        search_results = tracker.get_slot("search_results")
+        search_results = await load_search_results(tracker)
         
-        if not search_results or len(search_results) < 2:
+        if search_results is None:
+            dispatcher.utter_message(text=RESULTS_UNAVAILABLE)
+            return []
+        if len([room for room in search_results[:3] if room]) < 2:
             dispatcher.utter_message(text="You need at least 2 rooms to compare. Please search for more rooms first.")
             return []
         
         response = "🏠 **Room Comparison:**\n\n"
         
         for i, room in enumerate(search_results[:3], 1):
+            if room is None:
+                response += f"**Room {i}:** no longer available\n\n"
+                continue
             response += f"**Room {i}: {room['neighborhood']}**\n"
             response += f"💰 Price: ৳{room['price']}/month\n"
             response += f"🏠 Type: {room['type'].title()}\n"
@@ -299,16 +552,23 @@ class ActionGetContactInfo(Action):
     def name(self) -> Text:
         return "action_get_contact_info"
 
-    def run(self, dispatcher: CollectingDispatcher,
+    @metrics.timed_action
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         selected_room = tracker.get_slot("selected_room")
-        search_results = tracker.get_slot("search_results")
+        search_results = await load_search_results(tracker)
         
-        if selected_room and search_results:
+        if selected_room and search_results is None:
+            response = RESULTS_UNAVAILABLE
+        elif selected_room and search_results:
             room_number = int(selected_room)
-            if room_number <= len(search_results):
+            if room_number > len(search_results):
+                response = "Please select a valid room number first."
+            elif search_results[room_number - 1] is None:
+                response = room_unavailable(room_number)
+            else:
                 room = search_results[room_number - 1]
                 response = f"📞 **Contact Information for Room {room_number}:**\n\n"
                 response += f"🏠 **Location:** {room['neighborhood']}\n"
@@ -320,8 +580,6 @@ class ActionGetContactInfo(Action):
                 response += "• Ask about viewing the room\n"
                 response += "• Confirm all details before making payments\n"
                 response += "• Always verify the property in person"
-            else:
-                response = "Please select a valid room number first."
         else:
             response = "Please search for rooms and select one to get contact information."
         
@@ -332,17 +590,24 @@ class ActionAreaInformation(Action):
     def name(self) -> Text:
         return "action_area_information"
 
-    def run(self, dispatcher: CollectingDispatcher,
+    @metrics.timed_action
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         location = tracker.get_slot("location")
         selected_room = tracker.get_slot("selected_room")
-        search_results = tracker.get_slot("search_results")
+        search_results = await load_search_results(tracker)
         
-        if selected_room and search_results:
+        if selected_room and search_results is None:
+            response = RESULTS_UNAVAILABLE
+        elif selected_room and search_results:
             room_number = int(selected_room)
-            if room_number <= len(search_results):
+            if room_number > len(search_results):
+                response = "Please select a valid room number first."
+            elif search_results[room_number - 1] is None:
+                response = room_unavailable(room_number)
+            else:
                 room = search_results[room_number - 1]
                 response = f"🏙️ **Area Information for {room['neighborhood']}:**\n\n"
                 response += f"📍 **Exact Location:** {room['area_details']}\n\n"
@@ -355,28 +620,24 @@ class ActionAreaInformation(Action):
                 for transport in room['transportation']:
                     response += f"• {transport}\n"
                 
-                response += f"\n💡 **Area Highlights:**\n"
-                if "TSC" in room['nearby'] or "Dhaka University" in room['nearby']:
-                    response += "• Student-friendly area\n"
-                if "Market" in str(room['nearby']):
-                    response += "• Shopping facilities nearby\n"
-                if "Hospital" in str(room['nearby']):
-                    response += "• Medical facilities available\n"
-                if "Restaurant" in str(room['nearby']):
-                    response += "• Food options easily accessible\n"
+                # Highlights come from the precomputed profile of the room's neighborhood
+                profile = await async_db.get_area_profile(room['neighborhood'])
+                if profile:
+                    response += f"\n💡 **Area Highlights:**\n"
+                    response += format_area_profile(profile)
                 
                 response += f"\n🏠 **Room Type:** {room['type'].title()}\n"
                 response += f"💰 **Price Range:** ৳{room['price']}/month\n"
                 response += f"👥 **Suitable for:** {', '.join(room['occupancy']).title()}"
-            else:
-                response = "Please select a valid room number first."
         elif location:
-            response = f"🏙️ **General Information about {location.title()}:**\n\n"
-            response += "• Well-connected area with good transportation\n"
-            response += "• Markets, restaurants, and essential services nearby\n"
-            response += "• Generally safe and residential\n"
-            response += "• Good for students and professionals\n\n"
-            response += "💡 **Tip:** Search for specific rooms to get detailed area information!"
+            profile = await async_db.get_area_profile(location)
+            if profile:
+                response = f"🏙️ **Area Information for {profile['neighborhood'] or profile['area_name']}:**\n\n"
+                response += format_area_profile(profile)
+                response += "\n💡 **Tip:** Search for rooms here to see exact places near each one!"
+            else:
+                response = f"I don't have area information for {location.title()} yet.\n\n"
+                response += "💡 **Tip:** Search for rooms there to see the places near each one!"
         else:
             response = "Please search for rooms or specify a location to get area information."
         
@@ -387,6 +648,7 @@ class ActionResetSearch(Action):
     def name(self) -> Text:
         return "action_reset_search"
 
+    @metrics.timed_action
     def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
@@ -398,5 +660,6 @@ class ActionResetSearch(Action):
             SlotSet("location", None),
             SlotSet("budget", None),
             SlotSet("preferences", None),
-            SlotSet("search_results", None)
+            SlotSet("search_results", None),
+            SlotSet("search_cursor", None)
         ]
@@ -0,0 +1,40 @@
+import re
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]')
+
+# Preferences that map to a boolean column instead of the amenity index
+COLUMN_PREFERENCES = {
+    'furnished': 'p.furnished',
+}
+
+# Preferences the search will filter on, by amenity key
+SEARCHABLE_AMENITIES = {'ac', 'wifi', 'parking', 'security'}
+
+PREFERENCE_SYNONYMS = {
+    'airconditioning': 'ac',
+    'airconditioner': 'ac',
+    'internet': 'wifi',
+    'guard': 'security',
+}
+
+
+def amenity_key(name):
+    """Normalized amenity key, matching LOWER(REGEXP_REPLACE(name, '[^A-Za-z0-9]', '')) in SQL."""
+    key = _NON_ALNUM.sub('', str(name).lower())
+    return PREFERENCE_SYNONYMS.get(key, key)
+
+
+def preference_keys(preferences):
+    """Sorted tuple of the preference keys the search can filter on."""
+    if not preferences or not isinstance(preferences, list):
+        return ()
+    keys = {amenity_key(pref) for pref in preferences}
+    return tuple(sorted(key for key in keys if key in COLUMN_PREFERENCES or key in SEARCHABLE_AMENITIES))
+
+
+def split_preferences(preferences):
+    """Split preference strings into (column filters, sorted amenity keys)."""
+    keys = preference_keys(preferences)
+    columns = [COLUMN_PREFERENCES[key] for key in keys if key in COLUMN_PREFERENCES]
+    amenity_keys = [key for key in keys if key in SEARCHABLE_AMENITIES]
+    return columns, amenity_keys
@@ -0,0 +1,145 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+
+from .database import db
+from .logs import env_float, env_int, get_logger
+from . import metrics
+
+logger = get_logger(__name__)
+
+SEARCH = 'search'
+CONVERSATION = 'conversation'
+
+
+class AnalyticsWriter:
+    """Background sink for search_analytics and bot_conversations rows.
+
+    Actions only enqueue rows; a worker thread writes them to MySQL in
+    multi-row batches once ANALYTICS_BATCH_SIZE rows are waiting or
+    ANALYTICS_FLUSH_INTERVAL seconds have passed. The queue is bounded by
+    ANALYTICS_QUEUE_SIZE and rows that don't fit are counted in `dropped`.
+    A batch that fails, by returning False or raising, is logged and counted
+    in `failed`; the worker keeps running.
+    """
+
+    def __init__(self, database):
+        self.database = database
+        self.batch_size = max(env_int('ANALYTICS_BATCH_SIZE', 100), 1)
+        self.flush_interval = env_float('ANALYTICS_FLUSH_INTERVAL', 2.0)
+        self.queue = queue.Queue(maxsize=max(env_int('ANALYTICS_QUEUE_SIZE', 10000), 1))
+        self.enabled = os.getenv('ANALYTICS_ENABLED', 'true').lower() == 'true'
+
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='analytics-writer', daemon=True)
+                self._thread.start()
+
+    def log_search_analytics(self, user_id, location, budget, preferences, results_shown):
+        self._enqueue(SEARCH, (user_id, location, budget, json.dumps(preferences) if preferences else None, results_shown))
+
+    def log_conversation(self, user_id, session_id, user_message, bot_response, intent, confidence, entities):
+        self._enqueue(CONVERSATION, (user_id, session_id, user_message, bot_response, intent, confidence, json.dumps(entities)))
+
+    def _enqueue(self, kind, row):
+        if not self.enabled:
+            return
+        if self._thread is None:
+            self.start()
+        try:
+            self.queue.put_nowait((kind, row))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect_batch()
+            if batch:
+                self._write(batch)
+        # Drain whatever is left on shutdown
+        self.flush()
+
+    def _collect_batch(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stop.is_set():
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def flush(self):
+        """Write every queued row now, in batches."""
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            self._write(batch)
+
+    def _write(self, batch):
+        searches = [row for kind, row in batch if kind == SEARCH]
+        conversations = [row for kind, row in batch if kind == CONVERSATION]
+
+        if searches:
+            self._insert(self.database.insert_search_analytics_batch, searches, SEARCH)
+        if conversations:
+            self._insert(self.database.insert_conversations_batch, conversations, CONVERSATION)
+
+    def _insert(self, insert_batch, rows, kind):
+        try:
+            ok = insert_batch(rows)
+        except Exception as e:
+            # An exception here would end the worker thread and every later row would be dropped
+            logger.error("Error writing %s %s analytics rows: %s", len(rows), kind, e)
+            ok = False
+        if ok:
+            self.written += len(rows)
+        else:
+            self.failed += len(rows)
+
+    def shutdown(self, timeout=5.0):
+        """Stop the worker after draining the queue."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        else:
+            self.flush()
+
+    def stats(self):
+        return {
+            'queued': self.queue.qsize(),
+            'written': self.written,
+            'failed': self.failed,
+            'dropped': self.dropped,
+        }
+
+# Global analytics writer
+analytics_writer = AnalyticsWriter(db)
+atexit.register(analytics_writer.shutdown)
+metrics.registry.gauge(
+    'rental_analytics_rows', 'Analytics rows queued, written, failed and dropped.', ('state',),
+    lambda: {(state,): count for state, count in analytics_writer.stats().items()},
+)
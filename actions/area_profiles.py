@@ -0,0 +1,253 @@
+import argparse
+import json
+import time
+
+from .database import db
+from .logs import get_logger
+
+logger = get_logger(__name__)
+
+NEAREST_PER_TYPE = 3
+
+PROPERTY_ROWS_QUERY = """
+SELECT p.area_key, p.neighborhood_key, p.area_name, p.neighborhood, p.is_available, p.rent_amount, p.updated_at
+FROM properties p
+{where}
+"""
+
+PLACE_ROWS_QUERY = """
+SELECT p.area_key, p.neighborhood_key, np.place_type, np.place_name, np.distance_meters
+FROM nearby_places np
+JOIN properties p ON p.id = np.property_id
+{where}
+"""
+
+TRANSPORT_ROWS_QUERY = """
+SELECT p.area_key, p.neighborhood_key, t.property_id, t.transport_type
+FROM transportation t
+JOIN properties p ON p.id = t.property_id
+{where}
+"""
+
+PROFILE_INSERT = """
+INSERT INTO area_profiles
+(location_key, level, area_key, area_name, neighborhood, listings, available_listings, min_rent, avg_rent,
+ place_counts, nearest_places, transport_modes, source_updated_at)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+class AreaProfile:
+    """Running totals for one area or neighborhood while a refresh streams rows."""
+
+    def __init__(self, location_key, level, area_key, area_name, neighborhood):
+        self.location_key = location_key
+        self.level = level
+        self.area_key = area_key
+        self.area_name = area_name
+        self.neighborhood = neighborhood
+        self.listings = 0
+        self.available = 0
+        self.rent_total = 0.0
+        self.min_rent = None
+        self.updated_at = None
+        self.areas = {}        # (area_key, area_name) -> listings, for neighborhoods found in several areas
+        self.places = {}       # place_type -> {place_name: nearest distance}
+        self.transport = {}    # transport_type -> set of property ids
+
+    def add_property(self, row):
+        self.listings += 1
+        area = (row['area_key'], row['area_name'])
+        self.areas[area] = self.areas.get(area, 0) + 1
+        if row['updated_at'] and (self.updated_at is None or row['updated_at'] > self.updated_at):
+            self.updated_at = row['updated_at']
+        if row['is_available']:
+            rent = float(row['rent_amount'])
+            self.available += 1
+            self.rent_total += rent
+            self.min_rent = rent if self.min_rent is None else min(self.min_rent, rent)
+
+    def add_place(self, row):
+        names = self.places.setdefault(row['place_type'], {})
+        distance = row['distance_meters']
+        current = names.get(row['place_name'])
+        if row['place_name'] not in names or (distance is not None and (current is None or distance < current)):
+            names[row['place_name']] = distance
+
+    def add_transport(self, row):
+        self.transport.setdefault(row['transport_type'], set()).add(row['property_id'])
+
+    def values(self):
+        nearest = {}
+        for place_type, names in self.places.items():
+            ranked = sorted(names.items(), key=lambda item: (item[1] is None, item[1] or 0))
+            nearest[place_type] = [{'place_name': name, 'distance_meters': distance}
+                                   for name, distance in ranked[:NEAREST_PER_TYPE]]
+        # A neighborhood key shared by several areas gets one profile, filed under its biggest area
+        area_key, area_name = max(self.areas, key=lambda area: (self.areas[area], area)) if self.areas else (
+            self.area_key, self.area_name)
+        return (
+            self.location_key, self.level, area_key, area_name, self.neighborhood,
+            self.listings, self.available, self.min_rent,
+            round(self.rent_total / self.available, 2) if self.available else None,
+            json.dumps({place_type: len(names) for place_type, names in self.places.items()}),
+            json.dumps(nearest, ensure_ascii=False),
+            json.dumps({mode: len(ids) for mode, ids in self.transport.items()}),
+            self.updated_at,
+        )
+
+
+class AreaProfileBuilder:
+    """Rebuilds area_profiles from properties, nearby_places and transportation.
+
+    A refresh only recomputes the areas listed in area_profile_changes, which
+    triggers fill on every insert, update and delete of a listing or its
+    nearby places and transport (both areas when a listing moves), plus the
+    neighborhoods in those areas. A neighborhood profile counts every listing
+    with that neighborhood key, whichever area it is in. The rows are replaced
+    in one transaction and the change rows read are cleared with them.
+    """
+
+    def __init__(self, database):
+        self.database = database
+
+    def refresh(self, full=False):
+        """Recompute changed areas, or every area with `full`. Returns the profiles written, or None on error."""
+        with self.database.get_connection() as connection:
+            if connection is None:
+                return None
+
+            try:
+                cursor = connection.cursor(dictionary=True)
+                # Changes recorded after this point are left for the next refresh
+                cursor.execute("SELECT CURRENT_TIMESTAMP(6) as started")
+                started = cursor.fetchone()['started']
+                area_keys = neighborhood_keys = None
+                if not full:
+                    cursor.execute("SELECT area_key FROM area_profile_changes WHERE changed_at <= %s", (started,))
+                    area_keys = [row['area_key'] for row in cursor.fetchall()]
+                    if not area_keys:
+                        cursor.close()
+                        return 0
+                    neighborhood_keys = self._neighborhoods(cursor, area_keys)
+
+                profiles = self._build(cursor, area_keys, neighborhood_keys)
+                self._replace(connection, cursor, profiles, area_keys, neighborhood_keys, started)
+                cursor.close()
+            except Exception as e:
+                logger.error("Error refreshing area profiles: %s", e)
+                return None
+
+        return len(profiles)
+
+    def _neighborhoods(self, cursor, area_keys):
+        """Neighborhood keys in these areas now, and those whose profiles were filed under them."""
+        placeholders = ', '.join(['%s'] * len(area_keys))
+        cursor.execute(
+            f"""SELECT DISTINCT neighborhood_key as location_key FROM properties
+            WHERE area_key IN ({placeholders}) AND neighborhood_key IS NOT NULL
+            UNION
+            SELECT location_key FROM area_profiles WHERE level = 'neighborhood' AND area_key IN ({placeholders})""",
+            tuple(area_keys) * 2,
+        )
+        return [row['location_key'] for row in cursor.fetchall()]
+
+    def _build(self, cursor, area_keys, neighborhood_keys):
+        if area_keys is None:
+            where, params = "", ()
+        else:
+            where = f"WHERE p.area_key IN ({', '.join(['%s'] * len(area_keys))})"
+            params = tuple(area_keys)
+            if neighborhood_keys:
+                where += f" OR p.neighborhood_key IN ({', '.join(['%s'] * len(neighborhood_keys))})"
+                params += tuple(neighborhood_keys)
+        wanted_areas = None if area_keys is None else set(area_keys)
+        wanted_neighborhoods = None if neighborhood_keys is None else set(neighborhood_keys)
+
+        profiles = {}
+
+        def targets(row, create=False):
+            # Every row counts towards its area and, if it has one, its neighborhood, when those are rebuilt
+            found = []
+            keys = [(row['area_key'], 'area', wanted_areas, None)]
+            if row['neighborhood_key']:
+                keys.append((row['neighborhood_key'], 'neighborhood', wanted_neighborhoods, row.get('neighborhood')))
+            for location_key, level, wanted, neighborhood in keys:
+                if wanted is not None and location_key not in wanted:
+                    continue
+                profile = profiles.get((location_key, level))
+                if profile is None and create:
+                    profile = profiles[(location_key, level)] = AreaProfile(
+                        location_key, level, row['area_key'], row['area_name'], neighborhood)
+                if profile:
+                    found.append(profile)
+            return found
+
+        cursor.execute(PROPERTY_ROWS_QUERY.format(where=where), params)
+        for row in cursor.fetchall():
+            for profile in targets(row, create=True):
+                profile.add_property(row)
+
+        cursor.execute(PLACE_ROWS_QUERY.format(where=where), params)
+        for row in cursor.fetchall():
+            for profile in targets(row):
+                profile.add_place(row)
+
+        cursor.execute(TRANSPORT_ROWS_QUERY.format(where=where), params)
+        for row in cursor.fetchall():
+            for profile in targets(row):
+                profile.add_transport(row)
+
+        return list(profiles.values())
+
+    def _replace(self, connection, cursor, profiles, area_keys, neighborhood_keys, started):
+        connection.start_transaction()
+        try:
+            if area_keys is None:
+                cursor.execute("DELETE FROM area_profiles")
+                cursor.execute("DELETE FROM area_profile_changes WHERE changed_at <= %s", (started,))
+            else:
+                placeholders = ', '.join(['%s'] * len(area_keys))
+                cursor.execute(
+                    f"DELETE FROM area_profiles WHERE level = 'area' AND location_key IN ({placeholders})",
+                    tuple(area_keys),
+                )
+                if neighborhood_keys:
+                    cursor.execute(
+                        "DELETE FROM area_profiles WHERE level = 'neighborhood' "
+                        f"AND location_key IN ({', '.join(['%s'] * len(neighborhood_keys))})",
+                        tuple(neighborhood_keys),
+                    )
+                cursor.execute(
+                    f"DELETE FROM area_profile_changes WHERE area_key IN ({placeholders}) AND changed_at <= %s",
+                    tuple(area_keys) + (started,),
+                )
+            if profiles:
+                cursor.executemany(PROFILE_INSERT, [profile.values() for profile in profiles])
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+
+# Global area profile builder
+area_profile_builder = AreaProfileBuilder(db)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the area_profiles table from the listing data.")
+    parser.add_argument('--full', action='store_true', help='rebuild every area, not only changed ones')
+    parser.add_argument('--interval', type=float, help='keep running, every this many seconds')
+    args = parser.parse_args()
+
+    full = args.full
+    while True:
+        written = area_profile_builder.refresh(full=full)
+        print(f"Refreshed {written if written is not None else 0} area profiles")
+        if not args.interval:
+            break
+        full = False
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    main()
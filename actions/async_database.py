@@ -0,0 +1,372 @@
+import asyncio
+import json
+import os
+import ssl
+import time
+from contextlib import asynccontextmanager
+
+try:
+    import aiomysql
+except ImportError:
+    aiomysql = None
+
+from .locations import location_index
+from .logs import get_logger
+from .profiler import query_profiler
+from . import metrics
+from .ranking import normalize_occupancy, rank_properties
+from .database import (
+    db,
+    search_cache,
+    search_key,
+    listing_snapshot,
+    cache_properties,
+    cached_properties,
+    build_search_query,
+    build_nearby_query,
+    build_candidate_query,
+    parse_property_row,
+    parse_property_children,
+    attach_children,
+    order_by_ids,
+    in_query,
+    area_profile_keys,
+    parse_area_profile,
+    AREA_PROFILE_QUERY,
+    PROPERTY_DETAILS_QUERY,
+    PROPERTIES_BY_ID_QUERY,
+    NEARBY_PLACES_BATCH_QUERY,
+    TRANSPORTATION_BATCH_QUERY,
+    CONVERSATION_INSERT,
+    SEARCH_ANALYTICS_INSERT,
+)
+
+logger = get_logger(__name__)
+
+
+class AsyncDatabaseConnection:
+    """asyncio counterpart of DatabaseConnection backed by an aiomysql pool.
+
+    Connection settings are shared with the synchronous instance. When aiomysql
+    is not installed, or DB_ASYNC=false, every call is handed to the synchronous
+    pool on a worker thread so the event loop still never blocks on MySQL.
+    """
+
+    def __init__(self, sync_db):
+        self.sync_db = sync_db
+        self.enabled = aiomysql is not None and os.getenv('DB_ASYNC', 'true').lower() == 'true'
+        self.pool = None
+        self._pool_lock = None
+        self._next_connect_at = 0.0
+        self._failed_connects = 0
+
+    def _connection_config(self):
+        connection_config = {
+            'host': self.sync_db.host,
+            'port': self.sync_db.port,
+            'db': self.sync_db.database,
+            'user': self.sync_db.user,
+            'password': self.sync_db.password,
+            'autocommit': True,
+            'minsize': 1,
+            'maxsize': self.sync_db.pool_size,
+            'pool_recycle': 3600,
+        }
+
+        # Add SSL configuration for cloud databases like Aiven
+        if self.sync_db.ssl_mode and self.sync_db.ssl_mode.upper() == 'REQUIRED':
+            connection_config['ssl'] = ssl.create_default_context()
+
+        return connection_config
+
+    async def connect(self):
+        """Create the aiomysql pool, retrying with exponential backoff."""
+        if self._pool_lock is None:
+            self._pool_lock = asyncio.Lock()
+
+        async with self._pool_lock:
+            if self.pool is not None:
+                return True
+
+            if time.monotonic() < self._next_connect_at:
+                return False
+
+            retries = self.sync_db.connect_retries
+            for attempt in range(retries):
+                try:
+                    self.pool = await aiomysql.create_pool(**self._connection_config())
+                    self._failed_connects = 0
+                    self._next_connect_at = 0.0
+                    logger.info("Async database pool connected successfully (pool size %s)", self.sync_db.pool_size)
+                    return True
+                except Exception as e:
+                    logger.error("Error connecting to database (attempt %s/%s): %s", attempt + 1, retries, e)
+                    if attempt + 1 < retries:
+                        await asyncio.sleep(self.sync_db.backoff_delay(attempt))
+
+            self._failed_connects += 1
+            self._next_connect_at = time.monotonic() + self.sync_db.backoff_delay(self._failed_connects)
+            return False
+
+    async def disconnect(self):
+        if self.pool is not None:
+            self.pool.close()
+            await self.pool.wait_closed()
+            self.pool = None
+
+    @asynccontextmanager
+    async def get_connection(self):
+        """Acquire a healthy connection from the pool for the duration of the block."""
+        if self.pool is None and not await self.connect():
+            yield None
+            return
+
+        pool = self.pool
+        started_at = time.perf_counter()
+        try:
+            connection = await asyncio.wait_for(pool.acquire(), timeout=self.sync_db.pool_timeout)
+        except asyncio.TimeoutError:
+            connection = None
+            logger.error("Error getting database connection: pool exhausted")
+        except Exception as e:
+            connection = None
+            logger.error("Error getting database connection: %s", e)
+        metrics.pool_wait_seconds.observe(time.perf_counter() - started_at, 'async')
+        if connection is None:
+            yield None
+            return
+
+        try:
+            try:
+                await connection.ping(reconnect=True)
+            except Exception as e:
+                logger.error("Error reconnecting pooled connection: %s", e)
+                connection.close()
+                yield None
+                return
+            yield connection
+        finally:
+            pool.release(connection)
+
+    async def _execute(self, cursor, label, query, params=None):
+        """Run one statement on `cursor`, timed under `label` in the query metrics."""
+        started_at = time.perf_counter()
+        try:
+            await cursor.execute(query, params)
+        except Exception:
+            metrics.db_query_errors.inc(label)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started_at
+            metrics.db_query_seconds.observe(elapsed, label)
+            if query_profiler.enabled:
+                query_profiler.record(self.sync_db, label, query, params, elapsed)
+
+    async def _in_thread(self, method, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, method, *args)
+
+    @metrics.timed('async_search_properties')
+    async def search_properties(self, location=None, budget=None, preferences=None, after=None, limit=None):
+        if not self.enabled:
+            return await self._in_thread(self.sync_db.search_properties, location, budget, preferences, after, limit)
+
+        if location and location_index.is_stale():
+            await self._in_thread(location_index.ensure_loaded, self.sync_db)
+
+        key = search_key(location, budget, preferences, after, limit)
+        found, results = search_cache.get(key)
+        if found:
+            return list(results)
+
+        if listing_snapshot is not None:
+            if listing_snapshot.is_stale():
+                await self._in_thread(listing_snapshot.refresh, self.sync_db)
+            if listing_snapshot.loaded:
+                results = await self.get_properties_details(listing_snapshot.search(*key))
+                search_cache.set(key, results)
+                return list(results)
+
+        async with self.get_connection() as connection:
+            if connection is None:
+                return []
+
+            try:
+                async with connection.cursor(aiomysql.DictCursor) as cursor:
+                    query, params = build_search_query(*key)
+                    await self._execute(cursor, 'search', query, params)
+                    results = [parse_property_row(result) for result in await cursor.fetchall()]
+                    # Prefetch nearby places and transportation for the whole page
+                    await self._fetch_children(cursor, results)
+            except Exception as e:
+                logger.error("Error searching properties: %s", e)
+                return []
+
+        search_cache.set(key, results)
+        cache_properties(results)
+        return list(results)
+
+    @metrics.timed('async_search_properties_ranked')
+    async def search_properties_ranked(self, location=None, budget=None, preferences=None, occupancy=None, limit=None):
+        if not self.enabled:
+            return await self._in_thread(self.sync_db.search_properties_ranked, location, budget, preferences, occupancy, limit)
+
+        if location and location_index.is_stale():
+            await self._in_thread(location_index.ensure_loaded, self.sync_db)
+
+        occupancy = normalize_occupancy(occupancy)
+        key = search_key(location, budget, preferences, None, limit) + ('ranked', occupancy)
+        found, results = search_cache.get(key)
+        if found:
+            return list(results)
+
+        async with self.get_connection() as connection:
+            if connection is None:
+                return []
+
+            try:
+                async with connection.cursor(aiomysql.DictCursor) as cursor:
+                    query, params = build_candidate_query(key[0], key[1], key[2], occupancy)
+                    await self._execute(cursor, 'ranked_candidates', query, params)
+                    candidates = [parse_property_row(result) for result in await cursor.fetchall()]
+                    results = rank_properties(candidates, key[1], list(key[2]), occupancy, key[4])
+                    await self._fetch_children(cursor, results)
+            except Exception as e:
+                logger.error("Error ranking properties: %s", e)
+                return []
+
+        search_cache.set(key, results)
+        cache_properties(results)
+        return list(results)
+
+    @metrics.timed('async_search_properties_near')
+    async def search_properties_near(self, latitude, longitude, radius_meters, budget=None, preferences=None, after=None, limit=None):
+        if not self.enabled:
+            return await self._in_thread(self.sync_db.search_properties_near, latitude, longitude, radius_meters, budget, preferences, after, limit)
+
+        async with self.get_connection() as connection:
+            if connection is None:
+                return []
+
+            try:
+                async with connection.cursor(aiomysql.DictCursor) as cursor:
+                    query, params = build_nearby_query(latitude, longitude, radius_meters, budget, preferences, after, limit)
+                    await self._execute(cursor, 'nearby', query, params)
+                    results = [parse_property_row(result) for result in await cursor.fetchall()]
+                    await self._fetch_children(cursor, results)
+            except Exception as e:
+                logger.error("Error searching nearby properties: %s", e)
+                return []
+
+        cache_properties(results)
+        return results
+
+    @metrics.timed('async_get_property_details')
+    async def get_property_details(self, property_id):
+        if not self.enabled:
+            return await self._in_thread(self.sync_db.get_property_details, property_id)
+
+        async with self.get_connection() as connection:
+            if connection is None:
+                return None
+
+            try:
+                async with connection.cursor(aiomysql.DictCursor) as cursor:
+                    await self._execute(cursor, 'property_details', PROPERTY_DETAILS_QUERY, (property_id,))
+                    property_data = await cursor.fetchone()
+
+                    if property_data:
+                        parse_property_row(property_data)
+                        parse_property_children(property_data)
+
+                    return property_data
+            except Exception as e:
+                logger.error("Error getting property details: %s", e)
+                return None
+
+    @metrics.timed('async_get_properties_details')
+    async def get_properties_details(self, property_ids, keep_missing=False):
+        if not self.enabled:
+            return await self._in_thread(self.sync_db.get_properties_details, property_ids, keep_missing)
+
+        requested = list(property_ids)
+        property_ids = list(dict.fromkeys(requested))
+        found, missing = cached_properties(property_ids)
+        if not missing:
+            return order_by_ids(found.values(), requested, keep_missing)
+
+        async with self.get_connection() as connection:
+            if connection is None:
+                return None if keep_missing else order_by_ids(found.values(), property_ids)
+
+            try:
+                async with connection.cursor(aiomysql.DictCursor) as cursor:
+                    await self._execute(cursor, 'properties_by_id', in_query(PROPERTIES_BY_ID_QUERY, missing), missing)
+                    properties = [parse_property_row(row) for row in await cursor.fetchall()]
+                    await self._fetch_children(cursor, properties)
+            except Exception as e:
+                logger.error("Error getting property details: %s", e)
+                return None if keep_missing else order_by_ids(found.values(), property_ids)
+
+        cache_properties(properties)
+        return order_by_ids(list(found.values()) + properties, requested, keep_missing)
+
+    @metrics.timed('async_get_area_profile')
+    async def get_area_profile(self, location):
+        if not self.enabled:
+            return await self._in_thread(self.sync_db.get_area_profile, location)
+
+        async with self.get_connection() as connection:
+            if connection is None:
+                return None
+
+            try:
+                async with connection.cursor(aiomysql.DictCursor) as cursor:
+                    await self._execute(cursor, 'area_profile', AREA_PROFILE_QUERY, area_profile_keys(location))
+                    profile = await cursor.fetchone()
+            except Exception as e:
+                logger.error("Error getting area profile: %s", e)
+                return None
+
+        return parse_area_profile(profile) if profile else None
+
+    async def _fetch_children(self, cursor, properties):
+        property_ids = [property_data['id'] for property_data in properties]
+        if not property_ids:
+            return properties
+
+        await self._execute(cursor, 'nearby_places_batch', in_query(NEARBY_PLACES_BATCH_QUERY, property_ids), property_ids)
+        nearby_rows = list(await cursor.fetchall())
+        await self._execute(cursor, 'transportation_batch', in_query(TRANSPORTATION_BATCH_QUERY, property_ids), property_ids)
+        transportation_rows = list(await cursor.fetchall())
+        return attach_children(properties, nearby_rows, transportation_rows)
+
+    async def log_conversation(self, user_id, session_id, user_message, bot_response, intent, confidence, entities):
+        if not self.enabled:
+            return await self._in_thread(self.sync_db.log_conversation, user_id, session_id, user_message, bot_response, intent, confidence, entities)
+
+        async with self.get_connection() as connection:
+            if connection is None:
+                return
+
+            try:
+                async with connection.cursor() as cursor:
+                    await self._execute(cursor, 'insert_conversation', CONVERSATION_INSERT, (user_id, session_id, user_message, bot_response, intent, confidence, json.dumps(entities)))
+            except Exception as e:
+                logger.error("Error logging conversation: %s", e)
+
+    async def log_search_analytics(self, user_id, location, budget, preferences, results_shown):
+        if not self.enabled:
+            return await self._in_thread(self.sync_db.log_search_analytics, user_id, location, budget, preferences, results_shown)
+
+        async with self.get_connection() as connection:
+            if connection is None:
+                return
+
+            try:
+                async with connection.cursor() as cursor:
+                    await self._execute(cursor, 'insert_search_analytics', SEARCH_ANALYTICS_INSERT, (user_id, location, budget, json.dumps(preferences) if preferences else None, results_shown))
+            except Exception as e:
+                logger.error("Error logging search analytics: %s", e)
+
+# Global async database instance
+async_db = AsyncDatabaseConnection(db)
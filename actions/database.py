@@ -1,196 +1,937 @@
-import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, pooling
+from mysql.connector.errors import PoolError
 import os
+import threading
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
 import json
+import math
+from .locations import location_index, like_prefix, location_key, location_matches
+from .amenities import preference_keys, split_preferences
+from .cache import TTLCache
+from .geo import bounding_polygon_wkt
+from .ranking import rank_properties, FRESHNESS_HALF_LIFE_DAYS, PRICE_TOLERANCE, WEIGHTS, normalize_occupancy
+from .snapshot import ListingSnapshot, SNAPSHOT_COLUMNS
+from .logs import env_float, env_int, get_logger
+from .profiler import query_profiler
+from . import metrics
 
 load_dotenv()
 
+logger = get_logger(__name__)
+
+
+# Search results cache, keyed on the normalized search
+search_cache = TTLCache(
+    maxsize=env_int('SEARCH_CACHE_SIZE', 512),
+    ttl=env_float('SEARCH_CACHE_TTL', 60.0),
+)
+SEARCH_BUDGET_BUCKET = max(env_int('SEARCH_BUDGET_BUCKET', 500), 1)
+SEARCH_LIMIT = max(env_int('SEARCH_LIMIT', 10), 1)
+RANKING_CANDIDATES = max(env_int('RANKING_CANDIDATES', 500), 1)
+
+# Optional in-memory listing snapshot that serves searches without MySQL
+listing_snapshot = None
+if os.getenv('SEARCH_SNAPSHOT', 'false').lower() == 'true':
+    listing_snapshot = ListingSnapshot(refresh_seconds=env_float('SNAPSHOT_REFRESH_SECONDS', 30.0))
+
+# Property rows (with children) by id, filled by searches and used to hydrate follow-ups
+property_cache = TTLCache(
+    maxsize=env_int('PROPERTY_CACHE_SIZE', 2048),
+    ttl=env_float('PROPERTY_CACHE_TTL', 600.0),
+)
+
+metrics.register_cache('search', search_cache)
+metrics.register_cache('property', property_cache)
+
+
+def cache_properties(properties):
+    for property_data in properties:
+        property_cache.set(property_data['id'], property_data)
+
+
+def cached_properties(property_ids):
+    """Split ids into ({id: cached property}, [ids to fetch])."""
+    found = {}
+    missing = []
+    for property_id in property_ids:
+        hit, property_data = property_cache.get(property_id)
+        if hit:
+            found[property_id] = property_data
+        else:
+            missing.append(property_id)
+    return found, missing
+
+
+def search_key(location=None, budget=None, preferences=None, after=None, limit=None):
+    """Normalize search inputs into a (location key, budget bucket, preference keys, after, limit) tuple.
+
+    Budgets are rounded up to the next SEARCH_BUDGET_BUCKET so nearby budgets
+    share one cache entry; the query runs with the bucketed budget. `after`
+    is the (rent_amount, id) keyset cursor of the last row already shown.
+    """
+    location_key = location_index.resolve(location) if location else ''
+    budget_bucket = None
+    if budget:
+        budget_bucket = int(math.ceil(float(budget) / SEARCH_BUDGET_BUCKET) * SEARCH_BUDGET_BUCKET)
+    if after is not None:
+        after = (float(after[0]), int(after[1]))
+    return location_key, budget_bucket, preference_keys(preferences), after, limit or SEARCH_LIMIT
+
+
+def page_cursor(property_data):
+    """Keyset cursor for continuing a search after this row."""
+    return [float(property_data['rent_amount']), int(property_data['id'])]
+
+
+def search_filters(location_key='', budget=None, preferences=(), budget_tolerance=1.1):
+    """SQL conditions and parameters shared by every search mode."""
+    query = ""
+    params = []
+
+    # Add location filter on the indexed key columns. Keys come from location_key(), which puts known
+    # place names first, so a prefix match also finds "Sector 7, Uttara" for "uttara"
+    if location_key:
+        query += " AND (p.area_key LIKE %s OR p.neighborhood_key LIKE %s)"
+        location_param = like_prefix(location_key)
+        params.extend([location_param, location_param])
+
+    # Add budget filter
+    if budget:
+        query += " AND p.rent_amount <= %s"
+        params.append(float(budget) * budget_tolerance)  # 10% tolerance by default
+
+    # Add preferences filter through the property_amenities index
+    column_filters, amenity_keys = split_preferences(list(preferences))
+    for column in column_filters:
+        query += f" AND {column} = TRUE"
+    if amenity_keys:
+        placeholders = ", ".join(["%s"] * len(amenity_keys))
+        query += f"""
+        AND p.id IN (
+            SELECT pa.property_id
+            FROM property_amenities pa
+            JOIN amenities a ON a.id = pa.amenity_id
+            WHERE a.amenity_key IN ({placeholders})
+            GROUP BY pa.property_id
+            HAVING COUNT(*) = %s
+        )"""
+        params.extend(amenity_keys)
+        params.append(len(amenity_keys))
+
+    return query, params
+
+
+def build_search_query(location_key='', budget=None, preferences=(), after=None, limit=SEARCH_LIMIT):
+    """Build the property search SQL and its parameters from a normalized search key."""
+    # Base query
+    query = """
+    SELECT p.*, u.full_name as owner_name, u.phone as owner_phone
+    FROM properties p
+    JOIN users u ON p.owner_id = u.id
+    WHERE p.is_available = TRUE
+    """
+    filters, params = search_filters(location_key, budget, preferences)
+    query += filters
+
+    # Keyset pagination: continue after the last (rent_amount, id) shown, so
+    # deep pages are a range scan on idx_available_rent rather than an OFFSET
+    if after is not None:
+        query += " AND (p.rent_amount > %s OR (p.rent_amount = %s AND p.id > %s))"
+        params.extend([after[0], after[0], after[1]])
+
+    query += " ORDER BY p.rent_amount, p.id LIMIT %s"
+    params.append(int(limit))
+    return query, params
+
+
+def relevance_order(budget=None, preferences=(), occupancy=None, weights=None):
+    """ranking.score as an SQL expression, so the candidate LIMIT keeps the best rows rather than the cheapest.
+
+    Amenities are counted from property_amenities rather than the JSON
+    column, so it can differ slightly from the final numpy score.
+    """
+    weights = weights or WEIGHTS
+    terms, params = [], []
+    if budget:
+        terms.append("%s * GREATEST(0, LEAST(1, 1 - GREATEST(p.rent_amount - %s, 0) / %s))")
+        params.extend([weights['price'], float(budget), float(budget) * PRICE_TOLERANCE])
+
+    column_filters, amenity_keys = split_preferences(list(preferences))
+    if column_filters or amenity_keys:
+        matched = [f"COALESCE({column} = TRUE, 0)" for column in column_filters]
+        if amenity_keys:
+            matched.append(f"""(
+                SELECT COUNT(*)
+                FROM property_amenities pa
+                JOIN amenities a ON a.id = pa.amenity_id
+                WHERE pa.property_id = p.id AND a.amenity_key IN ({", ".join(["%s"] * len(amenity_keys))})
+            )""")
+        terms.append(f"%s * ({' + '.join(matched)}) / %s")
+        params.append(weights['amenities'])
+        params.extend(amenity_keys)
+        params.append(len(column_filters) + len(amenity_keys))
+
+    occupancy = normalize_occupancy(occupancy)
+    if occupancy:
+        terms.append("%s * CASE p.occupancy_type WHEN %s THEN 1 WHEN 'mixed' THEN 0.5 ELSE 0 END")
+        params.extend([weights['occupancy'], occupancy])
+
+    terms.append("%s * COALESCE(u.rating, 0) / 5")
+    terms.append("%s * COALESCE(p.featured = TRUE, 0)")
+    terms.append("%s * POW(2, -COALESCE(TIMESTAMPDIFF(SECOND, COALESCE(p.updated_at, p.created_at), NOW()) / 86400, 365) / %s)")
+    params.extend([weights['rating'], weights['featured'], weights['freshness'], FRESHNESS_HALF_LIFE_DAYS])
+    return " + ".join(terms), params
+
+
+def build_candidate_query(location_key='', budget=None, preferences=(), occupancy=None, limit=RANKING_CANDIDATES):
+    """Candidate set for ranked search: location and a wider budget, best `limit` rows by relevance.
+
+    Preferences, occupancy and owner rating are scored rather than filtered:
+    the same score, in SQL, picks the candidates, and rank_properties orders
+    them exactly.
+    """
+    query = """
+    SELECT p.*, u.full_name as owner_name, u.phone as owner_phone, u.rating as owner_rating
+    FROM properties p
+    JOIN users u ON p.owner_id = u.id
+    WHERE p.is_available = TRUE
+    """
+    filters, params = search_filters(location_key, budget, (), budget_tolerance=1 + PRICE_TOLERANCE)
+    query += filters
+    relevance, relevance_params = relevance_order(budget, preferences, occupancy)
+    query += f" ORDER BY {relevance} DESC, p.rent_amount, p.id LIMIT %s"
+    params.extend(relevance_params)
+    params.append(int(limit))
+    return query, params
+
+
+DISTANCE_SQL = "ST_Distance_Sphere(p.geo_point, POINT(%s, %s))"
+
+
+def build_nearby_query(latitude, longitude, radius_meters, budget=None, preferences=None, after=None, limit=SEARCH_LIMIT):
+    """Build a radius search sorted by distance.
+
+    MBRContains on the bounding box is served by the SPATIAL index on
+    geo_point; the exact spherical distance is only computed for rows inside
+    the box. `after` is the (distance_meters, id) cursor of the last row shown.
+    """
+    point = [longitude, latitude]
+    query = f"""
+    SELECT p.*, u.full_name as owner_name, u.phone as owner_phone,
+        {DISTANCE_SQL} as distance_meters
+    FROM properties p
+    JOIN users u ON p.owner_id = u.id
+    WHERE p.is_available = TRUE
+    AND MBRContains(ST_GeomFromText(%s, 0), p.geo_point)
+    AND {DISTANCE_SQL} <= %s
+    """
+    params = point + [bounding_polygon_wkt(latitude, longitude, radius_meters)] + point + [radius_meters]
+
+    filters, filter_params = search_filters('', budget, preference_keys(preferences))
+    query += filters
+    params.extend(filter_params)
+
+    if after is not None:
+        query += f" AND ({DISTANCE_SQL} > %s OR ({DISTANCE_SQL} = %s AND p.id > %s))"
+        params.extend(point + [float(after[0])] + point + [float(after[0]), int(after[1])])
+
+    query += " ORDER BY distance_meters, p.id LIMIT %s"
+    params.append(int(limit or SEARCH_LIMIT))
+    return query, params
+
+
+def nearby_cursor(property_data):
+    """Keyset cursor for continuing a radius search after this row."""
+    return [float(property_data['distance_meters']), int(property_data['id'])]
+
+
+def parse_property_row(result):
+    """Decode the JSON columns of a property row in place."""
+    try:
+        if result['amenities']:
+            if isinstance(result['amenities'], str):
+                result['amenities'] = json.loads(result['amenities'])
+        if result['images']:
+            if isinstance(result['images'], str):
+                result['images'] = json.loads(result['images'])
+    except (json.JSONDecodeError, TypeError):
+        # Fallback for XAMPP MySQL compatibility
+        result['amenities'] = result.get('amenities', [])
+        result['images'] = result.get('images', [])
+    return result
+
+
+# One round trip: children are aggregated into JSON arrays by correlated subqueries
+PROPERTY_DETAILS_QUERY = """
+SELECT p.*, u.full_name as owner_name, u.phone as owner_phone,
+    (SELECT JSON_ARRAYAGG(JSON_OBJECT(
+                'place_name', np.place_name,
+                'place_type', np.place_type,
+                'distance_meters', np.distance_meters))
+     FROM nearby_places np
+     WHERE np.property_id = p.id) as nearby_places,
+    (SELECT JSON_ARRAYAGG(JSON_OBJECT(
+                'transport_type', t.transport_type,
+                'details', t.details))
+     FROM transportation t
+     WHERE t.property_id = p.id) as transportation
+FROM properties p
+JOIN users u ON p.owner_id = u.id
+WHERE p.id = %s
+"""
+
+PROPERTIES_BY_ID_QUERY = """
+SELECT p.*, u.full_name as owner_name, u.phone as owner_phone
+FROM properties p
+JOIN users u ON p.owner_id = u.id
+WHERE p.id IN ({placeholders})
+"""
+
+NEARBY_PLACES_BATCH_QUERY = """
+SELECT property_id, place_name, place_type, distance_meters
+FROM nearby_places
+WHERE property_id IN ({placeholders})
+ORDER BY property_id, distance_meters
+"""
+
+TRANSPORTATION_BATCH_QUERY = """
+SELECT property_id, transport_type, details
+FROM transportation
+WHERE property_id IN ({placeholders})
+ORDER BY property_id, id
+"""
+
+
+def in_query(query, ids):
+    """Fill the {placeholders} slot of `query` with one %s per id."""
+    return query.format(placeholders=", ".join(["%s"] * len(ids)))
+
+
+def parse_property_children(property_data):
+    """Decode JSON_ARRAYAGG child columns, sorting nearby places by distance."""
+    for column in ('nearby_places', 'transportation'):
+        value = property_data.get(column)
+        if isinstance(value, (str, bytes)):
+            value = json.loads(value)
+        property_data[column] = value or []
+    property_data['nearby_places'].sort(key=lambda place: place.get('distance_meters') or 0)
+    return property_data
+
+
+def attach_children(properties, nearby_rows, transportation_rows):
+    """Group batched child rows by property_id onto their property dicts."""
+    by_id = {}
+    for property_data in properties:
+        property_data['nearby_places'] = []
+        property_data['transportation'] = []
+        by_id[property_data['id']] = property_data
+
+    for row in nearby_rows:
+        property_data = by_id.get(row.pop('property_id'))
+        if property_data is not None:
+            property_data['nearby_places'].append(row)
+    for row in transportation_rows:
+        property_data = by_id.get(row.pop('property_id'))
+        if property_data is not None:
+            property_data['transportation'].append(row)
+    return properties
+
+
+def order_by_ids(properties, property_ids, keep_missing=False):
+    """Return properties in the order of `property_ids`, each id once and missing ones skipped.
+
+    With keep_missing every position of `property_ids` is kept, None standing for a missing property.
+    """
+    by_id = {property_data['id']: property_data for property_data in properties}
+    if keep_missing:
+        return [by_id.get(property_id) for property_id in property_ids]
+    return [by_id[property_id] for property_id in dict.fromkeys(property_ids) if property_id in by_id]
+
+
+# Neighborhood rows sort before area rows (ENUM order), so the narrower profile wins
+AREA_PROFILE_QUERY = """
+SELECT * FROM area_profiles
+WHERE location_key IN (%s, %s)
+ORDER BY level
+LIMIT 1
+"""
+
+
+REKEY_SELECT = "SELECT id, area_name, neighborhood, area_key, neighborhood_key FROM properties"
+REKEY_UPDATE = "UPDATE properties SET area_key = %s, neighborhood_key = %s WHERE id = %s"
+
+
+def area_profile_keys(location):
+    """Keys to look a location up by: its stored location_key form, then its resolved alias."""
+    return location_key(location) or '', location_index.resolve(location)
+
+
+def parse_area_profile(profile):
+    """Decode the JSON columns of an area_profiles row in place."""
+    for column in ('place_counts', 'nearest_places', 'transport_modes'):
+        value = profile.get(column)
+        if isinstance(value, (str, bytes)):
+            value = json.loads(value)
+        profile[column] = value or {}
+    return profile
+
+
+CONVERSATION_INSERT = """
+INSERT INTO bot_conversations
+(user_id, session_id, user_message, bot_response, intent, confidence, entities)
+VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+SEARCH_ANALYTICS_INSERT = """
+INSERT INTO search_analytics
+(user_id, search_location, search_budget, search_preferences, results_shown)
+VALUES (%s, %s, %s, %s, %s)
+"""
+
+
 class DatabaseConnection:
     def __init__(self):
         self.host = os.getenv('DB_HOST', 'mysql')
-        try:
-            self.port = int(os.getenv('DB_PORT', 3306))
-        except (ValueError, TypeError):
-            self.port = 3306
+        self.port = env_int('DB_PORT', 3306)
         self.database = os.getenv('DB_NAME', 'rasa_db')
         self.user = os.getenv('DB_USER', 'rasa_user')
         self.password = os.getenv('DB_PASSWORD', 'rasa_password')
         self.ssl_mode = os.getenv('DB_SSL_MODE', 'DISABLED')
-        self.connection = None
-        self.connection_failed = False
+
+        # Pool settings (mysql.connector caps pool_size at 32)
+        self.pool_name = os.getenv('DB_POOL_NAME', 'rental_pool')
+        self.pool_size = min(max(env_int('DB_POOL_SIZE', 5), 1), 32)
+        self.pool_timeout = env_float('DB_POOL_TIMEOUT', 5.0)
+        self.connect_retries = max(env_int('DB_CONNECT_RETRIES', 3), 1)
+        self.retry_backoff = env_float('DB_RETRY_BACKOFF', 0.5)
+        self.retry_backoff_max = env_float('DB_RETRY_BACKOFF_MAX', 8.0)
+
+        self.pool = None
+        self._pool_lock = threading.Lock()
+        self._next_connect_at = 0.0
+        self._failed_connects = 0
+
+    def _connection_config(self):
+        connection_config = {
+            'host': self.host,
+            'port': self.port,
+            'database': self.database,
+            'user': self.user,
+            'password': self.password,
+            'autocommit': True
+        }
+
+        # Add SSL configuration for cloud databases like Aiven
+        if self.ssl_mode and self.ssl_mode.upper() == 'REQUIRED':
+            connection_config['ssl_disabled'] = False
+            connection_config['ssl_verify_cert'] = True
+            connection_config['ssl_verify_identity'] = True
+
+        return connection_config
+
+    def backoff_delay(self, attempt):
+        return min(self.retry_backoff * (2 ** attempt), self.retry_backoff_max)
 
     def connect(self):
-        try:
-            connection_config = {
-                'host': self.host,
-                'port': self.port,
-                'database': self.database,
-                'user': self.user,
-                'password': self.password,
-                'autocommit': True
-            }
-            
-            # Add SSL configuration for cloud databases like Aiven
-            if self.ssl_mode and self.ssl_mode.upper() == 'REQUIRED':
-                connection_config['ssl_disabled'] = False
-                connection_config['ssl_verify_cert'] = True
-                connection_config['ssl_verify_identity'] = True
-            
-            self.connection = mysql.connector.connect(**connection_config)
-            print("Database connected successfully")
-            return True
-        except Error as e:
-            print(f"Error connecting to database: {e}")
+        """Create the connection pool, retrying with exponential backoff."""
+        with self._pool_lock:
+            if self.pool is not None:
+                return True
+
+            # After repeated failures, don't let every request stall on a dead server
+            if time.monotonic() < self._next_connect_at:
+                return False
+
+            for attempt in range(self.connect_retries):
+                try:
+                    self.pool = pooling.MySQLConnectionPool(
+                        pool_name=self.pool_name,
+                        pool_size=self.pool_size,
+                        pool_reset_session=True,
+                        **self._connection_config()
+                    )
+                    self._failed_connects = 0
+                    self._next_connect_at = 0.0
+                    logger.info("Database connected successfully (pool size %s)", self.pool_size)
+                    return True
+                except Error as e:
+                    logger.error("Error connecting to database (attempt %s/%s): %s", attempt + 1, self.connect_retries, e)
+                    if attempt + 1 < self.connect_retries:
+                        time.sleep(self.backoff_delay(attempt))
+
+            self._failed_connects += 1
+            self._next_connect_at = time.monotonic() + self.backoff_delay(self._failed_connects)
             return False
 
     def disconnect(self):
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
+        with self._pool_lock:
+            if self.pool is not None:
+                try:
+                    self.pool._remove_connections()
+                except Error as e:
+                    logger.error("Error closing database pool: %s", e)
+                self.pool = None
 
-    def search_properties(self, location=None, budget=None, preferences=None):
-        if not self.connection or not self.connection.is_connected():
-            if not self.connect():
-                return []
+    def _checkout(self):
+        """Borrow a healthy connection from the pool, or None if the database is unreachable."""
+        if self.pool is None and not self.connect():
+            return None
 
+        started_at = time.perf_counter()
         try:
-            cursor = self.connection.cursor(dictionary=True)
-            
-            # Base query
-            query = """
-            SELECT p.*, u.full_name as owner_name, u.phone as owner_phone
-            FROM properties p
-            JOIN users u ON p.owner_id = u.id
-            WHERE p.is_available = TRUE
-            """
-            params = []
-
-            # Add location filter
-            if location:
-                query += " AND (p.area_name LIKE %s OR p.neighborhood LIKE %s)"
-                location_param = f"%{location}%"
-                params.extend([location_param, location_param])
-
-            # Add budget filter
-            if budget:
-                query += " AND p.rent_amount <= %s"
-                params.append(float(budget) * 1.1)  # 10% tolerance
-
-            # Add preferences filter (simplified for XAMPP compatibility)
-            if preferences and isinstance(preferences, list):
-                for pref in preferences:
-                    if pref.lower() in ['furnished', 'ac', 'wifi', 'parking', 'security']:
-                        # Use JSON_SEARCH instead of JSON_CONTAINS for better XAMPP compatibility
-                        query += f" AND JSON_SEARCH(p.amenities, 'one', '{pref}') IS NOT NULL"
-
-            query += " ORDER BY p.rent_amount LIMIT 10"
-            
-            cursor.execute(query, params)
-            results = cursor.fetchall()
-            
-            # Process JSON fields and handle XAMPP format
-            for result in results:
-                try:
-                    if result['amenities']:
-                        if isinstance(result['amenities'], str):
-                            result['amenities'] = json.loads(result['amenities'])
-                    if result['images']:
-                        if isinstance(result['images'], str):
-                            result['images'] = json.loads(result['images'])
-                except (json.JSONDecodeError, TypeError):
-                    # Fallback for XAMPP MySQL compatibility
-                    result['amenities'] = result.get('amenities', [])
-                    result['images'] = result.get('images', [])
-            
-            cursor.close()
-            return results
+            return self._checkout_from_pool()
+        finally:
+            metrics.pool_wait_seconds.observe(time.perf_counter() - started_at, 'sync')
+
+    def _checkout_from_pool(self):
+        deadline = time.monotonic() + self.pool_timeout
+        attempt = 0
+        while True:
+            pool = self.pool
+            if pool is None:
+                return None
+            try:
+                connection = pool.get_connection()
+            except PoolError:
+                # Pool exhausted, wait for another request to hand a connection back
+                if time.monotonic() >= deadline:
+                    logger.error("Error getting database connection: pool exhausted")
+                    return None
+                time.sleep(min(0.01 * (2 ** attempt), 0.2))
+                attempt += 1
+                continue
+            except Error as e:
+                logger.error("Error getting database connection: %s", e)
+                return None
+
+            # Health check, reconnecting a stale socket in place so it only costs this slot
+            try:
+                connection.ping(reconnect=True, attempts=self.connect_retries, delay=self.retry_backoff)
+                return connection
+            except Error as e:
+                logger.error("Error reconnecting pooled connection: %s", e)
+                self._release(connection, broken=True)
+                if time.monotonic() >= deadline:
+                    return None
+                time.sleep(self.backoff_delay(attempt))
+                attempt += 1
+
+    def _execute(self, cursor, label, query, params=None, many=False):
+        """Run one statement on `cursor`, timed under `label` in the query metrics."""
+        started_at = time.perf_counter()
+        try:
+            if many:
+                cursor.executemany(query, params)
+            else:
+                cursor.execute(query, params)
+        except Exception:
+            metrics.db_query_errors.inc(label)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started_at
+            metrics.db_query_seconds.observe(elapsed, label)
+            if query_profiler.enabled:
+                query_profiler.record(self, label, query, params, elapsed, many)
+
+    @contextmanager
+    def get_connection(self):
+        """Check a connection out of the pool for the duration of the block."""
+        connection = self._checkout()
+        try:
+            yield connection
+        finally:
+            if connection is not None:
+                self._release(connection)
+
+    def _release(self, connection, broken=False):
+        """Return a connection to the pool without ever raising.
 
+        close() resets the session before handing the connection back, which
+        fails on a dropped socket. A broken connection is disconnected first,
+        so the pool reconnects it on its next checkout instead of reusing the
+        dead socket; the pool keeps the slot either way.
+        """
+        if broken:
+            raw = getattr(connection, '_cnx', None)
+            if raw is not None:
+                try:
+                    raw.disconnect()
+                except Error:
+                    pass
+        try:
+            connection.close()
         except Error as e:
-            print(f"Error searching properties: {e}")
-            return []
+            logger.warning("Discarded broken pooled connection: %s", e)
+
+    @metrics.timed('search_properties')
+    def search_properties(self, location=None, budget=None, preferences=None, after=None, limit=None):
+        if location and location_index.is_stale():
+            location_index.ensure_loaded(self)
+
+        key = search_key(location, budget, preferences, after, limit)
+        found, results = search_cache.get(key)
+        if found:
+            return list(results)
+
+        if listing_snapshot is not None:
+            if listing_snapshot.is_stale():
+                listing_snapshot.refresh(self)
+            if listing_snapshot.loaded:
+                results = self.get_properties_details(listing_snapshot.search(*key))
+                search_cache.set(key, results)
+                return list(results)
+
+        with self.get_connection() as connection:
+            if connection is None:
+                return []
+
+            try:
+                cursor = connection.cursor(dictionary=True)
+                query, params = build_search_query(*key)
+                self._execute(cursor, 'search', query, params)
+                results = [parse_property_row(result) for result in cursor.fetchall()]
+                # Prefetch nearby places and transportation for the whole page
+                self._fetch_children(cursor, results)
+                cursor.close()
+            except Error as e:
+                logger.error("Error searching properties: %s", e)
+                return []
+
+        search_cache.set(key, results)
+        cache_properties(results)
+        return list(results)
+
+    @metrics.timed('search_properties_ranked')
+    def search_properties_ranked(self, location=None, budget=None, preferences=None, occupancy=None, limit=None):
+        """Best `limit` properties by relevance score instead of by rent."""
+        if location and location_index.is_stale():
+            location_index.ensure_loaded(self)
+
+        occupancy = normalize_occupancy(occupancy)
+        key = search_key(location, budget, preferences, None, limit) + ('ranked', occupancy)
+        found, results = search_cache.get(key)
+        if found:
+            return list(results)
+
+        with self.get_connection() as connection:
+            if connection is None:
+                return []
+
+            try:
+                cursor = connection.cursor(dictionary=True)
+                query, params = build_candidate_query(key[0], key[1], key[2], occupancy)
+                self._execute(cursor, 'ranked_candidates', query, params)
+                candidates = [parse_property_row(result) for result in cursor.fetchall()]
+                results = rank_properties(candidates, key[1], list(key[2]), occupancy, key[4])
+                # Only the winners need their children
+                self._fetch_children(cursor, results)
+                cursor.close()
+            except Error as e:
+                logger.error("Error ranking properties: %s", e)
+                return []
+
+        search_cache.set(key, results)
+        cache_properties(results)
+        return list(results)
+
+    @metrics.timed('search_properties_near')
+    def search_properties_near(self, latitude, longitude, radius_meters, budget=None, preferences=None, after=None, limit=None):
+        """Available properties within `radius_meters` of a point, nearest first."""
+        with self.get_connection() as connection:
+            if connection is None:
+                return []
+
+            try:
+                cursor = connection.cursor(dictionary=True)
+                query, params = build_nearby_query(latitude, longitude, radius_meters, budget, preferences, after, limit)
+                self._execute(cursor, 'nearby', query, params)
+                results = [parse_property_row(result) for result in cursor.fetchall()]
+                self._fetch_children(cursor, results)
+                cursor.close()
+            except Error as e:
+                logger.error("Error searching nearby properties: %s", e)
+                return []
+
+        cache_properties(results)
+        return results
+
+    def invalidate_search_cache(self, area_name=None, neighborhood=None):
+        """Drop cached searches that could include a property in this area.
+
+        With no arguments the whole cache is cleared.
+        """
+        if area_name is None and neighborhood is None:
+            return search_cache.invalidate()
+
+        # The keys the property is stored under, matched the way search_filters matches them
+        property_keys = [location_key(value) for value in (area_name, neighborhood)]
+        return search_cache.invalidate(lambda key: location_matches(key[0], property_keys))
+
+    def rekey_locations(self, batch_size=1000):
+        """Recompute every property's area_key/neighborhood_key with location_key().
+
+        Returns the number of rows changed, or None on error.
+        """
+        if location_index.is_stale():
+            location_index.ensure_loaded(self)
+        with self.get_connection() as connection:
+            if connection is None:
+                return None
+            try:
+                cursor = connection.cursor(dictionary=True)
+                self._execute(cursor, 'rekey_select', REKEY_SELECT)
+                updates = []
+                for row in cursor.fetchall():
+                    keys = (location_key(row['area_name']), location_key(row['neighborhood']))
+                    if keys != (row['area_key'], row['neighborhood_key']):
+                        updates.append(keys + (row['id'],))
+                for start in range(0, len(updates), batch_size):
+                    self._execute(cursor, 'rekey_update', REKEY_UPDATE, updates[start:start + batch_size], many=True)
+                cursor.close()
+            except Exception as e:
+                logger.error("Error recomputing location keys: %s", e)
+                return None
+
+        if updates:
+            self.invalidate_search_cache()
+        return len(updates)
+
+    def invalidate_listings(self, areas=(), property_ids=()):
+        """Drop cached searches for (area_name, neighborhood) pairs and cached rows of `property_ids`."""
+        property_ids = set(property_ids or ())
+        removed = 0
+        if property_ids:
+            removed += property_cache.invalidate(lambda key: key in property_ids)
+        for area_name, neighborhood in areas or ():
+            removed += self.invalidate_search_cache(area_name, neighborhood)
+        return removed
+
+    def _update_property(self, property_id, assignment, value):
+        with self.get_connection() as connection:
+            if connection is None:
+                return False
+
+            try:
+                cursor = connection.cursor(dictionary=True)
+                self._execute(cursor, 'property_location', "SELECT area_name, neighborhood FROM properties WHERE id = %s", (property_id,))
+                location = cursor.fetchone()
+                self._execute(cursor, 'update_property', f"UPDATE properties SET {assignment} = %s WHERE id = %s", (value, property_id))
+                cursor.close()
+            except Error as e:
+                logger.error("Error updating property %s: %s", property_id, e)
+                return False
 
+        property_cache.invalidate(lambda key: key == property_id)
+        if location:
+            self.invalidate_search_cache(location['area_name'], location['neighborhood'])
+        return True
+
+    def update_property_availability(self, property_id, is_available):
+        """Mark a property available or taken and invalidate affected cached searches."""
+        return self._update_property(property_id, 'is_available', bool(is_available))
+
+    def update_property_rent(self, property_id, rent_amount):
+        """Change a property's rent and invalidate affected cached searches."""
+        return self._update_property(property_id, 'rent_amount', rent_amount)
+
+    def search_cache_stats(self):
+        return search_cache.stats()
+
+    @metrics.timed('get_property_details')
     def get_property_details(self, property_id):
-        if not self.connection or not self.connection.is_connected():
-            if not self.connect():
+        with self.get_connection() as connection:
+            if connection is None:
                 return None
 
-        try:
-            cursor = self.connection.cursor(dictionary=True)
-            
-            # Get property with nearby places and transportation
-            query = """
-            SELECT p.*, u.full_name as owner_name, u.phone as owner_phone
-            FROM properties p
-            JOIN users u ON p.owner_id = u.id
-            WHERE p.id = %s
-            """
-            
-            cursor.execute(query, (property_id,))
-            property_data = cursor.fetchone()
-            
-            if property_data:
-                # Process JSON fields
-                if property_data['amenities']:
-                    property_data['amenities'] = json.loads(property_data['amenities'])
-                if property_data['images']:
-                    property_data['images'] = json.loads(property_data['images'])
-                
-                # Get nearby places
-                cursor.execute("""
-                    SELECT place_name, place_type, distance_meters 
-                    FROM nearby_places 
-                    WHERE property_id = %s
-                """, (property_id,))
-                property_data['nearby_places'] = cursor.fetchall()
-                
-                # Get transportation options
-                cursor.execute("""
-                    SELECT transport_type, details 
-                    FROM transportation 
-                    WHERE property_id = %s
-                """, (property_id,))
-                property_data['transportation'] = cursor.fetchall()
-            
-            cursor.close()
-            return property_data
+            try:
+                cursor = connection.cursor(dictionary=True)
 
-        except Error as e:
-            print(f"Error getting property details: {e}")
-            return None
+                # Get property with nearby places and transportation
+                self._execute(cursor, 'property_details', PROPERTY_DETAILS_QUERY, (property_id,))
+                property_data = cursor.fetchone()
+
+                if property_data:
+                    parse_property_row(property_data)
+                    parse_property_children(property_data)
+
+                cursor.close()
+                return property_data
+
+            except (Error, ValueError) as e:
+                logger.error("Error getting property details: %s", e)
+                return None
+
+    @metrics.timed('get_properties_details')
+    def get_properties_details(self, property_ids, keep_missing=False):
+        """Fetch many properties with their children, in the order given.
+
+        Properties in the shared property cache are served from it; the rest
+        are loaded with three queries whatever their number. With keep_missing
+        the result lines up with `property_ids`, None standing for listings
+        that no longer exist, and is None if the database can't be reached.
+        """
+        requested = list(property_ids)
+        property_ids = list(dict.fromkeys(requested))
+        found, missing = cached_properties(property_ids)
+        if not missing:
+            return order_by_ids(found.values(), requested, keep_missing)
+
+        with self.get_connection() as connection:
+            if connection is None:
+                return None if keep_missing else order_by_ids(found.values(), property_ids)
+
+            try:
+                cursor = connection.cursor(dictionary=True)
+                self._execute(cursor, 'properties_by_id', in_query(PROPERTIES_BY_ID_QUERY, missing), missing)
+                properties = [parse_property_row(row) for row in cursor.fetchall()]
+                self._fetch_children(cursor, properties)
+                cursor.close()
+            except Error as e:
+                logger.error("Error getting property details: %s", e)
+                return None if keep_missing else order_by_ids(found.values(), property_ids)
+
+        cache_properties(properties)
+        return order_by_ids(list(found.values()) + properties, requested, keep_missing)
+
+    def _fetch_children(self, cursor, properties):
+        """Load nearby places and transportation for `properties` with one query per table."""
+        property_ids = [property_data['id'] for property_data in properties]
+        if not property_ids:
+            return properties
+
+        self._execute(cursor, 'nearby_places_batch', in_query(NEARBY_PLACES_BATCH_QUERY, property_ids), property_ids)
+        nearby_rows = cursor.fetchall()
+        self._execute(cursor, 'transportation_batch', in_query(TRANSPORTATION_BATCH_QUERY, property_ids), property_ids)
+        transportation_rows = cursor.fetchall()
+        return attach_children(properties, nearby_rows, transportation_rows)
+
+    @metrics.timed('get_area_profile')
+    def get_area_profile(self, location):
+        """Precomputed profile of a neighborhood or area, or None if there is none."""
+        with self.get_connection() as connection:
+            if connection is None:
+                return None
+
+            try:
+                cursor = connection.cursor(dictionary=True)
+                self._execute(cursor, 'area_profile', AREA_PROFILE_QUERY, area_profile_keys(location))
+                profile = cursor.fetchone()
+                cursor.close()
+            except (Error, ValueError) as e:
+                logger.error("Error getting area profile: %s", e)
+                return None
+
+        return parse_area_profile(profile) if profile else None
+
+    @metrics.timed('fetch_snapshot_rows')
+    def fetch_snapshot_rows(self, since=None):
+        """Rows for the listing snapshot: all available ones, or every row changed since `since`."""
+        with self.get_connection() as connection:
+            if connection is None:
+                return None
+
+            try:
+                cursor = connection.cursor(dictionary=True)
+                if since is None:
+                    self._execute(cursor, 'snapshot', SNAPSHOT_COLUMNS + " WHERE is_available = TRUE")
+                else:
+                    # >= so rows updated in the same second as the watermark aren't missed
+                    self._execute(cursor, 'snapshot_changes', SNAPSHOT_COLUMNS + " WHERE updated_at >= %s", (since,))
+                rows = [parse_property_row(row) for row in cursor.fetchall()]
+                cursor.close()
+                return rows
+            except Error as e:
+                logger.error("Error loading listing snapshot: %s", e)
+                return None
+
+    @metrics.timed('fetch_snapshot_ids')
+    def fetch_snapshot_ids(self):
+        """Ids of every available listing, which the snapshot diffs against to drop deleted ones."""
+        with self.get_connection() as connection:
+            if connection is None:
+                return None
+
+            try:
+                cursor = connection.cursor()
+                self._execute(cursor, 'snapshot_ids', "SELECT id FROM properties WHERE is_available = TRUE")
+                ids = [row[0] for row in cursor.fetchall()]
+                cursor.close()
+                return ids
+            except Error as e:
+                logger.error("Error loading listing snapshot ids: %s", e)
+                return None
+
+    def get_location_aliases(self):
+        """Return (alias, location_key) rows from the location_aliases table."""
+        with self.get_connection() as connection:
+            if connection is None:
+                return None
+
+            try:
+                cursor = connection.cursor()
+                self._execute(cursor, 'location_aliases', "SELECT alias, location_key FROM location_aliases")
+                rows = cursor.fetchall()
+                cursor.close()
+                return rows
+            except Error as e:
+                logger.error("Error loading location aliases: %s", e)
+                return None
 
     def log_conversation(self, user_id, session_id, user_message, bot_response, intent, confidence, entities):
-        if not self.connection or not self.connection.is_connected():
-            if not self.connect():
+        with self.get_connection() as connection:
+            if connection is None:
                 return
 
-        try:
-            cursor = self.connection.cursor()
-            query = """
-            INSERT INTO bot_conversations 
-            (user_id, session_id, user_message, bot_response, intent, confidence, entities)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """
-            cursor.execute(query, (user_id, session_id, user_message, bot_response, intent, confidence, json.dumps(entities)))
-            cursor.close()
-        except Error as e:
-            print(f"Error logging conversation: {e}")
+            try:
+                cursor = connection.cursor()
+                self._execute(cursor, 'insert_conversation', CONVERSATION_INSERT, (user_id, session_id, user_message, bot_response, intent, confidence, json.dumps(entities)))
+                cursor.close()
+            except Error as e:
+                logger.error("Error logging conversation: %s", e)
 
-    def log_search_analytics(self, user_id, location, budget, preferences, results_count):
-        if not self.connection or not self.connection.is_connected():
-            if not self.connect():
+    def log_search_analytics(self, user_id, location, budget, preferences, results_shown):
+        with self.get_connection() as connection:
+            if connection is None:
                 return
 
-        try:
-            cursor = self.connection.cursor()
-            query = """
-            INSERT INTO search_analytics 
-            (user_id, search_location, search_budget, search_preferences, results_count)
-            VALUES (%s, %s, %s, %s, %s)
-            """
-            cursor.execute(query, (user_id, location, budget, json.dumps(preferences) if preferences else None, results_count))
-            cursor.close()
-        except Error as e:
-            print(f"Error logging search analytics: {e}")
+            try:
+                cursor = connection.cursor()
+                self._execute(cursor, 'insert_search_analytics', SEARCH_ANALYTICS_INSERT, (user_id, location, budget, json.dumps(preferences) if preferences else None, results_shown))
+                cursor.close()
+            except Error as e:
+                logger.error("Error logging search analytics: %s", e)
+
+    def insert_search_analytics_batch(self, rows):
+        """Insert many search_analytics rows in one multi-row INSERT."""
+        return self._execute_batch(SEARCH_ANALYTICS_INSERT, rows, "search analytics")
+
+    def insert_conversations_batch(self, rows):
+        """Insert many bot_conversations rows in one multi-row INSERT."""
+        return self._execute_batch(CONVERSATION_INSERT, rows, "conversations")
+
+    @metrics.timed('execute_batch')
+    def _execute_batch(self, query, rows, label):
+        with self.get_connection() as connection:
+            if connection is None:
+                return False
+
+            try:
+                cursor = connection.cursor()
+                # mysql.connector rewrites INSERT ... VALUES into a single multi-row statement
+                self._execute(cursor, f"{label.replace(' ', '_')}_batch", query, rows, many=True)
+                cursor.close()
+                return True
+            except Error as e:
+                logger.error("Error logging %s batch: %s", label, e)
+                return False
 
 # Global database instance
 db = DatabaseConnection()
+
+# Lets import jobs in other processes clear this server's caches
+metrics.register_post_endpoint(
+    '/cache/invalidate',
+    lambda body: {'removed': db.invalidate_listings(body.get('areas'), body.get('property_ids'))},
+)
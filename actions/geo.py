@@ -0,0 +1,74 @@
+import math
+import re
+import unicodedata
+
+EARTH_RADIUS_METERS = 6371000.0
+METERS_PER_DEGREE_LAT = 111320.0
+
+# Well-known places users search around, as (latitude, longitude)
+LANDMARKS = {
+    'tsc': (23.7326, 90.3955),
+    'টিএসসি': (23.7326, 90.3955),
+    'dhaka university': (23.7340, 90.3928),
+    'du': (23.7340, 90.3928),
+    'ঢাকা বিশ্ববিদ্যালয়': (23.7340, 90.3928),
+    'buet': (23.7265, 90.3925),
+    'বুয়েট': (23.7265, 90.3925),
+    'new market': (23.7334, 90.3845),
+    'nilkhet': (23.7325, 90.3870),
+    'dhaka medical': (23.7256, 90.3976),
+    'dmch': (23.7256, 90.3976),
+    'ramna park': (23.7383, 90.3996),
+    'shahbag': (23.7382, 90.3958),
+    'farmgate': (23.7576, 90.3897),
+    'karwan bazar': (23.7508, 90.3932),
+    'motijheel': (23.7330, 90.4172),
+    'gulshan 1': (23.7806, 90.4163),
+    'gulshan 2 circle': (23.7946, 90.4142),
+    'banani 11': (23.7937, 90.4040),
+    'mirpur 10': (23.8069, 90.3687),
+    'uttara north metro': (23.8691, 90.3676),
+    'bashundhara city': (23.7509, 90.3906),
+    'agrabad': (22.3250, 91.8120),
+    'gec circle': (22.3589, 91.8217),
+    'chittagong university': (22.4716, 91.7877),
+}
+
+_PUNCTUATION = re.compile(r"[.,/#!$%^&*;:{}=\-_`~()'\"?]+")
+_WHITESPACE = re.compile(r'\s+')
+_NEAR_PREFIX = re.compile(r'^(near|nearby|around|close to|beside|next to)\s+')
+
+
+def _normalize(text):
+    text = unicodedata.normalize('NFC', str(text)).lower()
+    text = _PUNCTUATION.sub(' ', text)
+    text = _WHITESPACE.sub(' ', text).strip()
+    return _NEAR_PREFIX.sub('', text)
+
+
+def find_landmark(text):
+    """Return (latitude, longitude) if `text` names a known landmark, else None."""
+    if not text:
+        return None
+    return LANDMARKS.get(_normalize(text))
+
+
+def bounding_box(latitude, longitude, radius_meters):
+    """(min_lat, min_lng, max_lat, max_lng) enclosing a circle of `radius_meters`."""
+    lat_delta = radius_meters / METERS_PER_DEGREE_LAT
+    lng_delta = radius_meters / (METERS_PER_DEGREE_LAT * max(math.cos(math.radians(latitude)), 0.01))
+    return latitude - lat_delta, longitude - lng_delta, latitude + lat_delta, longitude + lng_delta
+
+
+def bounding_polygon_wkt(latitude, longitude, radius_meters):
+    """WKT polygon of the bounding box, in (longitude latitude) order to match geo_point."""
+    min_lat, min_lng, max_lat, max_lng = bounding_box(latitude, longitude, radius_meters)
+    return (f"POLYGON(({min_lng} {min_lat}, {max_lng} {min_lat}, {max_lng} {max_lat}, "
+            f"{min_lng} {max_lat}, {min_lng} {min_lat}))")
+
+
+def haversine_meters(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_METERS * math.asin(math.sqrt(a))
@@ -0,0 +1,378 @@
+import argparse
+import csv
+import json
+import os
+import time
+import urllib.request
+from datetime import date
+from itertools import islice
+
+from .database import db
+from .locations import location_index, location_key
+from .logs import env_int, get_logger
+
+logger = get_logger(__name__)
+
+INGEST_CHUNK_SIZE = max(env_int('INGEST_CHUNK_SIZE', 500), 1)
+# Validation errors kept in the report; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+# Allowed values, as in the schema's ENUM columns
+PROPERTY_TYPES = ('single_room', 'studio', 'apartment', 'flat', 'commercial')
+OCCUPANCY_TYPES = ('bachelor', 'family', 'female_only', 'male_only', 'mixed')
+PLACE_TYPES = ('restaurant', 'hospital', 'school', 'university', 'market', 'mosque', 'transport')
+TRANSPORT_TYPES = ('bus', 'metro', 'rickshaw', 'cng', 'uber', 'pathao')
+
+PROPERTY_COLUMNS = (
+    'listing_key', 'owner_id', 'title', 'description', 'latitude', 'longitude', 'address', 'area_name',
+    'neighborhood', 'property_type', 'occupancy_type', 'rent_amount', 'security_deposit', 'advance_months',
+    'utility_included', 'furnished', 'total_rooms', 'bathrooms', 'balcony', 'kitchen_access', 'amenities',
+    'is_available', 'available_from', 'area_key', 'neighborhood_key',
+)
+
+# Listing fields with their defaults, as in the properties table
+DEFAULTS = {
+    'description': None, 'neighborhood': None, 'security_deposit': None, 'advance_months': 2,
+    'utility_included': False, 'furnished': False, 'total_rooms': 1, 'bathrooms': 1, 'balcony': False,
+    'kitchen_access': False, 'is_available': True, 'available_from': None,
+}
+REQUIRED = ('listing_key', 'owner_phone', 'owner_name', 'title', 'latitude', 'longitude', 'address',
+            'area_name', 'property_type', 'occupancy_type', 'rent_amount')
+BOOLEANS = ('utility_included', 'furnished', 'balcony', 'kitchen_access', 'is_available')
+INTEGERS = ('advance_months', 'total_rooms', 'bathrooms')
+
+OWNER_UPSERT = """
+INSERT INTO users (phone, full_name, user_type)
+VALUES {values}
+ON DUPLICATE KEY UPDATE user_type = IF(user_type = 'tenant', 'both', user_type)
+"""
+
+# Children are replaced wholesale; updated_at always moves so the snapshot and area profiles pick them up
+PROPERTY_UPSERT = """
+INSERT INTO properties ({columns})
+VALUES {values} AS new
+ON DUPLICATE KEY UPDATE {updates}, updated_at = CURRENT_TIMESTAMP
+""".format(
+    columns=', '.join(PROPERTY_COLUMNS),
+    values='{values}',
+    updates=', '.join(f"{column} = new.{column}" for column in PROPERTY_COLUMNS if column != 'listing_key'),
+)
+
+NEARBY_INSERT = "INSERT INTO nearby_places (property_id, place_name, place_type, distance_meters) VALUES {values}"
+TRANSPORT_INSERT = "INSERT INTO transportation (property_id, transport_type, details) VALUES {values}"
+
+
+def _placeholders(count, width):
+    row = '(' + ', '.join(['%s'] * width) + ')'
+    return ', '.join([row] * count)
+
+
+def _flatten(rows):
+    return tuple(value for row in rows for value in row)
+
+
+def _split(value, separator='|'):
+    return [item.strip() for item in value.split(separator) if item.strip()] if value else []
+
+
+def _csv_listing(row):
+    """Turn a CSV row into the NDJSON shape.
+
+    amenities is "WiFi|AC", nearby_places is "name:type:distance|..." and
+    transportation is "type:details|...".
+    """
+    listing = {key: value for key, value in row.items() if key and value not in (None, '')}
+    if 'amenities' in listing:
+        listing['amenities'] = _split(listing['amenities'])
+    if 'nearby_places' in listing:
+        places = []
+        for item in _split(listing['nearby_places']):
+            parts = item.rsplit(':', 2)
+            places.append(dict(zip(('place_name', 'place_type', 'distance_meters'), parts)))
+        listing['nearby_places'] = places
+    if 'transportation' in listing:
+        listing['transportation'] = [dict(zip(('transport_type', 'details'), item.split(':', 1)))
+                                     for item in _split(listing['transportation'])]
+    return listing
+
+
+def read_listings(path):
+    """Yield (line number, raw listing) from a .csv file or a newline-delimited JSON file, one at a time.
+
+    A line that isn't valid JSON is yielded as None so validation reports it.
+    """
+    if path.lower().endswith('.csv'):
+        with open(path, newline='', encoding='utf-8-sig') as handle:
+            reader = csv.DictReader(handle)
+            for row in reader:
+                yield reader.line_num, _csv_listing(row)
+        return
+
+    with open(path, encoding='utf-8') as handle:
+        for line_no, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except ValueError:
+                yield line_no, None
+
+
+def _boolean(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ('1', 'true', 'yes', 'y'):
+        return True
+    if text in ('0', 'false', 'no', 'n'):
+        return False
+    raise ValueError(f"not a boolean: {value!r}")
+
+
+def _number(value, name, minimum=None, maximum=None):
+    try:
+        number = float(str(value).replace(',', ''))
+    except ValueError:
+        raise ValueError(f"{name} is not a number: {value!r}")
+    if (minimum is not None and number < minimum) or (maximum is not None and number > maximum):
+        raise ValueError(f"{name} out of range: {value!r}")
+    return number
+
+
+def validate_listing(raw):
+    """Check and normalize one raw listing. Returns (listing, None) or (None, error message)."""
+    if not isinstance(raw, dict):
+        return None, 'not a JSON object'
+
+    missing = [name for name in REQUIRED if raw.get(name) in (None, '')]
+    if missing:
+        return None, f"missing {', '.join(missing)}"
+
+    listing = dict(DEFAULTS)
+    listing.update({name: raw[name] for name in DEFAULTS if raw.get(name) not in (None, '')})
+    try:
+        listing['listing_key'] = str(raw['listing_key']).strip()[:100]
+        listing['owner_phone'] = str(raw['owner_phone']).strip()
+        listing['owner_name'] = str(raw['owner_name']).strip()[:100]
+        if len(listing['owner_phone']) > 15:
+            raise ValueError(f"owner_phone too long: {raw['owner_phone']!r}")
+        for name in ('title', 'address', 'area_name'):
+            listing[name] = str(raw[name]).strip()
+        listing['title'] = listing['title'][:255]
+        listing['area_name'] = listing['area_name'][:100]
+        if listing['neighborhood'] is not None:
+            listing['neighborhood'] = str(listing['neighborhood']).strip()[:100] or None
+
+        listing['latitude'] = _number(raw['latitude'], 'latitude', -90, 90)
+        listing['longitude'] = _number(raw['longitude'], 'longitude', -180, 180)
+        listing['rent_amount'] = _number(raw['rent_amount'], 'rent_amount', 0)
+        if listing['security_deposit'] is not None:
+            listing['security_deposit'] = _number(listing['security_deposit'], 'security_deposit', 0)
+        for name in INTEGERS:
+            listing[name] = int(_number(listing[name], name, 0))
+        for name in BOOLEANS:
+            listing[name] = _boolean(listing[name])
+        if listing['available_from'] is not None:
+            listing['available_from'] = date.fromisoformat(str(listing['available_from'])[:10])
+
+        for name, allowed in (('property_type', PROPERTY_TYPES), ('occupancy_type', OCCUPANCY_TYPES)):
+            listing[name] = str(raw[name]).strip().lower()
+            if listing[name] not in allowed:
+                raise ValueError(f"unknown {name}: {raw[name]!r}")
+
+        amenities = raw.get('amenities') or []
+        if isinstance(amenities, str):
+            amenities = _split(amenities)
+        listing['amenities'] = json.dumps([str(item).strip() for item in amenities if str(item).strip()])
+
+        listing['nearby_places'] = []
+        for place in raw.get('nearby_places') or []:
+            place_type = str(place.get('place_type', '')).strip().lower()
+            if place_type not in PLACE_TYPES or not place.get('place_name'):
+                raise ValueError(f"bad nearby place: {place!r}")
+            distance = place.get('distance_meters')
+            listing['nearby_places'].append((
+                str(place['place_name']).strip()[:100], place_type,
+                int(_number(distance, 'distance_meters', 0)) if distance not in (None, '') else None,
+            ))
+
+        listing['transportation'] = []
+        for option in raw.get('transportation') or []:
+            transport_type = str(option.get('transport_type', '')).strip().lower()
+            if transport_type not in TRANSPORT_TYPES:
+                raise ValueError(f"bad transport option: {option!r}")
+            details = option.get('details')
+            listing['transportation'].append((transport_type, str(details).strip()[:255] if details else None))
+    except (ValueError, TypeError, AttributeError) as e:
+        return None, str(e)
+
+    return listing, None
+
+
+def chunks(items, size):
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class ListingImporter:
+    """Streams a listing file into properties, nearby_places and transportation.
+
+    Listings are read and validated one at a time and written CHUNK_SIZE at a
+    time, each chunk in one transaction: owners and properties go in as
+    multi-row upserts keyed on phone and listing_key, and the chunk's child
+    rows are replaced with one multi-row insert per table. Re-importing a
+    file therefore updates listings in place. Caches for the areas touched
+    are invalidated afterwards.
+    """
+
+    def __init__(self, database, chunk_size=INGEST_CHUNK_SIZE):
+        self.database = database
+        self.chunk_size = chunk_size
+
+    def import_file(self, path, dry_run=False):
+        """Import `path`. Returns a report dict, or None if the database is unreachable."""
+        report = {'read': 0, 'imported': 0, 'invalid': 0, 'failed': 0, 'errors': [],
+                  'areas': set(), 'property_ids': set()}
+        started_at = time.perf_counter()
+
+        def valid_listings():
+            for line_no, raw in read_listings(path):
+                report['read'] += 1
+                listing, error = validate_listing(raw)
+                if error:
+                    report['invalid'] += 1
+                    if len(report['errors']) < MAX_REPORTED_ERRORS:
+                        report['errors'].append((line_no, error))
+                    continue
+                yield listing
+
+        if dry_run:
+            for _ in valid_listings():
+                pass
+        else:
+            # Stored keys must match what searches resolve to, aliases included
+            if location_index.is_stale():
+                location_index.ensure_loaded(self.database)
+            with self.database.get_connection() as connection:
+                if connection is None:
+                    return None
+                cursor = connection.cursor()
+                for chunk in chunks(valid_listings(), self.chunk_size):
+                    try:
+                        ids, areas = self._write_chunk(connection, cursor, chunk)
+                    except Exception as e:
+                        logger.error("Error importing listings up to line %s: %s", report['read'], e)
+                        report['failed'] += len(chunk)
+                        continue
+                    report['imported'] += len(chunk)
+                    report['property_ids'].update(ids)
+                    report['areas'].update(areas)
+                cursor.close()
+            self.database.invalidate_listings(report['areas'], report['property_ids'])
+
+        report['seconds'] = time.perf_counter() - started_at
+        return report
+
+    def _write_chunk(self, connection, cursor, chunk):
+        # A key repeated within a chunk: the last row wins, as it would across chunks
+        listings = list({listing['listing_key']: listing for listing in chunk}.values())
+        keys = [listing['listing_key'] for listing in listings]
+        key_placeholders = ', '.join(['%s'] * len(keys))
+
+        connection.start_transaction()
+        try:
+            # Old locations of listings being updated, so caches for an area they leave are cleared too
+            cursor.execute(
+                f"SELECT area_name, neighborhood FROM properties WHERE listing_key IN ({key_placeholders})", keys)
+            areas = set(cursor.fetchall())
+
+            owners = {listing['owner_phone']: (listing['owner_phone'], listing['owner_name'], 'owner')
+                      for listing in listings}
+            cursor.execute(OWNER_UPSERT.format(values=_placeholders(len(owners), 3)), _flatten(owners.values()))
+            cursor.execute(f"SELECT phone, id FROM users WHERE phone IN ({', '.join(['%s'] * len(owners))})",
+                           tuple(owners))
+            owner_ids = dict(cursor.fetchall())
+
+            rows = []
+            for listing in listings:
+                listing['owner_id'] = owner_ids[listing['owner_phone']]
+                listing['area_key'] = location_key(listing['area_name'])
+                listing['neighborhood_key'] = location_key(listing['neighborhood'])
+                rows.append(tuple(listing[column] for column in PROPERTY_COLUMNS))
+                areas.add((listing['area_name'], listing['neighborhood']))
+            cursor.execute(PROPERTY_UPSERT.format(values=_placeholders(len(rows), len(PROPERTY_COLUMNS))),
+                           _flatten(rows))
+
+            cursor.execute(f"SELECT listing_key, id FROM properties WHERE listing_key IN ({key_placeholders})", keys)
+            property_ids = dict(cursor.fetchall())
+            id_placeholders = ', '.join(['%s'] * len(property_ids))
+            id_values = tuple(property_ids.values())
+            cursor.execute(f"DELETE FROM nearby_places WHERE property_id IN ({id_placeholders})", id_values)
+            cursor.execute(f"DELETE FROM transportation WHERE property_id IN ({id_placeholders})", id_values)
+
+            nearby = [(property_ids[listing['listing_key']],) + place
+                      for listing in listings for place in listing['nearby_places']]
+            if nearby:
+                cursor.execute(NEARBY_INSERT.format(values=_placeholders(len(nearby), 4)), _flatten(nearby))
+            transport = [(property_ids[listing['listing_key']],) + option
+                         for listing in listings for option in listing['transportation']]
+            if transport:
+                cursor.execute(TRANSPORT_INSERT.format(values=_placeholders(len(transport), 3)), _flatten(transport))
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+
+        return id_values, areas
+
+
+def notify_actions_server(url, token, areas, property_ids):
+    """Ask a running actions server to drop its cached searches and rows for the imported listings."""
+    body = json.dumps({'areas': sorted(areas, key=str), 'property_ids': sorted(property_ids)}).encode('utf-8')
+    request = urllib.request.Request(url, data=body, method='POST', headers={
+        'Content-Type': 'application/json', 'X-Admin-Token': token})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return json.loads(response.read() or b'{}')
+    except Exception as e:
+        logger.warning("Could not invalidate the actions server caches at %s: %s", url, e)
+        return None
+
+# Global listing importer
+listing_importer = ListingImporter(db)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import or update listings from a CSV or NDJSON file.")
+    parser.add_argument('path', help='.csv file with a header row, or one JSON listing per line')
+    parser.add_argument('--chunk-size', type=int, default=INGEST_CHUNK_SIZE, help='listings per transaction')
+    parser.add_argument('--dry-run', action='store_true', help='only validate the file')
+    parser.add_argument('--invalidate-url', default=os.getenv('CACHE_INVALIDATE_URL'),
+                        help="running actions server's /cache/invalidate endpoint on the metrics port")
+    args = parser.parse_args()
+
+    importer = ListingImporter(db, chunk_size=max(args.chunk_size, 1))
+    report = importer.import_file(args.path, dry_run=args.dry_run)
+    if report is None:
+        raise SystemExit("Could not connect to the database; check the DB_* settings")
+
+    for line_no, error in report['errors']:
+        print(f"line {line_no}: {error}")
+    rate = report['imported'] / report['seconds'] if report['seconds'] else 0
+    print(f"Read {report['read']} listings: {report['imported']} imported, {report['invalid']} invalid, "
+          f"{report['failed']} failed in {report['seconds']:.1f}s ({rate:.0f} rows/s)")
+
+    token = os.getenv('METRICS_ADMIN_TOKEN', '')
+    if report['imported'] and args.invalidate_url and token:
+        notify_actions_server(args.invalidate_url, token, report['areas'], report['property_ids'])
+    elif report['imported']:
+        print("Running actions servers will see the changes once their caches expire "
+              "(set CACHE_INVALIDATE_URL and METRICS_ADMIN_TOKEN to clear them now)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+import argparse
+import re
+import threading
+import time
+import unicodedata
+
+# Built-in spellings, mirrored in the location_aliases table by
+# database/migrations/001_location_index.sql. Rows added to that table
+# are merged in at runtime.
+DEFAULT_ALIASES = {
+    # Dhaka
+    'ঢাকা': 'dhaka',
+    'dacca': 'dhaka',
+    'daka': 'dhaka',
+    # Dhanmondi
+    'ধানমন্ডি': 'dhanmondi',
+    'ধানমণ্ডি': 'dhanmondi',
+    'dhanmondhi': 'dhanmondi',
+    'danmondi': 'dhanmondi',
+    'dhanmandi': 'dhanmondi',
+    # Gulshan
+    'গুলশান': 'gulshan',
+    'gulshon': 'gulshan',
+    # Banani
+    'বনানী': 'banani',
+    # Uttara
+    'উত্তরা': 'uttara',
+    'uttora': 'uttara',
+    # Mohammadpur
+    'মোহাম্মদপুর': 'mohammadpur',
+    'mohammedpur': 'mohammadpur',
+    'muhammadpur': 'mohammadpur',
+    'mohammodpur': 'mohammadpur',
+    # Mirpur
+    'মিরপুর': 'mirpur',
+    # Chittagong
+    'চট্টগ্রাম': 'chittagong',
+    'chattogram': 'chittagong',
+    'ctg': 'chittagong',
+    'chittagang': 'chittagong',
+    # Agrabad
+    'আগ্রাবাদ': 'agrabad',
+    # Sylhet
+    'সিলেট': 'sylhet',
+}
+
+BANGLA_DIGITS = str.maketrans('০১২৩৪৫৬৭৮৯', '0123456789')
+
+# Tokens that narrow a location inside an area ("Dhanmondi 27", "Sector 7")
+NOISE_TOKENS = {
+    'road', 'rd', 'sector', 'block', 'area', 'no', 'house', 'lane',
+    'রোড', 'সেক্টর', 'ব্লক', 'নং', 'এলাকা',
+}
+
+# ASCII punctuation only; \W would also strip Bangla vowel signs
+_PUNCTUATION = re.compile(r"[.,/#!$%^&*;:{}=\-_`~()'\"?]+")
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_location(text):
+    """Lowercase, strip punctuation, numbers and road/sector noise from a location."""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFC', str(text)).lower().translate(BANGLA_DIGITS)
+    text = _PUNCTUATION.sub(' ', text)
+    tokens = [token for token in _WHITESPACE.split(text)
+              if token and not token.isdigit() and token not in NOISE_TOKENS]
+    return ' '.join(tokens)
+
+
+class LocationIndex:
+    """Resolves user spellings (English, Bangla, transliterated) to indexed location keys."""
+
+    def __init__(self, refresh_seconds=600):
+        self.refresh_seconds = refresh_seconds
+        self.aliases = dict(DEFAULT_ALIASES)
+        self.keys = set(DEFAULT_ALIASES.values())
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def is_stale(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds
+
+    def ensure_loaded(self, database):
+        """Merge aliases from the location_aliases table into the built-in set."""
+        with self._lock:
+            if not self.is_stale():
+                return
+            # Only try once per refresh window, even if the table is missing
+            self._loaded_at = time.monotonic()
+
+        rows = database.get_location_aliases()
+        if not rows:
+            return
+        aliases = dict(DEFAULT_ALIASES)
+        for alias, location_key in rows:
+            aliases[normalize_location(alias)] = location_key
+        self.aliases = aliases
+        self.keys = set(aliases.values())
+
+    def resolve(self, text):
+        """Return the location key for `text`, or '' if nothing usable is left."""
+        normalized = normalize_location(text)
+        if not normalized:
+            return ''
+        aliases = self.aliases
+        if normalized in aliases:
+            return aliases[normalized]
+
+        # "dhanmondi lake", "near gulshan": fall back to the first known word
+        for token in normalized.split(' '):
+            if token in aliases:
+                return aliases[token]
+            if token in self.keys:
+                return token
+        return normalized
+
+
+def location_key(text, index=None):
+    """Canonical key stored in properties.area_key / neighborhood_key, or None for an empty name.
+
+    Uses the same normalization and aliases as search input, and moves known
+    place names to the front, so the prefix match searches use finds
+    "Sector 7, Uttara" for "uttara" and "Lake Road, Dhanmondi" for "dhanmondi".
+    """
+    index = index or location_index
+    normalized = normalize_location(text)
+    if not normalized:
+        return None
+    aliases = index.aliases
+    if normalized in aliases:
+        return aliases[normalized]
+    tokens = [aliases.get(token, token) for token in normalized.split(' ')]
+    known = [token for token in tokens if token in index.keys]
+    others = [token for token in tokens if token not in index.keys]
+    return ' '.join(dict.fromkeys(known + others))[:100]
+
+
+def location_matches(search_key, stored_keys):
+    """Whether a search for `search_key` can return a row with these stored keys (prefix match, as in SQL)."""
+    return not search_key or any(key and key.startswith(search_key) for key in stored_keys)
+
+
+def like_prefix(key):
+    """Escape a location key for use as an index-friendly `LIKE 'key%'` pattern."""
+    return key.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+# Global location index
+location_index = LocationIndex()
+
+
+def main():
+    argparse.ArgumentParser(
+        description="Recompute properties.area_key/neighborhood_key after alias changes or hand-written inserts."
+    ).parse_args()
+    # Imported here: database imports this module
+    from .database import db
+    changed = db.rekey_locations()
+    if changed is None:
+        raise SystemExit("Could not connect to the database; check the DB_* settings")
+    print(f"Updated location keys of {changed} properties")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+import logging
+import os
+import threading
+import time
+
+
+def env_int(name, default):
+    """Integer setting from the environment, or `default` when unset or malformed."""
+    try:
+        return int(os.getenv(name, default))
+    except (ValueError, TypeError):
+        return default
+
+
+def env_float(name, default):
+    """Float setting from the environment, or `default` when unset or malformed."""
+    try:
+        return float(os.getenv(name, default))
+    except (ValueError, TypeError):
+        return default
+
+
+class RateLimitFilter(logging.Filter):
+    """Let through at most `limit` records per message template every `interval` seconds.
+
+    Suppressed records are counted, and the next record let through for that
+    template says how many were dropped. Log with %-style arguments
+    (logger.error("Error ...: %s", e)) so repeats share one template.
+    """
+
+    def __init__(self, limit=10, interval=60.0):
+        super().__init__()
+        self.limit = limit
+        self.interval = interval
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            started_at, count, suppressed = self._windows.get(key, (now, 0, 0))
+            if now - started_at >= self.interval:
+                started_at, count = now, 0
+            if count >= self.limit:
+                self._windows[key] = (started_at, count, suppressed + 1)
+                return False
+            self._windows[key] = (started_at, count + 1, 0)
+
+        if suppressed:
+            record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+        return True
+
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+rate_limit_filter = RateLimitFilter(
+    limit=max(env_int('LOG_RATE_LIMIT', 10), 1),
+    interval=env_float('LOG_RATE_INTERVAL', 60.0),
+)
+
+
+def get_logger(name):
+    """Logger for an actions module, leveled by LOG_LEVEL and rate limited."""
+    logger = logging.getLogger(name)
+    logger.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+    if rate_limit_filter not in logger.filters:
+        logger.addFilter(rate_limit_filter)
+    return logger
@@ -0,0 +1,310 @@
+import asyncio
+import bisect
+import functools
+import hmac
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .logs import env_int, get_logger
+from .profiler import query_profiler
+
+logger = get_logger(__name__)
+
+# Seconds; covers cache hits (sub-millisecond) up to a stalled pool
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS = (0, 1, 3, 10, 30, 100, 300, 1000)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{str(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram; observe() is a bisect and a few adds under a lock."""
+
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Per-bucket counts (last one is +Inf), sum, count
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, ([*counts], total, count)) for labels, (counts, total, count) in self._series.items())
+        for labels, (counts, total, count) in series:
+            names = self.label_names + ('le',)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + (bound,))} {cumulative}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {total!r}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Counters, histograms and gauge callbacks rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = []
+        self._gauges = []
+
+    def counter(self, name, help_text, label_names=()):
+        metric = Counter(name, help_text, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help_text, label_names, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name, help_text, label_names, collect):
+        """Register a gauge read at scrape time; `collect()` returns {label values tuple: value}."""
+        self._gauges.append((name, help_text, tuple(label_names), collect))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, help_text, label_names, collect in self._gauges:
+            try:
+                values = collect()
+            except Exception as e:
+                logger.warning("Error collecting gauge %s: %s", name, e)
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in sorted(values.items()):
+                lines.append(f"{name}{_format_labels(label_names, labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+action_seconds = registry.histogram(
+    'rental_action_duration_seconds', 'Time spent in each custom action.', ('action',))
+action_errors = registry.counter(
+    'rental_action_errors_total', 'Custom actions that raised.', ('action',))
+db_method_seconds = registry.histogram(
+    'rental_db_method_duration_seconds', 'Time spent in each database method, cache hits included.', ('method',))
+db_rows = registry.histogram(
+    'rental_db_rows_returned', 'Rows returned by each database method.', ('method',), ROW_BUCKETS)
+db_query_seconds = registry.histogram(
+    'rental_db_query_duration_seconds', 'Time spent executing each SQL statement.', ('query',))
+db_query_errors = registry.counter(
+    'rental_db_query_errors_total', 'SQL statements that failed.', ('query',))
+pool_wait_seconds = registry.histogram(
+    'rental_db_pool_wait_seconds', 'Time spent waiting for a pooled connection.', ('pool',))
+
+
+# Caches exposed through the rental_cache_* gauges, by name
+_caches = {}
+
+CACHE_FIELDS = (
+    ('size', 'Entries currently cached.'),
+    ('hits', 'Cache lookups that hit.'),
+    ('misses', 'Cache lookups that missed.'),
+    ('hit_ratio', 'Share of cache lookups that hit.'),
+)
+
+
+def _collect_caches(field):
+    return {(name,): cache.stats()[field] for name, cache in list(_caches.items())}
+
+
+for _field, _help_text in CACHE_FIELDS:
+    registry.gauge(f'rental_cache_{_field}', _help_text, ('cache',),
+                   lambda field=_field: _collect_caches(field))
+
+
+def register_cache(name, cache):
+    """Expose a TTLCache's size, hits, misses and hit ratio under the `cache` label."""
+    _caches[name] = cache
+
+
+def _record(method, started_at, result):
+    db_method_seconds.observe(time.perf_counter() - started_at, method)
+    if isinstance(result, list):
+        db_rows.observe(len(result), method)
+
+
+def timed(method):
+    """Decorator recording a database method's duration and the rows it returned."""
+    def decorator(function):
+        if asyncio.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                started_at = time.perf_counter()
+                result = await function(*args, **kwargs)
+                _record(method, started_at, result)
+                return result
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started_at = time.perf_counter()
+            result = function(*args, **kwargs)
+            _record(method, started_at, result)
+            return result
+        return wrapper
+    return decorator
+
+
+def timed_action(run):
+    """Decorator for Action.run recording its duration and failures under the action's name."""
+    @functools.wraps(run)
+    async def wrapper(self, *args, **kwargs):
+        started_at = time.perf_counter()
+        try:
+            result = run(self, *args, **kwargs)
+            if asyncio.iscoroutine(result):
+                result = await result
+            return result
+        except Exception:
+            action_errors.inc(self.name())
+            raise
+        finally:
+            action_seconds.observe(time.perf_counter() - started_at, self.name())
+    return wrapper
+
+
+# POST endpoints for other processes (e.g. import jobs invalidating caches) and GET /queries; off unless a token is set
+METRICS_ADMIN_TOKEN = os.getenv('METRICS_ADMIN_TOKEN', '')
+_post_handlers = {}
+
+
+def register_post_endpoint(path, handler):
+    """Serve POST `path` on the metrics server with handler(JSON body) -> JSON-able result.
+
+    Requests must send METRICS_ADMIN_TOKEN in the X-Admin-Token header.
+    """
+    _post_handlers[path] = handler
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def _authorized(self):
+        """Whether the request sent METRICS_ADMIN_TOKEN in X-Admin-Token; sends the error response if not."""
+        if not METRICS_ADMIN_TOKEN:
+            self.send_error(404)
+            return False
+        if not hmac.compare_digest(self.headers.get('X-Admin-Token', ''), METRICS_ADMIN_TOKEN):
+            self.send_error(403)
+            return False
+        return True
+
+    def do_POST(self):
+        handler = _post_handlers.get(self.path.split('?')[0])
+        if handler is None:
+            self.send_error(404)
+            return
+        if not self._authorized():
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            result = handler(json.loads(self.rfile.read(length) or b'{}'))
+        except Exception as e:
+            logger.error("Error handling POST %s: %s", self.path, e)
+            self.send_error(400)
+            return
+        body = json.dumps(result, default=str).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path == '/metrics':
+            body = registry.render().encode('utf-8')
+            content_type = 'text/plain; version=0.0.4; charset=utf-8'
+        elif path == '/queries' and query_profiler.enabled:
+            # Query shapes by total time, from the opt-in profiler; they hold SQL and parameters, so admin only
+            if not self._authorized():
+                return
+            body = json.dumps(query_profiler.report(), indent=2, default=str).encode('utf-8')
+            content_type = 'application/json'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the action server's output
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=None, host='0.0.0.0'):
+    """Serve /metrics on a daemon thread. Uses METRICS_PORT when no port is given; 0 or unset disables it."""
+    global _server
+    if port is None:
+        port = env_int('METRICS_PORT', 0)
+    if not port:
+        return None
+
+    with _server_lock:
+        if _server is not None:
+            return _server
+        try:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            logger.error("Error starting metrics server on port %s: %s", port, e)
+            return None
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name='metrics-server', daemon=True).start()
+        logger.info("Metrics available at http://%s:%s/metrics", host, port)
+        return _server
@@ -0,0 +1,130 @@
+import re
+import unicodedata
+from collections import namedtuple
+
+from .locations import BANGLA_DIGITS
+
+Budget = namedtuple('Budget', ['low', 'high'])
+
+# Room number meaning "the last room shown"
+LAST_ROOM = -1
+
+UNIT_MULTIPLIERS = {
+    'k': 1000,
+    'thousand': 1000,
+    'hazar': 1000,
+    'hajar': 1000,
+    'হাজার': 1000,
+    'lakh': 100000,
+    'lac': 100000,
+    'লাখ': 100000,
+}
+
+ORDINALS = {
+    'first': 1, 'second': 2, 'third': 3, 'fourth': 4, 'fifth': 5,
+    'sixth': 6, 'seventh': 7, 'eighth': 8, 'ninth': 9, 'tenth': 10,
+    'last': LAST_ROOM,
+    'প্রথম': 1, 'দ্বিতীয়': 2, 'তৃতীয়': 3, 'চতুর্থ': 4, 'পঞ্চম': 5, 'শেষ': LAST_ROOM,
+    # Romanized Bangla
+    'prothom': 1, 'protham': 1, 'ditiyo': 2, 'dwitiyo': 2, 'tritiyo': 3, 'choturtho': 4, 'ponchom': 5,
+    'shesh': LAST_ROOM, 'sesh': LAST_ROOM,
+}
+
+# Words for "number" written after the digits: "2 number", "1 no room", "৩ নম্বর", "2 nombor"
+NUMBER_WORDS = ('নম্বর', 'নাম্বার', 'নং', 'number', 'nombor', 'nambar', 'no')
+
+
+def normalize_text(text):
+    """NFC, lowercase and ASCII digits, so Bangla input matches the patterns below."""
+    return unicodedata.normalize('NFC', str(text)).lower().translate(BANGLA_DIGITS)
+
+
+def _alternation(words):
+    # Longest first so 'hazar' wins over a shorter prefix; NFC to match normalize_text
+    words = sorted((unicodedata.normalize('NFC', word) for word in words), key=len, reverse=True)
+    return '|'.join(re.escape(word) for word in words)
+
+
+# Whole numbers only: never start or stop in the middle of a digit run
+_NUMBER = r'(?<![\d.])\d+(?:,\d{2,3})*(?:\.\d+)?(?!\d)'
+# 'k' must not run into a word ("2km"), Latin units must end at a word boundary
+_UNIT = r'k(?![a-z])|(?:' + _alternation(w for w in UNIT_MULTIPLIERS if w != 'k') + r')(?![a-z])'
+
+# Numbers followed by a distance or time unit ("2 km", "5 min walk") aren't budgets
+_NOT_MONEY = r'(?!\s*(?:km|m|min|mins|minutes|kilometers?|meters?)(?![a-z]))'
+
+_BUDGET = re.compile(
+    rf'(?P<low>{_NUMBER}){_NOT_MONEY}\s*(?P<low_unit>{_UNIT})?'
+    rf'(?:\s*(?:-|–|~|to|থেকে|theke)\s*(?P<high>{_NUMBER})\s*(?P<high_unit>{_UNIT})?)?'
+)
+
+# Word boundaries that also hold next to Bangla vowel signs, which \b doesn't count as word characters;
+# they keep "bathroom 2" and "casino 5" from reading as room picks
+_START = r'(?<![a-z\u0980-\u09ff])'
+_END = r'(?![a-z\u0980-\u09ff])'
+
+_ROOM = re.compile(
+    _START + r'(?:rooms?|রুম|ঘর|no\.?|number|#)\s*(?P<number>\d{1,3})(?!\d)'
+    r'|(?<![\d.,])(?P<number_before>\d{1,3})\s*(?:' + _alternation(NUMBER_WORDS) + r')\.?' + _END +
+    r'|(?<![\d.,])(?P<ordinal_digits>\d{1,3})(?:st|nd|rd|th)(?![a-z])'
+    r'|' + _START + r'(?P<ordinal>' + _alternation(ORDINALS) + r')' + _END +
+    # A bare number only when it is the whole message: "2", "3?". "dhanmondi 27" is an address
+    r'|^\s*(?P<bare>\d{1,3})\s*[.!?]?\s*$'
+)
+
+
+def _amount(number, unit):
+    value = float(number.replace(',', ''))
+    return value * UNIT_MULTIPLIERS[unit] if unit else value
+
+
+def parse_budget(text):
+    """First budget in `text` as Budget(low, high), or None.
+
+    Handles "15000 taka", "15,000", "15k", "15 hazar", "১৫০০০", "১৫ হাজার" and
+    ranges such as "10-15k" or "10k to 15k"; a single amount has low == high.
+    """
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return Budget(float(text), float(text))
+
+    match = _BUDGET.search(normalize_text(text))
+    if match is None:
+        return None
+
+    low_unit, high = match.group('low_unit'), match.group('high')
+    if high is None:
+        amount = _amount(match.group('low'), low_unit)
+        return Budget(amount, amount)
+
+    high_unit = match.group('high_unit')
+    # "10-15k": the trailing unit applies to both ends, unless the low end already reads as a full amount
+    if low_unit is None and high_unit and float(match.group('low').replace(',', '')) <= float(high.replace(',', '')):
+        low_unit = high_unit
+    low_amount, high_amount = _amount(match.group('low'), low_unit), _amount(high, high_unit)
+    return Budget(min(low_amount, high_amount), max(low_amount, high_amount))
+
+
+def budget_amount(text):
+    """Maximum monthly budget in `text` (the top of a range), or None."""
+    budget = parse_budget(text)
+    return budget.high if budget else None
+
+
+def parse_room_number(text):
+    """Room the user picked: "room 12", "2nd", "second room", "2 number", "৩ নম্বর", "2".
+
+    Returns the 1-based number, LAST_ROOM for "last"/"শেষ", or None.
+    """
+    if not text:
+        return None
+    match = _ROOM.search(normalize_text(text))
+    if match is None:
+        return None
+    if match.group('ordinal'):
+        return ORDINALS[match.group('ordinal')]
+    for group in ('number', 'number_before', 'ordinal_digits', 'bare'):
+        if match.group(group):
+            return int(match.group(group))
+    return None
@@ -0,0 +1,160 @@
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+
+from .logs import env_float, env_int, get_logger
+
+logger = get_logger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+# IN lists and amenity filters differ only in placeholder count; give them one shape
+_PLACEHOLDER_LIST = re.compile(r'%s(?:\s*,\s*%s)+')
+
+
+def query_shape(query):
+    """Normalized SQL used to group executions of the same statement."""
+    return _PLACEHOLDER_LIST.sub('%s, ...', _WHITESPACE.sub(' ', query).strip())
+
+
+def full_scans(plan):
+    """Tables the EXPLAIN FORMAT=JSON plan reads with access_type ALL."""
+    tables = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            if node.get('access_type') == 'ALL':
+                tables.append(node.get('table_name', '?'))
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(plan)
+    return tables
+
+
+class QueryShapeStats:
+    __slots__ = ('shape_id', 'label', 'shape', 'count', 'total', 'max', 'slow',
+                 'samples', 'plan', 'full_scans', 'explained')
+
+    def __init__(self, shape_id, label, shape, sample_size):
+        self.shape_id = shape_id
+        self.label = label
+        self.shape = shape
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.slow = 0
+        self.samples = deque(maxlen=sample_size)
+        self.plan = None
+        self.full_scans = []
+        self.explained = False
+
+
+class QueryProfiler:
+    """Opt-in per-statement profiler fed by the database classes' _execute.
+
+    Every statement is aggregated by query shape. Executions slower than
+    QUERY_PROFILER_THRESHOLD_MS are kept with their parameters, and each
+    SELECT shape is run through EXPLAIN FORMAT=JSON once, on a separate
+    pooled connection, to flag full table scans.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv('QUERY_PROFILER', 'false').lower() == 'true'
+        self.threshold = env_float('QUERY_PROFILER_THRESHOLD_MS', 100.0) / 1000
+        self.sample_size = max(env_int('QUERY_PROFILER_SAMPLES', 5), 1)
+        self.shapes = {}
+        self._lock = threading.Lock()
+
+    def record(self, database, label, query, params, seconds, many=False):
+        shape = query_shape(query)
+        with self._lock:
+            stats = self.shapes.get(shape)
+            if stats is None:
+                shape_id = hashlib.sha1(shape.encode('utf-8')).hexdigest()[:12]
+                stats = self.shapes[shape] = QueryShapeStats(shape_id, label, shape, self.sample_size)
+            stats.count += 1
+            stats.total += seconds
+            stats.max = max(stats.max, seconds)
+            if seconds >= self.threshold:
+                stats.slow += 1
+                stats.samples.append({
+                    'ms': round(seconds * 1000, 2),
+                    'params': repr(params)[:500],
+                    'at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                })
+                logger.warning("Slow query %s (%s) took %.1f ms", stats.shape_id, label, seconds * 1000)
+            explain = not stats.explained and not many and shape.upper().startswith('SELECT')
+            stats.explained = stats.explained or explain
+
+        if explain:
+            threading.Thread(target=self._explain, args=(database, stats, query, params),
+                             name='query-explain', daemon=True).start()
+
+    def _explain(self, database, stats, query, params):
+        with database.get_connection() as connection:
+            if connection is None:
+                return
+            try:
+                cursor = connection.cursor()
+                cursor.execute("EXPLAIN FORMAT=JSON " + query, params)
+                row = cursor.fetchone()
+                cursor.close()
+            except Exception as e:
+                logger.error("Error explaining query %s: %s", stats.shape_id, e)
+                return
+
+        plan = json.loads(row[0]) if row else None
+        stats.plan = plan
+        stats.full_scans = full_scans(plan)
+        if stats.full_scans:
+            logger.warning("Query %s (%s) does a full scan of %s",
+                           stats.shape_id, stats.label, ', '.join(stats.full_scans))
+
+    def report(self, limit=None):
+        """Query shapes by total time spent, most expensive first."""
+        with self._lock:
+            shapes = sorted(self.shapes.values(), key=lambda stats: stats.total, reverse=True)
+            rows = [{
+                'shape_id': stats.shape_id,
+                'label': stats.label,
+                'count': stats.count,
+                'total_ms': round(stats.total * 1000, 2),
+                'avg_ms': round(stats.total * 1000 / stats.count, 3),
+                'max_ms': round(stats.max * 1000, 2),
+                'slow': stats.slow,
+                'full_scans': list(stats.full_scans),
+                'slow_samples': list(stats.samples),
+                'shape': stats.shape,
+                'plan': stats.plan,
+            } for stats in shapes[:limit]]
+        return rows
+
+    def format_report(self, limit=20):
+        lines = [f"{'shape':<12} {'label':<24} {'count':>7} {'total ms':>10} {'avg ms':>8} {'max ms':>8} {'slow':>5}  full scans"]
+        for row in self.report(limit):
+            lines.append(f"{row['shape_id']:<12} {row['label']:<24} {row['count']:>7} {row['total_ms']:>10} "
+                         f"{row['avg_ms']:>8} {row['max_ms']:>8} {row['slow']:>5}  {', '.join(row['full_scans']) or '-'}")
+        return '\n'.join(lines)
+
+    def reset(self):
+        with self._lock:
+            self.shapes = {}
+
+# Global query profiler
+query_profiler = QueryProfiler()
+
+
+def _log_report():
+    if query_profiler.enabled and query_profiler.shapes:
+        logger.info("Query profile by total time:\n%s", query_profiler.format_report())
+
+
+atexit.register(_log_report)
@@ -0,0 +1,140 @@
+from datetime import datetime
+
+import numpy as np
+
+from .amenities import SEARCHABLE_AMENITIES, amenity_key
+from .logs import env_float
+
+
+# Relative weight of each signal in the final score
+WEIGHTS = {
+    'price': env_float('RANK_WEIGHT_PRICE', 0.35),
+    'amenities': env_float('RANK_WEIGHT_AMENITIES', 0.25),
+    'occupancy': env_float('RANK_WEIGHT_OCCUPANCY', 0.10),
+    'rating': env_float('RANK_WEIGHT_RATING', 0.15),
+    'featured': env_float('RANK_WEIGHT_FEATURED', 0.05),
+    'freshness': env_float('RANK_WEIGHT_FRESHNESS', 0.10),
+}
+
+# Rent over budget still scores, falling to 0 at budget * (1 + this)
+PRICE_TOLERANCE = 0.3
+FRESHNESS_HALF_LIFE_DAYS = 30.0
+
+# One bit per preference the ranking understands
+AMENITY_BITS = {key: 1 << i for i, key in enumerate(sorted(SEARCHABLE_AMENITIES | {'furnished'}))}
+_POPCOUNT = np.array([bin(i).count('1') for i in range(1 << len(AMENITY_BITS))], dtype=np.float32)
+
+OCCUPANCY_CODES = {name: i for i, name in enumerate(
+    ['bachelor', 'family', 'female_only', 'male_only', 'mixed'])}
+MIXED = OCCUPANCY_CODES['mixed']
+# occupancy_type slot values as the NLU extracts them ("Female", "Male")
+OCCUPANCY_ALIASES = {'female': 'female_only', 'male': 'male_only'}
+
+
+def normalize_occupancy(occupancy):
+    """OCCUPANCY_CODES name for an occupancy_type slot value, or None."""
+    if not occupancy:
+        return None
+    name = str(occupancy).strip().lower().replace(' ', '_').replace('-', '_')
+    name = OCCUPANCY_ALIASES.get(name, name)
+    return name if name in OCCUPANCY_CODES else None
+
+
+def amenity_bits(amenities, furnished=False):
+    """Bitmask of the ranked preferences a property offers."""
+    bits = AMENITY_BITS['furnished'] if furnished else 0
+    for name in amenities or []:
+        bits |= AMENITY_BITS.get(amenity_key(name), 0)
+    return bits
+
+
+def preference_bits(preferences):
+    bits = 0
+    for pref in preferences or []:
+        bits |= AMENITY_BITS.get(amenity_key(pref), 0)
+    return bits
+
+
+def candidate_arrays(rows, now=None):
+    """Column arrays for scoring, built once from candidate property rows."""
+    now = now or datetime.now()
+    count = len(rows)
+    rent = np.empty(count, dtype=np.float32)
+    bits = np.empty(count, dtype=np.int64)
+    occupancy = np.empty(count, dtype=np.int8)
+    rating = np.empty(count, dtype=np.float32)
+    featured = np.empty(count, dtype=np.float32)
+    age_days = np.empty(count, dtype=np.float32)
+
+    for i, row in enumerate(rows):
+        rent[i] = float(row['rent_amount'])
+        bits[i] = amenity_bits(row.get('amenities'), row.get('furnished'))
+        occupancy[i] = OCCUPANCY_CODES.get(row.get('occupancy_type'), -1)
+        rating[i] = float(row.get('owner_rating') or 0)
+        featured[i] = 1.0 if row.get('featured') else 0.0
+        updated_at = row.get('updated_at') or row.get('created_at')
+        age_days[i] = (now - updated_at).total_seconds() / 86400 if updated_at else 365.0
+
+    return {
+        'rent': rent,
+        'amenity_bits': bits,
+        'occupancy': occupancy,
+        'rating': rating,
+        'featured': featured,
+        'age_days': age_days,
+    }
+
+
+def score(arrays, budget=None, wanted_bits=0, occupancy=None, weights=None):
+    """Score every candidate at once; higher is better."""
+    weights = weights or WEIGHTS
+    rent = arrays['rent']
+    total = np.zeros(rent.shape[0], dtype=np.float32)
+
+    if budget:
+        over = np.maximum(rent - budget, 0) / (budget * PRICE_TOLERANCE)
+        total += weights['price'] * np.clip(1.0 - over, 0.0, 1.0)
+    else:
+        total += weights['price']
+
+    if wanted_bits:
+        overlap = _POPCOUNT[arrays['amenity_bits'] & wanted_bits] / _POPCOUNT[wanted_bits]
+        total += weights['amenities'] * overlap
+
+    occupancy_code = OCCUPANCY_CODES.get(normalize_occupancy(occupancy))
+    if occupancy_code is not None:
+        codes = arrays['occupancy']
+        match = np.where(codes == occupancy_code, 1.0, np.where(codes == MIXED, 0.5, 0.0))
+        total += weights['occupancy'] * match.astype(np.float32)
+
+    total += weights['rating'] * (arrays['rating'] / 5.0)
+    total += weights['featured'] * arrays['featured']
+    total += weights['freshness'] * np.exp2(-arrays['age_days'] / FRESHNESS_HALF_LIFE_DAYS)
+    return total
+
+
+def top_k(scores, k):
+    """Indices of the k best scores, best first, via a partial sort."""
+    count = scores.shape[0]
+    if count == 0 or k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < count:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(count)
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+def rank_properties(rows, budget=None, preferences=None, occupancy=None, k=10):
+    """Return the k best rows for this search, best first."""
+    if not rows:
+        return []
+    arrays = candidate_arrays(rows)
+    scores = score(arrays, budget, preference_bits(preferences), occupancy)
+    best = top_k(scores, k)
+    ranked = []
+    for i in best:
+        row = rows[i]
+        row['score'] = round(float(scores[i]), 4)
+        ranked.append(row)
+    return ranked
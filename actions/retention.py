@@ -0,0 +1,211 @@
+import argparse
+import gzip
+import json
+import os
+import re
+from datetime import date
+
+from .database import db
+from .logs import env_int, get_logger
+
+logger = get_logger(__name__)
+
+# Months of rows kept in MySQL; older monthly partitions are archived, then dropped
+LOG_RETENTION_MONTHS = max(env_int('LOG_RETENTION_MONTHS', 6), 1)
+# Empty monthly partitions created ahead of time, so inserts never land in p_future
+LOG_PARTITIONS_AHEAD = max(env_int('LOG_PARTITIONS_AHEAD', 3), 1)
+ARCHIVE_DIR = os.getenv('LOG_ARCHIVE_DIR', 'archive')
+ARCHIVE_FETCH_SIZE = max(env_int('LOG_ARCHIVE_FETCH_SIZE', 1000), 1)
+
+# Tables partitioned by migration 006
+PARTITIONED_TABLES = ('bot_conversations', 'search_analytics')
+FUTURE_PARTITION = 'p_future'
+_MONTH_PARTITION = re.compile(r'^p(\d{4})(\d{2})$')
+
+PARTITIONS_QUERY = """
+SELECT PARTITION_NAME as name, TABLE_ROWS as approx_rows
+FROM information_schema.PARTITIONS
+WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+ORDER BY PARTITION_ORDINAL_POSITION
+"""
+
+
+def add_months(day, months):
+    """First day of the month `months` after (or before) the month of `day`."""
+    years, month = divmod(day.month - 1 + months, 12)
+    return date(day.year + years, month + 1, 1)
+
+
+def partition_month(name):
+    """The month a pYYYYMM partition holds, or None for any other partition."""
+    match = _MONTH_PARTITION.match(name or '')
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def partition_definition(month):
+    return (f"PARTITION p{month:%Y%m} VALUES LESS THAN "
+            f"(UNIX_TIMESTAMP('{add_months(month, 1):%Y-%m-%d} 00:00:00'))")
+
+
+class LogRetention:
+    """Keeps the partitioned log tables to LOG_RETENTION_MONTHS months.
+
+    Each run adds monthly partitions ahead of time, then for every month past
+    the retention window streams the partition's rows into a gzipped
+    newline-delimited JSON file under LOG_ARCHIVE_DIR and drops the partition.
+    """
+
+    def __init__(self, database, retention_months=LOG_RETENTION_MONTHS, archive_dir=ARCHIVE_DIR):
+        self.database = database
+        self.retention_months = retention_months
+        self.archive_dir = archive_dir
+
+    def partitions(self, cursor, table):
+        cursor.execute(PARTITIONS_QUERY, (table,))
+        return cursor.fetchall()
+
+    def ensure_partitions(self, cursor, table, today=None, months_ahead=LOG_PARTITIONS_AHEAD):
+        """Split p_future into monthly partitions up to `months_ahead` months from now."""
+        today = today or date.today()
+        months = [partition_month(row['name']) for row in self.partitions(cursor, table)]
+        months = [month for month in months if month]
+        if months:
+            start = add_months(max(months), 1)
+        else:
+            # First run: begin with the oldest month already in p_future
+            cursor.execute(f"SELECT MIN(created_at) as oldest FROM {table}")
+            oldest = cursor.fetchone()['oldest']
+            start = (oldest.date() if oldest else today).replace(day=1)
+
+        end = add_months(today, months_ahead)
+        new_months = []
+        month = start
+        while month <= end:
+            new_months.append(month)
+            month = add_months(month, 1)
+        if not new_months:
+            return 0
+
+        definitions = ',\n'.join([partition_definition(month) for month in new_months]
+                                 + [f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE"])
+        cursor.execute(f"ALTER TABLE {table} REORGANIZE PARTITION {FUTURE_PARTITION} INTO (\n{definitions}\n)")
+        logger.info("Added %s monthly partitions to %s", len(new_months), table)
+        return len(new_months)
+
+    def expired_partitions(self, cursor, table, today=None):
+        """Monthly partitions entirely older than the retention window, oldest first."""
+        cutoff = add_months(today or date.today(), -self.retention_months)
+        expired = []
+        for row in self.partitions(cursor, table):
+            month = partition_month(row['name'])
+            if month and month < cutoff:
+                expired.append(row['name'])
+        return expired
+
+    def _rolled_up(self, cursor, table, partition):
+        """search_analytics partitions may only go once the rollup job has read them."""
+        if table != 'search_analytics':
+            return True
+        cursor.execute(f"SELECT MAX(id) as max_id FROM {table} PARTITION ({partition})")
+        max_id = cursor.fetchone()['max_id']
+        if max_id is None:
+            return True
+        try:
+            cursor.execute("SELECT last_id FROM rollup_watermarks WHERE job_name = 'search_analytics'")
+            row = cursor.fetchone()
+        except Exception:
+            # Rollups not installed (migration 005), nothing to wait for
+            return True
+        return row is not None and row['last_id'] >= max_id
+
+    def archive_partition(self, connection, table, partition):
+        """Stream a partition's rows to <archive_dir>/<table>/<table>-<partition>.ndjson.gz.
+
+        Returns the archive path, or None if the row count didn't match.
+        """
+        directory = os.path.join(self.archive_dir, table)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{table}-{partition}.ndjson.gz")
+        temporary_path = path + '.part'
+
+        written = 0
+        # Unbuffered, so the partition is never held in memory at once
+        cursor = connection.cursor(dictionary=True, buffered=False)
+        cursor.execute(f"SELECT * FROM {table} PARTITION ({partition}) ORDER BY id")
+        with gzip.open(temporary_path, 'wt', encoding='utf-8') as archive:
+            while True:
+                rows = cursor.fetchmany(ARCHIVE_FETCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    archive.write(json.dumps(row, default=str, ensure_ascii=False))
+                    archive.write('\n')
+                written += len(rows)
+        cursor.close()
+
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(f"SELECT COUNT(*) as row_count FROM {table} PARTITION ({partition})")
+        expected = cursor.fetchone()['row_count']
+        cursor.close()
+        if written != expected:
+            logger.error("Archive of %s.%s wrote %s rows, expected %s; keeping the partition",
+                         table, partition, written, expected)
+            os.remove(temporary_path)
+            return None
+
+        os.replace(temporary_path, path)
+        return path
+
+    def run(self, dry_run=False, today=None):
+        """Add upcoming partitions, then archive and drop expired ones. Returns {table: [archived paths]}."""
+        archived = {}
+        with self.database.get_connection() as connection:
+            if connection is None:
+                return None
+
+            for table in PARTITIONED_TABLES:
+                archived[table] = []
+                try:
+                    cursor = connection.cursor(dictionary=True)
+                    if not dry_run:
+                        self.ensure_partitions(cursor, table, today)
+                    expired = self.expired_partitions(cursor, table, today)
+                    for partition in expired:
+                        if not self._rolled_up(cursor, table, partition):
+                            logger.warning("Keeping %s.%s until the search rollups have read it", table, partition)
+                            continue
+                        if dry_run:
+                            archived[table].append(partition)
+                            continue
+                        path = self.archive_partition(connection, table, partition)
+                        if path is None:
+                            continue
+                        cursor.execute(f"ALTER TABLE {table} DROP PARTITION {partition}")
+                        logger.info("Archived %s.%s to %s and dropped it", table, partition, path)
+                        archived[table].append(path)
+                    cursor.close()
+                except Exception as e:
+                    logger.error("Error applying retention to %s: %s", table, e)
+
+        return archived
+
+# Global log retention job
+log_retention = LogRetention(db)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Archive and drop monthly log partitions older than LOG_RETENTION_MONTHS.")
+    parser.add_argument('--dry-run', action='store_true', help='only list the partitions that would go')
+    args = parser.parse_args()
+
+    result = log_retention.run(dry_run=args.dry_run)
+    if result is None:
+        raise SystemExit("Could not connect to the database; check the DB_* settings")
+    for table, items in result.items():
+        label = 'would archive' if args.dry_run else 'archived'
+        print(f"{table}: {label} {len(items)} partition(s)" + ''.join(f"\n  {item}" for item in items))
+
+
+if __name__ == '__main__':
+    main()
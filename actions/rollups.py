@@ -0,0 +1,262 @@
+import argparse
+import json
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from .amenities import preference_keys
+from .database import db
+from .locations import location_index
+from .logs import env_int, get_logger
+
+logger = get_logger(__name__)
+
+ROLLUP_BUDGET_BUCKET = max(env_int('ROLLUP_BUDGET_BUCKET', 1000), 1)
+ROLLUP_BATCH_SIZE = max(env_int('ROLLUP_BATCH_SIZE', 5000), 1)
+# Rows younger than this are left for the next run, so inserts still in flight aren't skipped
+ROLLUP_SETTLE_SECONDS = max(env_int('ROLLUP_SETTLE_SECONDS', 10), 0)
+
+JOB_NAME = 'search_analytics'
+NO_BUDGET = -1
+
+# Highest id that is safe to fold in: just below the first unsettled row, or the newest row
+SETTLED_UPPER_QUERY = """
+SELECT COALESCE(MIN(id) - 1, (SELECT MAX(id) FROM search_analytics)) as upper_id
+FROM search_analytics
+WHERE id > %s AND created_at >= NOW() - INTERVAL %s SECOND
+"""
+
+RAW_ROWS_QUERY = """
+SELECT id, search_location, search_budget, search_preferences, results_shown, created_at
+FROM search_analytics
+WHERE id > %s AND id <= %s
+ORDER BY id
+LIMIT %s
+"""
+
+UPSERT_QUERY = """
+INSERT INTO {table}
+({column}, location_key, budget_bucket, preference_key, searches, zero_results, results_total)
+VALUES (%s, %s, %s, %s, %s, %s, %s) AS new
+ON DUPLICATE KEY UPDATE
+    searches = searches + new.searches,
+    zero_results = zero_results + new.zero_results,
+    results_total = results_total + new.results_total
+"""
+
+# (table, bucket column, how to truncate a created_at to the bucket)
+GRAINS = {
+    'hourly': ('search_rollup_hourly', 'bucket_start', lambda ts: ts.replace(minute=0, second=0, microsecond=0)),
+    'daily': ('search_rollup_daily', 'bucket_date', lambda ts: ts.date()),
+}
+
+
+def budget_bucket(budget):
+    if budget is None or float(budget) <= 0:
+        return NO_BUDGET
+    return int(float(budget) // ROLLUP_BUDGET_BUCKET) * ROLLUP_BUDGET_BUCKET
+
+
+def row_preferences(value):
+    """Preference keys of a raw search_preferences value (JSON list, JSON string or NULL)."""
+    if isinstance(value, (str, bytes)):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            pass
+    if isinstance(value, str):
+        value = [value]
+    return preference_keys(value)
+
+
+def aggregate(rows):
+    """Fold raw search_analytics rows into {grain: {rollup key: [searches, zero_results, results_total]}}."""
+    totals = {grain: defaultdict(lambda: [0, 0, 0]) for grain in GRAINS}
+    for row in rows:
+        location_key = location_index.resolve(row['search_location']) if row['search_location'] else ''
+        bucket = budget_bucket(row['search_budget'])
+        results_shown = row['results_shown'] or 0
+        # '' counts the search once; each requested preference gets its own row
+        keys = ('',) + row_preferences(row['search_preferences'])
+        for grain, (_, _, truncate) in GRAINS.items():
+            period = truncate(row['created_at'])
+            for preference_key in keys:
+                counts = totals[grain][(period, location_key, bucket, preference_key)]
+                counts[0] += 1
+                counts[1] += 1 if results_shown == 0 else 0
+                counts[2] += results_shown
+    return totals
+
+
+class SearchRollups:
+    """Incremental hourly/daily rollups of search_analytics and queries over them.
+
+    Each run folds the raw rows past the watermark into the rollup tables in
+    batches; a batch's upserts and its watermark move commit together, so a
+    crashed or concurrent run never counts a row twice.
+    """
+
+    def __init__(self, database):
+        self.database = database
+
+    def run_once(self, batch_size=ROLLUP_BATCH_SIZE):
+        """Fold every settled raw row into the rollups. Returns the number of rows processed, or None on error."""
+        if location_index.is_stale():
+            location_index.ensure_loaded(self.database)
+
+        processed = 0
+        with self.database.get_connection() as connection:
+            if connection is None:
+                return None
+
+            try:
+                cursor = connection.cursor(dictionary=True)
+                cursor.execute("SELECT last_id FROM rollup_watermarks WHERE job_name = %s", (JOB_NAME,))
+                row = cursor.fetchone()
+                last_id = row['last_id'] if row else 0
+                cursor.execute(SETTLED_UPPER_QUERY, (last_id, ROLLUP_SETTLE_SECONDS))
+                upper = cursor.fetchone()['upper_id'] or 0
+
+                while last_id < upper:
+                    cursor.execute(RAW_ROWS_QUERY, (last_id, upper, batch_size))
+                    rows = cursor.fetchall()
+                    if not rows:
+                        break
+                    if not self._apply_batch(connection, cursor, rows, last_id):
+                        logger.warning("Search rollup watermark moved during the run; stopping")
+                        break
+                    last_id = rows[-1]['id']
+                    processed += len(rows)
+                cursor.close()
+            except Exception as e:
+                logger.error("Error rolling up search analytics: %s", e)
+                return None
+
+        return processed
+
+    def _apply_batch(self, connection, cursor, rows, last_id):
+        totals = aggregate(rows)
+        connection.start_transaction()
+        try:
+            for grain, (table, column, _) in GRAINS.items():
+                values = [key + tuple(counts) for key, counts in totals[grain].items()]
+                cursor.executemany(UPSERT_QUERY.format(table=table, column=column), values)
+            cursor.execute(
+                "UPDATE rollup_watermarks SET last_id = %s WHERE job_name = %s AND last_id = %s",
+                (rows[-1]['id'], JOB_NAME, last_id),
+            )
+            if cursor.rowcount != 1:
+                connection.rollback()
+                return False
+            connection.commit()
+            return True
+        except Exception:
+            connection.rollback()
+            raise
+
+    def _query(self, query, params):
+        with self.database.get_connection() as connection:
+            if connection is None:
+                return []
+            try:
+                cursor = connection.cursor(dictionary=True)
+                cursor.execute(query, params)
+                rows = cursor.fetchall()
+                cursor.close()
+                return rows
+            except Exception as e:
+                logger.error("Error reading search rollups: %s", e)
+                return []
+
+    def _range(self, grain, since, until, location=None, per_preference=False):
+        """Table, WHERE clause and parameters for a period and an optional location.
+
+        Reads the one-row-per-search '' rows unless `per_preference` is set.
+        """
+        table, column, _ = GRAINS[grain]
+        if grain == 'daily':
+            since = since.date() if isinstance(since, datetime) else since
+            until = until.date() if isinstance(until, datetime) else until
+        where = f"{column} >= %s AND preference_key {'<>' if per_preference else '='} ''"
+        params = [since]
+        if until is not None:
+            where += f" AND {column} < %s"
+            params.append(until)
+        if location:
+            where += " AND location_key = %s"
+            params.append(location_index.resolve(location))
+        return table, where, params
+
+    def top_locations(self, since, until=None, limit=10, grain='daily'):
+        """[(location_key, searches, zero_results)] with the most searches in the period."""
+        table, where, params = self._range(grain, since, until)
+        rows = self._query(
+            f"SELECT location_key, SUM(searches) as searches, SUM(zero_results) as zero_results "
+            f"FROM {table} WHERE {where} AND location_key <> '' "
+            f"GROUP BY location_key ORDER BY searches DESC LIMIT %s",
+            params + [int(limit)],
+        )
+        return [(row['location_key'], int(row['searches']), int(row['zero_results'])) for row in rows]
+
+    def top_preferences(self, since, until=None, location=None, limit=10, grain='daily'):
+        """[(preference_key, searches)] most asked for in the period."""
+        table, where, params = self._range(grain, since, until, location, per_preference=True)
+        rows = self._query(
+            f"SELECT preference_key, SUM(searches) as searches FROM {table} WHERE {where} "
+            f"GROUP BY preference_key ORDER BY searches DESC LIMIT %s",
+            params + [int(limit)],
+        )
+        return [(row['preference_key'], int(row['searches'])) for row in rows]
+
+    def budget_histogram(self, since, until=None, location=None, grain='daily'):
+        """[(budget bucket lower bound, searches)] in bucket order, searches without a budget left out."""
+        table, where, params = self._range(grain, since, until, location)
+        rows = self._query(
+            f"SELECT budget_bucket, SUM(searches) as searches FROM {table} "
+            f"WHERE {where} AND budget_bucket <> %s GROUP BY budget_bucket ORDER BY budget_bucket",
+            params + [NO_BUDGET],
+        )
+        return [(int(row['budget_bucket']), int(row['searches'])) for row in rows]
+
+    def median_budget(self, since, until=None, location=None, grain='daily'):
+        """Median search budget, to the resolution of ROLLUP_BUDGET_BUCKET, or None without data."""
+        histogram = self.budget_histogram(since, until, location, grain)
+        total = sum(searches for _, searches in histogram)
+        if not total:
+            return None
+        seen = 0
+        for bucket, searches in histogram:
+            seen += searches
+            if seen * 2 >= total:
+                return bucket + ROLLUP_BUDGET_BUCKET / 2
+
+# Global search rollups
+search_rollups = SearchRollups(db)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fold search_analytics into the hourly/daily rollup tables.")
+    parser.add_argument('--interval', type=float, help='keep running, every this many seconds')
+    parser.add_argument('--report', type=int, metavar='DAYS', help='print demand for the last DAYS days and exit')
+    args = parser.parse_args()
+
+    if args.report:
+        since = date.today() - timedelta(days=args.report)
+        print(f"Top locations since {since}:")
+        for location_key, searches, zero_results in search_rollups.top_locations(since):
+            median = search_rollups.median_budget(since, location=location_key)
+            print(f"  {location_key:<20} {searches:>8} searches  {zero_results:>6} with no results  "
+                  f"median budget {median if median is not None else '-'}")
+        print("Top preferences:", search_rollups.top_preferences(since))
+        return
+
+    while True:
+        processed = search_rollups.run_once()
+        print(f"Rolled up {processed if processed is not None else 0} search analytics rows")
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+import threading
+import time
+
+import numpy as np
+
+from .ranking import OCCUPANCY_CODES, amenity_bits, preference_bits
+
+SNAPSHOT_COLUMNS = """
+SELECT id, rent_amount, area_key, neighborhood_key, amenities, furnished,
+       occupancy_type, latitude, longitude, is_available, updated_at
+FROM properties
+"""
+
+
+class SnapshotColumns:
+    """Immutable column store of listings; refreshes build a new one and swap it in.
+
+    Memory per listing, in the arrays below:
+        id 4 + rent 8 + area 2 + neighborhood 2 + amenity bits 4
+        + occupancy 1 + latitude 4 + longitude 4 + available 1 = 30 bytes
+    plus one `order` entry (8 bytes) for id lookups, so ~38 bytes per listing,
+    or under 4 MB for 100k listings. Location keys are stored once each in
+    `location_keys`; rows only hold their int16 codes.
+    """
+
+    __slots__ = ('ids', 'rent', 'area', 'neighborhood', 'amenity_bits', 'occupancy',
+                 'latitude', 'longitude', 'available', 'order', 'location_keys')
+
+    def __init__(self, ids, rent, area, neighborhood, bits, occupancy, latitude, longitude, available, location_keys):
+        self.ids = ids
+        self.rent = rent
+        self.area = area
+        self.neighborhood = neighborhood
+        self.amenity_bits = bits
+        self.occupancy = occupancy
+        self.latitude = latitude
+        self.longitude = longitude
+        self.available = available
+        self.location_keys = location_keys
+        # Sorted view of ids for searchsorted lookups, instead of a per-row dict
+        self.order = np.argsort(ids, kind='stable')
+
+    @classmethod
+    def empty(cls):
+        return cls(
+            np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64),
+            np.empty(0, dtype=np.int16), np.empty(0, dtype=np.int16),
+            np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int8),
+            np.empty(0, dtype=np.float32), np.empty(0, dtype=np.float32),
+            np.empty(0, dtype=bool), [],
+        )
+
+    def __len__(self):
+        return int(self.ids.shape[0])
+
+    def positions(self, ids):
+        """Row positions of `ids`, with -1 for ids not in the snapshot."""
+        ids = np.asarray(ids, dtype=np.int32)
+        if len(self) == 0 or ids.shape[0] == 0:
+            return np.full(ids.shape[0], -1, dtype=np.intp)
+        sorted_ids = self.ids[self.order]
+        slots = np.clip(np.searchsorted(sorted_ids, ids), 0, len(self) - 1)
+        positions = self.order[slots]
+        return np.where(self.ids[positions] == ids, positions, -1)
+
+
+class ListingSnapshot:
+    """In-memory copy of the listing catalog for searches that skip MySQL.
+
+    The first refresh loads every available property; later refreshes read
+    rows whose updated_at moved past the last one seen and merge them in, and
+    diff the snapshot against the ids of all available listings, so listings
+    that were deleted or became unavailable drop out. The cached rows of
+    changed and dropped listings are invalidated. Searches return property
+    ids; rows are hydrated through the property cache.
+    """
+
+    def __init__(self, refresh_seconds=30.0):
+        self.refresh_seconds = refresh_seconds
+        self.columns = SnapshotColumns.empty()
+        self.watermark = None
+        self.refreshed_at = None
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self.refreshed_at is not None
+
+    def is_stale(self):
+        return self.refreshed_at is None or time.monotonic() - self.refreshed_at > self.refresh_seconds
+
+    def refresh(self, database):
+        """Load changes since the last refresh. Returns the number of rows applied or dropped, or None on error."""
+        if not self._refresh_lock.acquire(blocking=False):
+            # Another request is already refreshing; keep serving the current snapshot
+            return 0
+        try:
+            if self.watermark is None:
+                rows, live_ids = database.fetch_snapshot_rows(), None
+            else:
+                rows = database.fetch_snapshot_rows(self.watermark)
+                # Read after the changed rows, so a listing deleted in between is dropped rather than kept
+                live_ids = database.fetch_snapshot_ids() if rows is not None else None
+                if live_ids is None:
+                    return None
+            if rows is None:
+                return None
+            dropped = self._apply(rows, live_ids)
+            if rows:
+                self.watermark = max(
+                    (row['updated_at'] for row in rows if row['updated_at'] is not None), default=self.watermark)
+            self.refreshed_at = time.monotonic()
+            changed = {row['id'] for row in rows} | dropped
+            if live_ids is not None and changed:
+                database.invalidate_listings(property_ids=changed)
+            return len(changed)
+        finally:
+            self._refresh_lock.release()
+
+    def _apply(self, rows, live_ids=None):
+        """Merge `rows` into a new snapshot, keeping only `live_ids` if given. Returns the ids dropped."""
+        current = self.columns
+        location_keys = list(current.location_keys)
+        codes = {key: code for code, key in enumerate(location_keys)}
+
+        def code_for(key):
+            key = key or ''
+            if key not in codes:
+                codes[key] = len(location_keys)
+                location_keys.append(key)
+            return codes[key]
+
+        count = len(rows)
+        ids = np.empty(count, dtype=np.int32)
+        rent = np.empty(count, dtype=np.float64)
+        area = np.empty(count, dtype=np.int16)
+        neighborhood = np.empty(count, dtype=np.int16)
+        bits = np.empty(count, dtype=np.int32)
+        occupancy = np.empty(count, dtype=np.int8)
+        latitude = np.empty(count, dtype=np.float32)
+        longitude = np.empty(count, dtype=np.float32)
+        available = np.empty(count, dtype=bool)
+
+        for i, row in enumerate(rows):
+            ids[i] = row['id']
+            rent[i] = float(row['rent_amount'])
+            area[i] = code_for(row['area_key'])
+            neighborhood[i] = code_for(row['neighborhood_key'])
+            bits[i] = amenity_bits(row['amenities'], row['furnished'])
+            occupancy[i] = OCCUPANCY_CODES.get(row['occupancy_type'], -1)
+            latitude[i] = float(row['latitude'])
+            longitude[i] = float(row['longitude'])
+            available[i] = bool(row['is_available'])
+
+        # Rows already in the snapshot are overwritten in a copy; new ones are appended
+        positions = current.positions(ids)
+        existing = positions >= 0
+        new = ~existing
+
+        def merged(old, changed):
+            column = old.copy()
+            column[positions[existing]] = changed[existing]
+            return np.concatenate([column, changed[new]])
+
+        columns = SnapshotColumns(
+            merged(current.ids, ids), merged(current.rent, rent),
+            merged(current.area, area), merged(current.neighborhood, neighborhood),
+            merged(current.amenity_bits, bits), merged(current.occupancy, occupancy),
+            merged(current.latitude, latitude), merged(current.longitude, longitude),
+            merged(current.available, available), location_keys,
+        )
+
+        dropped = set()
+        if live_ids is not None:
+            keep = np.isin(columns.ids, np.asarray(list(live_ids), dtype=np.int32))
+        else:
+            keep = columns.available
+        if not keep.all():
+            dropped = {int(property_id) for property_id in columns.ids[~keep]}
+            columns = SnapshotColumns(
+                columns.ids[keep], columns.rent[keep], columns.area[keep], columns.neighborhood[keep],
+                columns.amenity_bits[keep], columns.occupancy[keep], columns.latitude[keep],
+                columns.longitude[keep], columns.available[keep], location_keys,
+            )
+
+        self.columns = columns
+        return dropped
+
+    def search(self, location_key='', budget=None, preferences=(), after=None, limit=10):
+        """Ids of matching listings ordered by (rent, id), like build_search_query."""
+        columns = self.columns
+        mask = columns.available.copy()
+
+        if location_key:
+            codes = [code for code, key in enumerate(columns.location_keys) if key.startswith(location_key)]
+            if not codes:
+                return []
+            mask &= np.isin(columns.area, codes) | np.isin(columns.neighborhood, codes)
+
+        if budget:
+            mask &= columns.rent <= float(budget) * 1.1  # 10% tolerance
+
+        wanted = preference_bits(list(preferences))
+        if wanted:
+            mask &= (columns.amenity_bits & wanted) == wanted
+
+        if after is not None:
+            after_rent, after_id = float(after[0]), int(after[1])
+            mask &= (columns.rent > after_rent) | ((columns.rent == after_rent) & (columns.ids > after_id))
+
+        matches = np.flatnonzero(mask)
+        if matches.shape[0] == 0:
+            return []
+        # Sort by rent then id, only as far as the page needs
+        if matches.shape[0] > limit:
+            cutoff = np.partition(columns.rent[matches], limit - 1)[limit - 1]
+            matches = matches[columns.rent[matches] <= cutoff]
+        order = np.lexsort((columns.ids[matches], columns.rent[matches]))[:limit]
+        return [int(property_id) for property_id in columns.ids[matches[order]]]
+
+    def stats(self):
+        columns = self.columns
+        nbytes = sum(getattr(columns, name).nbytes for name in
+                     ('ids', 'rent', 'area', 'neighborhood', 'amenity_bits', 'occupancy',
+                      'latitude', 'longitude', 'available', 'order'))
+        return {
+            'listings': len(columns),
+            'available': int(columns.available.sum()),
+            'locations': len(columns.location_keys),
+            'bytes': nbytes,
+            'bytes_per_listing': round(nbytes / len(columns), 1) if len(columns) else 0,
+            'watermark': self.watermark.isoformat() if self.watermark else None,
+        }
@@ -0,0 +1,135 @@
+"""WebSocket chat channel for the web frontend.
+
+Registered in credentials.yml:
+
+    addons.streaming_channel.StreamingInput:
+      max_message_length: 2000
+
+The browser keeps one socket open at
+ws://localhost:5005/webhooks/streaming/websocket instead of making an HTTP
+request per message, and every bot message is pushed the moment Rasa hands
+it to the channel, so room cards are drawn one by one rather than after the
+whole reply has been collected as with the REST channel. Rasa passes on an
+action's messages once the action has finished, so the gain within a single
+action is the per-card rendering, not earlier database results.
+
+Client -> server:  {"sender": "user_ab12", "message": "rooms in dhanmondi", "id": 7}
+Server -> client:  {"event": "bot_message", "reply_to": 7, "message": {"text": ...}}
+                   {"event": "bot_message", "reply_to": 7, "message": {"custom": {"type": "room_card", ...}}}
+                   {"event": "done", "reply_to": 7}
+                   {"event": "error", "reply_to": 7, "error": "..."}
+
+Errors sent to the client are generic; details are only logged on the server.
+"""
+import json
+import logging
+
+from rasa.core.channels.channel import InputChannel, OutputChannel, UserMessage
+from sanic import Blueprint, response
+from websockets.exceptions import ConnectionClosed
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingOutput(OutputChannel):
+    """Sends each bot message down the user's WebSocket as soon as it is produced."""
+
+    @classmethod
+    def name(cls):
+        return 'streaming'
+
+    def __init__(self, ws, reply_to=None):
+        self.ws = ws
+        self.reply_to = reply_to
+
+    async def _send(self, recipient_id, message):
+        await self.ws.send(json.dumps({
+            'event': 'bot_message',
+            'reply_to': self.reply_to,
+            'message': dict(message, recipient_id=recipient_id),
+        }, ensure_ascii=False))
+
+    async def send_text_message(self, recipient_id, text, **kwargs):
+        await self._send(recipient_id, {'text': text})
+
+    async def send_image_url(self, recipient_id, image, **kwargs):
+        await self._send(recipient_id, {'image': image})
+
+    async def send_attachment(self, recipient_id, attachment, **kwargs):
+        await self._send(recipient_id, {'attachment': attachment})
+
+    async def send_text_with_buttons(self, recipient_id, text, buttons, **kwargs):
+        await self._send(recipient_id, {'text': text, 'buttons': buttons})
+
+    async def send_custom_json(self, recipient_id, json_message, **kwargs):
+        await self._send(recipient_id, {'custom': json_message})
+
+
+class StreamingInput(InputChannel):
+    """One persistent WebSocket per browser tab; messages on it are handled in order."""
+
+    @classmethod
+    def name(cls):
+        return 'streaming'
+
+    @classmethod
+    def from_credentials(cls, credentials):
+        return cls(**(credentials or {}))
+
+    def __init__(self, max_message_length=2000):
+        self.max_message_length = int(max_message_length)
+
+    def blueprint(self, on_new_message):
+        streaming_webhook = Blueprint('streaming_webhook', __name__)
+
+        @streaming_webhook.route('/', methods=['GET'])
+        async def health(request):
+            return response.json({'status': 'ok'})
+
+        @streaming_webhook.websocket('/websocket')
+        async def websocket(request, ws):
+            try:
+                await self._serve(ws, on_new_message)
+            except ConnectionClosed:
+                # Tab closed or network dropped, possibly while a reply was being sent
+                logger.debug("Streaming client disconnected")
+
+        return streaming_webhook
+
+    async def _serve(self, ws, on_new_message):
+        while True:
+            data = await ws.recv()
+            if data is None:
+                # Client went away
+                break
+            try:
+                payload = json.loads(data)
+            except ValueError:
+                await ws.send(json.dumps({'event': 'error', 'reply_to': None, 'error': 'invalid JSON'}))
+                continue
+            if not isinstance(payload, dict):
+                payload = {}
+            reply_to = payload.get('id')
+            text = str(payload.get('message') or '')[:self.max_message_length]
+            sender_id = payload.get('sender')
+            if not text or not sender_id:
+                await ws.send(json.dumps({'event': 'error', 'reply_to': reply_to,
+                                          'error': 'sender and message are required'}))
+                continue
+
+            try:
+                await on_new_message(UserMessage(
+                    text,
+                    StreamingOutput(ws, reply_to),
+                    str(sender_id),
+                    input_channel=self.name(),
+                    metadata=payload.get('metadata'),
+                ))
+            except ConnectionClosed:
+                raise
+            except Exception:
+                logger.exception("Error handling a streaming message from %s", sender_id)
+                await ws.send(json.dumps({'event': 'error', 'reply_to': reply_to,
+                                          'error': 'could not handle the message, please try again'}))
+                continue
+            await ws.send(json.dumps({'event': 'done', 'reply_to': reply_to}))
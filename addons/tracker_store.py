@@ -0,0 +1,301 @@
+"""Compact MySQL tracker store for the Rasa server.
+
+Configured in endpoints.yml:
+
+    tracker_store:
+      type: addons.tracker_store.CompactTrackerStore
+      url: mysql+pymysql://root@localhost:3306/rasa_db
+
+Rasa's SQL tracker store writes one JSON row per event and rebuilds the
+session from those rows on every message, so long conversations with large
+`search_results` slots get slower to load and save. This store keeps each
+conversation as:
+
+* one zlib-compressed delta row per save, holding only the new events, and
+* one compressed snapshot of the current session, rewritten when a session
+  starts or every `snapshot_every` events, and trimmed to the session start
+  plus the last `max_session_events` events (slot values and the active form
+  are restored in between).
+
+A load reads the snapshot and the deltas saved after it, so write size and
+load time stay bounded however long the conversation runs. Deltas older than
+`prune_after_days` that are already folded into a snapshot are deleted. The
+store uses its own SQLAlchemy pool (`pool_size`, `max_overflow`), separate
+from the actions server's MySQL pool; point `url` at another server to move
+tracker writes off the listing database entirely. Needs migrations 009 and 011.
+"""
+import asyncio
+import json
+import logging
+import zlib
+
+import sqlalchemy
+from rasa.core.tracker_store import TrackerStore
+from rasa.shared.core.constants import ACTION_SESSION_START_NAME
+from rasa.shared.core.events import ActionExecuted, ActiveLoop, Event, SlotSet, UserUttered
+from rasa.shared.core.trackers import DialogueStateTracker
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_QUERY = """
+SELECT sender_id, snapshot, snapshot_offset, view_count, event_count, last_timestamp
+FROM tracker_snapshots
+WHERE sender_id = :sender_id
+"""
+SNAPSHOT_SELECT = sqlalchemy.text(SNAPSHOT_QUERY)
+SNAPSHOT_LOCK = sqlalchemy.text(SNAPSHOT_QUERY + "FOR UPDATE")
+
+DELTAS_QUERY = sqlalchemy.text("""
+SELECT payload
+FROM tracker_event_deltas
+WHERE sender_id = :sender_id AND first_event >= :first_event
+ORDER BY first_event
+""")
+
+DELTA_INSERT = sqlalchemy.text("""
+INSERT INTO tracker_event_deltas (sender_id, first_event, event_count, payload)
+VALUES (:sender_id, :first_event, :event_count, :payload)
+""")
+
+SNAPSHOT_UPSERT = sqlalchemy.text("""
+INSERT INTO tracker_snapshots (sender_id, snapshot, snapshot_offset, view_count, event_count, last_timestamp)
+VALUES (:sender_id, :snapshot, :snapshot_offset, :view_count, :event_count, :last_timestamp) AS new
+ON DUPLICATE KEY UPDATE
+    snapshot = new.snapshot,
+    snapshot_offset = new.snapshot_offset,
+    view_count = new.view_count,
+    event_count = new.event_count,
+    last_timestamp = new.last_timestamp
+""")
+
+COUNTS_UPDATE = sqlalchemy.text("""
+UPDATE tracker_snapshots
+SET view_count = :view_count, event_count = :event_count, last_timestamp = :last_timestamp
+WHERE sender_id = :sender_id
+""")
+
+# Only deltas already covered by the conversation's snapshot may go
+PRUNE_QUERY = sqlalchemy.text("""
+DELETE d FROM tracker_event_deltas d
+JOIN tracker_snapshots s ON s.sender_id = d.sender_id
+WHERE d.created_at < NOW() - INTERVAL :days DAY AND d.first_event < s.snapshot_offset
+""")
+
+
+# Tracker attribute holding the last of its events that is in the store, as of its last load or save
+LAST_SAVED_ATTRIBUTE = '_compact_store_last_saved'
+
+
+def is_session_start(event):
+    return isinstance(event, ActionExecuted) and event.action_name == ACTION_SESSION_START_NAME
+
+
+def unsaved_events(events, last_saved=None, last_timestamp=None, view_count=0):
+    """The tracker events after the last one already in the store.
+
+    `last_saved` is found by identity, so this holds however max_event_history
+    caps tracker.events: if the cap pushed it out, every event left is newer.
+    Trackers the store didn't load fall back to the stored last_timestamp,
+    and rows saved before migration 011 to the stored session length.
+    """
+    if last_saved is not None:
+        for i in range(len(events) - 1, -1, -1):
+            if events[i] is last_saved:
+                return events[i + 1:]
+        return events
+    if last_timestamp is not None:
+        return [event for event in events if event.timestamp > last_timestamp]
+    return events[view_count:]
+
+
+class CompactTrackerStore(TrackerStore):
+    """Tracker store that saves compressed event deltas and a per-session snapshot."""
+
+    def __init__(self, domain=None, host=None, event_broker=None, pool_size=5, max_overflow=5,
+                 pool_recycle=3600, compression_level=6, snapshot_every=50, max_session_events=200,
+                 prune_after_days=30, prune_every=1000, **kwargs):
+        super().__init__(domain, event_broker, **kwargs)
+        if not host:
+            raise ValueError("CompactTrackerStore needs a SQLAlchemy `url` in endpoints.yml")
+        self.engine = sqlalchemy.create_engine(
+            host,
+            pool_size=int(pool_size),
+            max_overflow=int(max_overflow),
+            pool_recycle=int(pool_recycle),
+            pool_pre_ping=True,
+        )
+        self.compression_level = int(compression_level)
+        self.snapshot_every = max(int(snapshot_every), 1)
+        self.max_session_events = max(int(max_session_events), 1)
+        self.prune_after_days = int(prune_after_days)
+        self.prune_every = max(int(prune_every), 1)
+        self.last_write_bytes = 0
+        self._saves = 0
+
+    def _pack(self, events):
+        data = json.dumps([event.as_dict() for event in events], separators=(',', ':'), ensure_ascii=False)
+        return zlib.compress(data.encode('utf-8'), self.compression_level)
+
+    @staticmethod
+    def _unpack(payload):
+        return [Event.from_parameters(item) for item in json.loads(zlib.decompress(payload).decode('utf-8'))]
+
+    async def _run(self, function, *args):
+        # SQLAlchemy here is blocking; keep it off the Rasa server's event loop
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+    def _compact(self, sender_id, session):
+        """The session's events, with the middle dropped once it is longer than max_session_events.
+
+        Keeps the session start block and the most recent turns (from a user
+        message on), and replaces what was dropped with the slot values and
+        active form it left behind.
+        """
+        if len(session) <= self.max_session_events:
+            return session
+        head_end = next((i for i, event in enumerate(session) if isinstance(event, UserUttered)), len(session))
+        tail_start = len(session) - self.max_session_events
+        while tail_start < len(session) and not isinstance(session[tail_start], UserUttered):
+            tail_start += 1
+        if tail_start <= head_end or tail_start >= len(session):
+            return session
+
+        state = DialogueStateTracker.from_events(sender_id, session[:tail_start], slots=self.domain.slots)
+        timestamp = session[tail_start - 1].timestamp
+        restored = [SlotSet(name, slot.value, timestamp=timestamp)
+                    for name, slot in state.slots.items() if slot.value != slot.initial_value]
+        if state.active_loop_name:
+            restored.append(ActiveLoop(state.active_loop_name, timestamp=timestamp))
+        return session[:head_end] + restored + session[tail_start:]
+
+    def _save_events(self, sender_id, events, last_saved=None):
+        """Persist the events not saved yet and return them.
+
+        A new session snapshot is built from the stored session plus the new
+        events, not from the tracker, which may hold only its last
+        max_event_history events.
+        """
+        with self.engine.begin() as connection:
+            row = connection.execute(SNAPSHOT_LOCK, {'sender_id': sender_id}).mappings().first()
+            if row is None:
+                new_events = events
+            else:
+                new_events = unsaved_events(events, last_saved, row['last_timestamp'], row['view_count'])
+            if not new_events:
+                return []
+
+            view_count = row['view_count'] if row else 0
+            event_count = (row['event_count'] if row else 0) + len(new_events)
+            last_timestamp = new_events[-1].timestamp
+            session = None
+            if (row is None or any(is_session_start(event) for event in new_events)
+                    or event_count - row['snapshot_offset'] >= self.snapshot_every):
+                # Read before this save's delta goes in, which is appended below
+                stored = self._stored_events(connection, row)[0] if row else []
+                history = stored + new_events
+                start = max((i for i, event in enumerate(history) if is_session_start(event)), default=0)
+                session = self._compact(sender_id, history[start:])
+
+            payload = self._pack(new_events)
+            connection.execute(DELTA_INSERT, {
+                'sender_id': sender_id, 'first_event': event_count - len(new_events),
+                'event_count': len(new_events), 'payload': payload,
+            })
+            written = len(payload)
+
+            if session is not None:
+                snapshot = self._pack(session)
+                connection.execute(SNAPSHOT_UPSERT, {
+                    'sender_id': sender_id, 'snapshot': snapshot, 'snapshot_offset': event_count,
+                    'view_count': len(session), 'event_count': event_count, 'last_timestamp': last_timestamp,
+                })
+                written += len(snapshot)
+            else:
+                connection.execute(COUNTS_UPDATE, {
+                    'sender_id': sender_id, 'view_count': view_count + len(new_events),
+                    'event_count': event_count, 'last_timestamp': last_timestamp,
+                })
+
+        self.last_write_bytes = written
+        logger.debug("Saved %s events (%s bytes) for %s", len(new_events), written, sender_id)
+        return new_events
+
+    def _stored_events(self, connection, row):
+        """The stored session: the snapshot and the deltas saved after it."""
+        events = self._unpack(row['snapshot'])
+        payloads = connection.execute(
+            DELTAS_QUERY, {'sender_id': row['sender_id'], 'first_event': row['snapshot_offset']}
+        ).scalars().all()
+        for payload in payloads:
+            events.extend(self._unpack(payload))
+        return events, row['event_count']
+
+    def _load_events(self, sender_id, full=False):
+        with self.engine.connect() as connection:
+            row = connection.execute(SNAPSHOT_SELECT, {'sender_id': sender_id}).mappings().first()
+            if row is None:
+                return None, 0
+            if full:
+                payloads = connection.execute(DELTAS_QUERY, {'sender_id': sender_id, 'first_event': 0}).scalars().all()
+                if payloads:
+                    # History older than prune_after_days may be gone; this is what is left of it
+                    return [event for payload in payloads for event in self._unpack(payload)], row['event_count']
+            return self._stored_events(connection, row)
+
+    def _prune(self):
+        with self.engine.begin() as connection:
+            result = connection.execute(PRUNE_QUERY, {'days': self.prune_after_days})
+        logger.info("Pruned %s tracker deltas older than %s days", result.rowcount, self.prune_after_days)
+
+    def _tracker(self, sender_id, loaded):
+        events, event_count = loaded
+        if events is None:
+            return None
+        tracker = DialogueStateTracker.from_events(
+            sender_id, events, slots=self.domain.slots, max_event_history=self.max_event_history)
+        setattr(tracker, LAST_SAVED_ATTRIBUTE, tracker.events[-1] if tracker.events else None)
+        return tracker
+
+    async def save(self, tracker):
+        events = list(tracker.events)
+        new_events = await self._run(
+            self._save_events, tracker.sender_id, events, getattr(tracker, LAST_SAVED_ATTRIBUTE, None))
+        if events:
+            setattr(tracker, LAST_SAVED_ATTRIBUTE, events[-1])
+        if self.event_broker:
+            for event in new_events:
+                body = {'sender_id': tracker.sender_id}
+                body.update(event.as_dict())
+                self.event_broker.publish(body)
+
+        self._saves += 1
+        if self.prune_after_days > 0 and self._saves % self.prune_every == 0:
+            try:
+                await self._run(self._prune)
+            except Exception as e:
+                logger.error("Error pruning tracker deltas: %s", e)
+
+    async def retrieve(self, sender_id):
+        """The conversation's current session, or None if it was never saved."""
+        return self._tracker(sender_id, await self._run(self._load_events, sender_id))
+
+    async def retrieve_full_tracker(self, sender_id):
+        """Every saved event that hasn't been pruned, across all sessions."""
+        return self._tracker(sender_id, await self._run(self._load_events, sender_id, True))
+
+    def _keys(self):
+        with self.engine.connect() as connection:
+            return connection.execute(sqlalchemy.text("SELECT sender_id FROM tracker_snapshots")).scalars().all()
+
+    def _exists(self, sender_id):
+        with self.engine.connect() as connection:
+            return connection.execute(
+                sqlalchemy.text("SELECT 1 FROM tracker_snapshots WHERE sender_id = :sender_id"),
+                {'sender_id': sender_id},
+            ).first() is not None
+
+    async def keys(self):
+        return await self._run(self._keys)
+
+    async def exists(self, conversation_id):
+        return await self._run(self._exists, conversation_id)
@@ -0,0 +1,100 @@
+"""Compare concurrent search latency for the sync and async database paths.
+
+Run from the project root against a seeded database:
+
+    python -m benchmarks.bench_db_concurrency --requests 200 --concurrency 20
+
+Modes:
+    sync   - blocking DatabaseConnection calls made straight from coroutines,
+             the way the actions worked before the async path existed
+    thread - DatabaseConnection calls handed to the default thread pool
+    async  - AsyncDatabaseConnection on the aiomysql pool
+
+The search and property caches and the listing snapshot are turned off
+before the database modules load, so every request reaches MySQL through
+the pool instead of being answered from process memory.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+# Must be set before actions.database reads them; a TTL of 0 makes every lookup a miss
+os.environ["SEARCH_CACHE_TTL"] = "0"
+os.environ["PROPERTY_CACHE_TTL"] = "0"
+os.environ["SEARCH_SNAPSHOT"] = "false"
+
+from actions.database import db
+from actions.async_database import async_db, aiomysql
+
+QUERIES = [
+    ("dhaka", 15000, None),
+    ("dhanmondi", 20000, ["ac"]),
+    ("uttara", 12000, None),
+    ("gulshan", 30000, ["parking", "security"]),
+    ("chittagong", 20000, ["wifi"]),
+]
+
+
+async def _one_request(mode, i):
+    location, budget, preferences = QUERIES[i % len(QUERIES)]
+    start = time.perf_counter()
+    if mode == "sync":
+        db.search_properties(location, budget, preferences)
+    elif mode == "thread":
+        await asyncio.get_running_loop().run_in_executor(None, db.search_properties, location, budget, preferences)
+    else:
+        await async_db.search_properties(location, budget, preferences)
+    return time.perf_counter() - start
+
+
+async def run_mode(mode, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(i):
+        async with semaphore:
+            return await _one_request(mode, i)
+
+    # Warm up the pools so connection setup isn't measured
+    await _one_request(mode, 0)
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(limited(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latencies)
+    return {
+        "mode": mode,
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--modes", default="sync,thread,async")
+    args = parser.parse_args()
+
+    for mode in args.modes.split(","):
+        if mode == "async" and aiomysql is None:
+            print("async: skipped, aiomysql is not installed")
+            continue
+        async_db.enabled = mode == "async"
+        result = await run_mode(mode, args.requests, args.concurrency)
+        print(f"{result['mode']:>6}: {result['throughput_rps']:>8} req/s  "
+              f"p50 {result['p50_ms']:>8} ms  p95 {result['p95_ms']:>8} ms  "
+              f"({result['requests']} requests, concurrency {result['concurrency']})")
+
+    await async_db.disconnect()
+    db.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+"""Measure bulk listing import throughput (rows/sec) at different chunk sizes.
+
+Uses the same DB_* settings as the actions server and needs migration 008.
+Run from the project root:
+
+    python -m benchmarks.bench_ingest --rows 5000 --chunk-sizes 1,100,500,2000
+
+For each chunk size a synthetic NDJSON catalog is imported twice: the first
+pass inserts every listing, the second updates them in place through the
+listing_key upsert. Chunk size 1 approximates the old row-by-row inserts.
+Benchmark listings have keys starting with "bench-" and owners with phone
+numbers starting with 0198; they are removed after every run.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+
+from actions.database import db
+from actions.ingest import ListingImporter
+
+from benchmarks.seed_listings import AMENITIES, AREAS, OCCUPANCY_TYPES, PLACE_TYPES, PROPERTY_TYPES, TRANSPORT_TYPES
+
+BENCH_KEY_PREFIX = "bench-"
+BENCH_PHONE_PREFIX = "0198"
+
+
+def write_catalog(path, rows, seed_value=11):
+    rng = random.Random(seed_value)
+    with open(path, "w", encoding="utf-8") as handle:
+        for i in range(rows):
+            area, neighborhood, lat, lng = rng.choice(AREAS)
+            rent = rng.randrange(5000, 60000, 500)
+            listing = {
+                "listing_key": f"{BENCH_KEY_PREFIX}{i}",
+                "owner_phone": f"{BENCH_PHONE_PREFIX}{i // 20:07d}",
+                "owner_name": f"Bench Owner {i // 20}",
+                "title": f"Bench listing {i} in {neighborhood}",
+                "latitude": round(lat + rng.uniform(-0.02, 0.02), 6),
+                "longitude": round(lng + rng.uniform(-0.02, 0.02), 6),
+                "address": f"House {rng.randint(1, 200)}, {neighborhood}, {area}",
+                "area_name": area,
+                "neighborhood": neighborhood,
+                "property_type": rng.choice(PROPERTY_TYPES),
+                "occupancy_type": rng.choice(OCCUPANCY_TYPES),
+                "rent_amount": rent,
+                "security_deposit": rent * 2,
+                "furnished": rng.random() < 0.4,
+                "amenities": rng.sample(AMENITIES, rng.randint(2, 6)),
+                "nearby_places": [
+                    {"place_name": f"Place {j} near {i}", "place_type": rng.choice(PLACE_TYPES),
+                     "distance_meters": rng.randint(50, 2000)}
+                    for j in range(rng.randint(2, 5))
+                ],
+                "transportation": [
+                    {"transport_type": transport_type, "details": f"{transport_type} nearby"}
+                    for transport_type in rng.sample(TRANSPORT_TYPES, rng.randint(1, 3))
+                ],
+            }
+            handle.write(json.dumps(listing) + "\n")
+
+
+def cleanup():
+    with db.get_connection() as connection:
+        if connection is None:
+            raise SystemExit("Could not connect to the database; check the DB_* settings")
+        cursor = connection.cursor()
+        # Children go with ON DELETE CASCADE
+        cursor.execute("DELETE FROM properties WHERE listing_key LIKE %s", (BENCH_KEY_PREFIX + "%",))
+        cursor.execute("DELETE FROM users WHERE phone LIKE %s", (BENCH_PHONE_PREFIX + "%",))
+        cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--chunk-sizes", default="1,100,500,2000", help="comma-separated listings per transaction")
+    args = parser.parse_args()
+
+    handle, path = tempfile.mkstemp(suffix=".ndjson")
+    os.close(handle)
+    try:
+        write_catalog(path, args.rows)
+        cleanup()
+        print(f"{'chunk':>6} {'insert rows/s':>14} {'update rows/s':>14}")
+        for chunk_size in [int(size) for size in args.chunk_sizes.split(",")]:
+            importer = ListingImporter(db, chunk_size=chunk_size)
+            rates = []
+            for _ in ("insert", "update"):
+                report = importer.import_file(path)
+                if report is None:
+                    raise SystemExit("Could not connect to the database; check the DB_* settings")
+                if report["failed"] or report["invalid"]:
+                    raise SystemExit(f"Import failed: {report['failed']} failed, {report['invalid']} invalid")
+                rates.append(report["imported"] / report["seconds"])
+            print(f"{chunk_size:>6} {rates[0]:>14.0f} {rates[1]:>14.0f}")
+            cleanup()
+    finally:
+        os.remove(path)
+        db.disconnect()
+
+
+if __name__ == "__main__":
+    main()
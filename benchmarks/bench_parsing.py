@@ -0,0 +1,93 @@
+"""Check and time the budget and room-number parsers.
+
+Run from the project root:
+
+    python -m benchmarks.bench_parsing --iterations 20000
+
+The cases in tests/test_parsing.py are checked first (the run exits non-zero
+on a mismatch), then each parser is timed over the whole corpus next to the
+substring and first-digit-run code it replaced.
+"""
+import argparse
+import re
+import sys
+import timeit
+
+from actions.parsing import parse_budget, parse_room_number
+from tests.test_parsing import BUDGET_CASES, ROOM_CASES
+
+
+def legacy_budget(budget_str):
+    numbers = re.findall(r'\d+', str(budget_str))
+    return float(numbers[0]) if numbers else None
+
+
+def legacy_room(message):
+    message = message.lower()
+    if 'room 1' in message or 'first room' in message or message.strip() == '1':
+        return 1
+    elif 'room 2' in message or 'second room' in message or message.strip() == '2':
+        return 2
+    elif 'room 3' in message or 'third room' in message or message.strip() == '3':
+        return 3
+    elif '1' in message and not any(x in message for x in ['11', '12', '13', '21', '31']):
+        return 1
+    elif '2' in message and not any(x in message for x in ['12', '21', '22', '23', '32']):
+        return 2
+    elif '3' in message and not any(x in message for x in ['13', '23', '31', '32', '33']):
+        return 3
+    return None
+
+
+def check():
+    failures = []
+    for message, expected in BUDGET_CASES:
+        budget = parse_budget(message)
+        got = (budget.low, budget.high) if budget else None
+        if got != (tuple(float(v) for v in expected) if expected else None):
+            failures.append(f"parse_budget({message!r}) = {got}, expected {expected}")
+    for message, expected in ROOM_CASES:
+        got = parse_room_number(message)
+        if got != expected:
+            failures.append(f"parse_room_number({message!r}) = {got}, expected {expected}")
+    return failures
+
+
+def accuracy(function, cases, convert=lambda value: value):
+    correct = sum(1 for message, expected in cases if convert(function(message)) == expected)
+    return f"{correct}/{len(cases)}"
+
+
+def time_per_message(function, messages, iterations):
+    seconds = timeit.timeit(lambda: [function(message) for message in messages], number=iterations)
+    return seconds / (iterations * len(messages)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    failures = check()
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"{len(BUDGET_CASES) + len(ROOM_CASES) - len(failures)}/{len(BUDGET_CASES) + len(ROOM_CASES)} cases pass")
+
+    budget_messages = [message for message, _ in BUDGET_CASES]
+    room_messages = [message for message, _ in ROOM_CASES]
+    high_only = [(message, float(expected[1]) if expected else None) for message, expected in BUDGET_CASES]
+    rows = [
+        ("parse_budget", parse_budget, budget_messages, accuracy(lambda m: parse_budget(m).high if parse_budget(m) else None, high_only)),
+        ("legacy budget regex", legacy_budget, budget_messages, accuracy(legacy_budget, high_only)),
+        ("parse_room_number", parse_room_number, room_messages, accuracy(parse_room_number, ROOM_CASES)),
+        ("legacy room substrings", legacy_room, room_messages, accuracy(legacy_room, ROOM_CASES)),
+    ]
+    for name, function, messages, correct in rows:
+        print(f"{name:<24} {time_per_message(function, messages, args.iterations):>7.2f} us/message  correct {correct}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark relevance ranking over synthetic candidate sets.
+
+Does not need a database. Run from the project root:
+
+    python -m benchmarks.bench_ranking --sizes 10000,100000 --k 10
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from actions.ranking import (
+    AMENITY_BITS, OCCUPANCY_CODES, WEIGHTS, PRICE_TOLERANCE,
+    candidate_arrays, preference_bits, score, top_k,
+)
+
+AMENITY_NAMES = ['WiFi', 'AC', 'Parking', 'Security', 'Generator', 'Lift', 'Kitchen']
+OCCUPANCIES = list(OCCUPANCY_CODES)
+
+
+def synthetic_rows(count, seed=42):
+    rng = random.Random(seed)
+    now = datetime.now()
+    return [{
+        'id': i + 1,
+        'rent_amount': rng.randrange(5000, 60000, 500),
+        'amenities': rng.sample(AMENITY_NAMES, rng.randint(1, 5)),
+        'furnished': rng.random() < 0.4,
+        'occupancy_type': rng.choice(OCCUPANCIES),
+        'owner_rating': round(rng.uniform(3.0, 5.0), 2),
+        'featured': rng.random() < 0.05,
+        'updated_at': now - timedelta(days=rng.uniform(0, 180)),
+    } for i in range(count)]
+
+
+def python_rank(rows, budget, wanted, occupancy, k):
+    """Per-row reference implementation, for comparison only."""
+    now = datetime.now()
+    scored = []
+    for row in rows:
+        rent = float(row['rent_amount'])
+        over = max(rent - budget, 0) / (budget * PRICE_TOLERANCE)
+        total = WEIGHTS['price'] * min(max(1.0 - over, 0.0), 1.0)
+        have = {name.lower() for name in row['amenities']} | ({'furnished'} if row['furnished'] else set())
+        total += WEIGHTS['amenities'] * len(have & wanted) / len(wanted)
+        if row['occupancy_type'] == occupancy:
+            total += WEIGHTS['occupancy']
+        elif row['occupancy_type'] == 'mixed':
+            total += WEIGHTS['occupancy'] * 0.5
+        total += WEIGHTS['rating'] * row['owner_rating'] / 5.0
+        total += WEIGHTS['featured'] * (1.0 if row['featured'] else 0.0)
+        age_days = (now - row['updated_at']).total_seconds() / 86400
+        total += WEIGHTS['freshness'] * 2 ** (-age_days / 30.0)
+        scored.append((total, row['id']))
+    scored.sort(reverse=True)
+    return scored[:k]
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10000,100000')
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    budget = 15000
+    preferences = ['AC', 'WiFi', 'furnished']
+    wanted_bits = preference_bits(preferences)
+    wanted = {'ac', 'wifi', 'furnished'}
+    print(f"ranked preferences: {sorted(AMENITY_BITS)}; k={args.k}")
+
+    for size in (int(s) for s in args.sizes.split(',')):
+        rows = synthetic_rows(size)
+        build_s, arrays = timed(lambda: candidate_arrays(rows), 1)
+        score_s, _ = timed(lambda: top_k(score(arrays, budget, wanted_bits, 'bachelor'), args.k), args.repeat)
+        full_sort_s, _ = timed(lambda: np.argsort(-score(arrays, budget, wanted_bits, 'bachelor')), args.repeat)
+        python_s, _ = timed(lambda: python_rank(rows, budget, wanted, 'bachelor', args.k), 1)
+
+        print(f"{size:>7} candidates: "
+              f"arrays {build_s * 1000:8.2f} ms | "
+              f"score+top_k {score_s * 1000:7.2f} ms | "
+              f"score+full sort {full_sort_s * 1000:7.2f} ms | "
+              f"per-row python {python_s * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
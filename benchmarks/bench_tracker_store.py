@@ -0,0 +1,92 @@
+"""Check that tracker writes and loads stay flat over a long conversation.
+
+Needs Rasa installed and migrations 009 and 011. Run from the project root:
+
+    python -m benchmarks.bench_tracker_store --turns 500 \\
+        --url mysql+pymysql://root@localhost:3306/rasa_db
+
+Plays one long session of search turns (each sets a ten-room search_results
+slot) against CompactTrackerStore, loading the tracker before and saving it
+after every turn the way the Rasa server does. Every --every turns it prints
+the bytes the store wrote for the turn, the size of the same events as
+uncompressed JSON (what Rasa's SQL store writes, one row per event), and how
+long the load took. The benchmark conversation is deleted afterwards.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from rasa.shared.core.domain import Domain
+from rasa.shared.core.events import ActionExecuted, BotUttered, SlotSet, UserUttered
+
+from addons.tracker_store import CompactTrackerStore
+from benchmarks.seed_listings import AREAS
+
+
+def search_results(turn):
+    return [{
+        "id": turn * 10 + i,
+        "title": f"Room {i} in {AREAS[i % len(AREAS)][1]}",
+        "rent_amount": 10000 + 500 * i,
+        "area_name": AREAS[i % len(AREAS)][0],
+        "neighborhood": AREAS[i % len(AREAS)][1],
+        "amenities": ["WiFi", "AC", "Security"],
+        "nearby_places": [{"place_name": f"Place {j}", "place_type": "market", "distance_meters": 100 * j}
+                          for j in range(3)],
+    } for i in range(10)]
+
+
+def turn_events(turn):
+    area = AREAS[turn % len(AREAS)][1]
+    text = f"rooms in {area} under {10 + turn % 20}k"
+    return [
+        UserUttered(text, intent={"name": "search_rooms", "confidence": 0.97},
+                    entities=[{"entity": "location", "value": area}],
+                    parse_data={"text": text, "intent": {"name": "search_rooms", "confidence": 0.97},
+                                "entities": [{"entity": "location", "value": area}],
+                                "intent_ranking": [{"name": "search_rooms", "confidence": 0.97}]}),
+        ActionExecuted("action_search_rooms"),
+        SlotSet("location", area),
+        SlotSet("search_results", search_results(turn)),
+        BotUttered(f"Found 10 rooms in {area}."),
+        ActionExecuted("action_listen"),
+    ]
+
+
+async def run(args):
+    store = CompactTrackerStore(Domain.load(args.domain), host=args.url)
+    sender_id = f"bench-tracker-{uuid.uuid4().hex[:8]}"
+    await store.get_or_create_tracker(sender_id)
+
+    print(f"{'turn':>6} {'written B':>10} {'json B':>10} {'load ms':>8}")
+    try:
+        for turn in range(1, args.turns + 1):
+            started_at = time.perf_counter()
+            tracker = await store.retrieve(sender_id)
+            load_ms = (time.perf_counter() - started_at) * 1000
+            events = turn_events(turn)
+            for event in events:
+                tracker.update(event)
+            await store.save(tracker)
+            if turn % args.every == 0 or turn == 1:
+                json_bytes = sum(len(json.dumps(event.as_dict()).encode("utf-8")) for event in events)
+                print(f"{turn:>6} {store.last_write_bytes:>10} {json_bytes:>10} {load_ms:>8.1f}")
+    finally:
+        with store.engine.begin() as connection:
+            for table in ("tracker_event_deltas", "tracker_snapshots"):
+                connection.exec_driver_sql(f"DELETE FROM {table} WHERE sender_id = %s", (sender_id,))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--every", type=int, default=50, help="print a line every this many turns")
+    parser.add_argument("--url", default="mysql+pymysql://root@localhost:3306/rasa_db")
+    parser.add_argument("--domain", default="domain.yml")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
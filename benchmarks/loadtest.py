@@ -0,0 +1,291 @@
+"""Load-test the action server through its /webhook endpoint.
+
+Start the action server, seed listings, then run from the project root:
+
+    python -m benchmarks.seed_listings --rows 10000
+    python -m rasa_sdk --actions actions --port 5055
+    python -m benchmarks.loadtest --requests 500 --concurrency 50
+
+Each action is driven in its own phase with tracker payloads like the ones
+Rasa sends: searches first, then "show more" and room details using the
+slots the searches returned. For every phase the report has p50/p95/p99
+latency, throughput, errors and MySQL queries per request (the server's
+Questions counter before and after the phase, so keep other clients and
+ANALYTICS_ENABLED out of the way for exact numbers).
+
+Results are written as JSON under benchmarks/results/ together with the git
+commit and listing count; pass --compare with an earlier file to print the
+change against it. With QUERY_PROFILER=true and METRICS_PORT set on the action
+server, --queries-url http://localhost:9100/queries adds its query-shape report.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+import urllib.request
+from datetime import datetime
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from actions.database import db
+
+SEARCHES = [
+    ("Dhaka", "15000 taka"),
+    ("Dhanmondi", "20000"),
+    ("Uttara", "12000 taka"),
+    ("Gulshan", "30000"),
+    ("Mirpur", "10000"),
+    ("Chittagong", "20000 taka"),
+    ("ধানমন্ডি", "25000"),
+    ("near TSC", "15000"),
+]
+PREFERENCES = [None, ["AC"], ["WiFi"], ["parking", "security"], ["furnished"]]
+DETAIL_MESSAGES = ["room 1", "show me room 2", "details of the first room", "3"]
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def tracker_payload(action, sender_id, slots, text, intent):
+    """Request body for POST /webhook, shaped like Rasa's action call."""
+    return {
+        "next_action": action,
+        "sender_id": sender_id,
+        "tracker": {
+            "sender_id": sender_id,
+            "slots": slots,
+            "latest_message": {
+                "text": text,
+                "intent": {"name": intent, "confidence": 1.0},
+                "entities": [],
+            },
+            "latest_event_time": time.time(),
+            "followup_action": None,
+            "paused": False,
+            "events": [],
+            "latest_input_channel": "rest",
+            "active_loop": {},
+            "latest_action_name": "action_listen",
+        },
+        "domain": {},
+        "version": "3.6.0",
+    }
+
+
+def slots_after(slots, response):
+    """Apply the SlotSet events of an action response to a copy of `slots`."""
+    slots = dict(slots)
+    for event in response.get("events", []):
+        if event.get("event") == "slot":
+            slots[event["name"]] = event.get("value")
+    return slots
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return round(sorted_values[index] * 1000, 2)
+
+
+def question_count():
+    """Statements the MySQL server has executed so far, or None without a connection."""
+    with db.get_connection() as connection:
+        if connection is None:
+            return None
+        cursor = connection.cursor()
+        cursor.execute("SHOW GLOBAL STATUS LIKE 'Questions'")
+        row = cursor.fetchone()
+        cursor.close()
+        return int(row[1]) if row else None
+
+
+def listing_count():
+    with db.get_connection() as connection:
+        if connection is None:
+            return None
+        cursor = connection.cursor()
+        cursor.execute("SELECT COUNT(*) FROM properties")
+        count = cursor.fetchone()[0]
+        cursor.close()
+        return count
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_phase(session, url, name, payloads, concurrency):
+    """POST every payload with at most `concurrency` in flight; returns (summary, responses)."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(payload):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                async with session.post(url, json=payload) as response:
+                    body = await response.json(content_type=None)
+                    if response.status != 200:
+                        errors += 1
+                        return None
+            except Exception:
+                errors += 1
+                return None
+            finally:
+                latencies.append(time.perf_counter() - start)
+            return payload, body
+
+    # Probes run on a thread so their own statements don't overlap the phase
+    before = await asyncio.to_thread(question_count)
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(one(payload) for payload in payloads))
+    elapsed = time.perf_counter() - start
+    after = await asyncio.to_thread(question_count)
+
+    latencies.sort()
+    summary = {
+        "action": name,
+        "requests": len(payloads),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(payloads) / elapsed, 1) if elapsed else None,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        # The closing probe itself counts as one statement
+        "queries_per_request": round((after - before - 1) / len(payloads), 2)
+        if before is not None and after is not None and payloads else None,
+    }
+    return summary, [response for response in responses if response]
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    phases = []
+
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        # Warm up caches and pools so the first phase isn't penalised
+        location, budget = SEARCHES[0]
+        warmup = tracker_payload("action_search_rooms", "warmup", {"location": location, "budget": budget},
+                                 f"rooms in {location}", "search_rooms")
+        await run_phase(session, args.url, "warmup", [warmup] * args.concurrency, args.concurrency)
+
+        searches = []
+        for i in range(args.requests):
+            location, budget = rng.choice(SEARCHES)
+            slots = {"location": location, "budget": budget, "preferences": rng.choice(PREFERENCES)}
+            searches.append(tracker_payload("action_search_rooms", f"load-{i}", slots,
+                                            f"rooms in {location} under {budget}", "search_rooms"))
+        summary, responses = await run_phase(session, args.url, "action_search_rooms", searches, args.concurrency)
+        phases.append(summary)
+
+        # Follow-up turns reuse the slots each search returned
+        states = [(payload["sender_id"], slots_after(payload["tracker"]["slots"], body))
+                  for payload, body in responses]
+        states = [state for state in states if state[1].get("search_results")]
+        if not states:
+            print("No search returned results; is the database seeded?")
+            return phases
+
+        more = [tracker_payload("action_show_more_rooms", sender_id, slots, "show more", "show_more")
+                for sender_id, slots in states if slots.get("search_cursor")]
+        if more:
+            summary, _ = await run_phase(session, args.url, "action_show_more_rooms", more, args.concurrency)
+            phases.append(summary)
+
+        details = []
+        for i in range(args.requests):
+            sender_id, slots = states[i % len(states)]
+            details.append(tracker_payload("action_get_room_details", sender_id, slots,
+                                           rng.choice(DETAIL_MESSAGES), "ask_more_info"))
+        summary, _ = await run_phase(session, args.url, "action_get_room_details", details, args.concurrency)
+        phases.append(summary)
+
+    return phases
+
+
+def fetch_query_profile(url):
+    try:
+        with urllib.request.urlopen(url, timeout=10) as response:
+            return json.load(response)
+    except (OSError, ValueError) as e:
+        print(f"Could not read the query profile from {url}: {e}")
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {phase["action"]: phase for phase in json.load(f)["phases"]}
+    print(f"\nCompared with {baseline_path}:")
+    for phase in results["phases"]:
+        old = baseline.get(phase["action"])
+        if not old:
+            continue
+        changes = []
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "queries_per_request"):
+            if phase.get(metric) is not None and old.get(metric):
+                changes.append(f"{metric} {(phase[metric] - old[metric]) / old[metric]:+.1%}")
+        print(f"  {phase['action']:<26} " + "  ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:5055/webhook")
+    parser.add_argument("--requests", type=int, default=200, help="requests per action")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--queries-url", help="action server /queries endpoint to include in the results")
+    args = parser.parse_args()
+
+    if aiohttp is None:
+        raise SystemExit("aiohttp is required for the load test (it is installed with rasa)")
+
+    started_at = datetime.now()
+    results = {
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "listings": listing_count(),
+        "url": args.url,
+        "requests_per_action": args.requests,
+        "concurrency": args.concurrency,
+        "phases": asyncio.run(run(args)),
+    }
+    if args.queries_url:
+        results["query_profile"] = fetch_query_profile(args.queries_url)
+    db.disconnect()
+
+    for phase in results["phases"]:
+        print(f"{phase['action']:<26} {phase['throughput_rps']:>8} req/s  "
+              f"p50 {phase['p50_ms']:>8} ms  p95 {phase['p95_ms']:>8} ms  p99 {phase['p99_ms']:>8} ms  "
+              f"queries/req {phase['queries_per_request']}  errors {phase['errors']}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{started_at:%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Seed the configured MySQL database with synthetic listings for benchmarks.
+
+Uses the same DB_* settings as the actions server. Run from the project root
+after the base schema and migrations are imported:
+
+    python -m benchmarks.seed_listings --rows 10000
+    python -m benchmarks.seed_listings --reset      # remove synthetic rows
+
+Synthetic owners are created with phone numbers starting with 0199 and
+synthetic listings have titles starting with "Synthetic", so --reset only
+touches benchmark data. Run one seeder at a time; ids are assigned up front.
+
+The queries use MySQL features (JSON, spatial, generated columns), so there
+is no SQLite stand-in: point DB_NAME at a scratch database instead.
+"""
+import argparse
+import json
+import random
+import time
+
+from actions.database import db
+from actions.locations import location_key
+
+AREAS = [
+    # (area, neighborhood, latitude, longitude)
+    ("Dhaka", "Dhanmondi", 23.7465, 90.3760),
+    ("Dhaka", "Gulshan", 23.7925, 90.4078),
+    ("Dhaka", "Banani", 23.7937, 90.4040),
+    ("Dhaka", "Uttara", 23.8759, 90.3795),
+    ("Dhaka", "Mohammadpur", 23.7639, 90.3611),
+    ("Dhaka", "Mirpur", 23.8069, 90.3687),
+    ("Dhaka", "Motijheel", 23.7330, 90.4172),
+    ("Chittagong", "Agrabad", 22.3250, 91.8120),
+    ("Chittagong", "Nasirabad", 22.3664, 91.8240),
+    ("Sylhet", "Zindabazar", 24.8969, 91.8697),
+]
+PROPERTY_TYPES = ["single_room", "studio", "apartment", "flat"]
+OCCUPANCY_TYPES = ["bachelor", "family", "female_only", "male_only", "mixed"]
+AMENITIES = ["WiFi", "AC", "Parking", "Security", "Generator", "Lift", "Kitchen", "Balcony", "Fan"]
+PLACE_TYPES = ["restaurant", "hospital", "school", "university", "market", "mosque", "transport"]
+TRANSPORT_TYPES = ["bus", "metro", "rickshaw", "cng", "uber", "pathao"]
+
+SYNTHETIC_PHONE_PREFIX = "0199"
+SYNTHETIC_TITLE_PREFIX = "Synthetic"
+
+PROPERTY_INSERT = """
+INSERT INTO properties (
+    id, owner_id, title, description, latitude, longitude, address, area_name, neighborhood,
+    property_type, occupancy_type, rent_amount, security_deposit, furnished,
+    total_rooms, bathrooms, amenities, is_available, available_from, featured, area_key, neighborhood_key
+) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def _execute_many(cursor, query, rows, batch_size):
+    for start in range(0, len(rows), batch_size):
+        cursor.executemany(query, rows[start:start + batch_size])
+
+
+def seed(rows, batch_size=1000, seed_value=7):
+    rng = random.Random(seed_value)
+    with db.get_connection() as connection:
+        if connection is None:
+            raise SystemExit("Could not connect to the database; check the DB_* settings")
+        cursor = connection.cursor()
+
+        owner_count = max(rows // 20, 1)
+        owners = [(f"{SYNTHETIC_PHONE_PREFIX}{i:07d}", f"Synthetic Owner {i}", "owner", round(rng.uniform(3.0, 5.0), 2))
+                  for i in range(owner_count)]
+        cursor.executemany(
+            "INSERT IGNORE INTO users (phone, full_name, user_type, rating) VALUES (%s, %s, %s, %s)", owners
+        )
+        cursor.execute("SELECT id FROM users WHERE phone LIKE %s", (SYNTHETIC_PHONE_PREFIX + "%",))
+        owner_ids = [row[0] for row in cursor.fetchall()]
+
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM properties")
+        next_id = cursor.fetchone()[0] + 1
+
+        properties, nearby, transport = [], [], []
+        for i in range(rows):
+            property_id = next_id + i
+            area, neighborhood, lat, lng = rng.choice(AREAS)
+            lat += rng.uniform(-0.02, 0.02)
+            lng += rng.uniform(-0.02, 0.02)
+            rent = rng.randrange(5000, 60000, 500)
+            properties.append((
+                property_id, rng.choice(owner_ids),
+                f"{SYNTHETIC_TITLE_PREFIX} listing {property_id} in {neighborhood}",
+                f"Benchmark listing in {neighborhood}.",
+                round(lat, 6), round(lng, 6),
+                f"House {rng.randint(1, 200)}, Road {rng.randint(1, 30)}, {neighborhood}, {area}",
+                area, neighborhood,
+                rng.choice(PROPERTY_TYPES), rng.choice(OCCUPANCY_TYPES),
+                rent, rent * 2, rng.random() < 0.4,
+                rng.randint(1, 4), rng.randint(1, 3),
+                json.dumps(rng.sample(AMENITIES, rng.randint(2, 6))),
+                rng.random() < 0.9, "2025-01-01", rng.random() < 0.05,
+                location_key(area), location_key(neighborhood),
+            ))
+            for _ in range(rng.randint(2, 5)):
+                nearby.append((property_id, f"Place near {property_id}", rng.choice(PLACE_TYPES), rng.randint(50, 2000)))
+            for transport_type in rng.sample(TRANSPORT_TYPES, rng.randint(1, 3)):
+                transport.append((property_id, transport_type, f"{transport_type} nearby"))
+
+        start = time.perf_counter()
+        _execute_many(cursor, PROPERTY_INSERT, properties, batch_size)
+        _execute_many(cursor,
+                      "INSERT INTO nearby_places (property_id, place_name, place_type, distance_meters) VALUES (%s, %s, %s, %s)",
+                      nearby, batch_size)
+        _execute_many(cursor,
+                      "INSERT INTO transportation (property_id, transport_type, details) VALUES (%s, %s, %s)",
+                      transport, batch_size)
+        cursor.close()
+        elapsed = time.perf_counter() - start
+
+    db.invalidate_search_cache()
+    print(f"Seeded {rows} listings ({len(nearby)} nearby places, {len(transport)} transport options) in {elapsed:.1f}s")
+
+
+def reset():
+    with db.get_connection() as connection:
+        if connection is None:
+            raise SystemExit("Could not connect to the database; check the DB_* settings")
+        cursor = connection.cursor()
+        # Children go with ON DELETE CASCADE
+        cursor.execute("DELETE FROM properties WHERE title LIKE %s", (SYNTHETIC_TITLE_PREFIX + " %",))
+        removed = cursor.rowcount
+        cursor.execute("DELETE FROM users WHERE phone LIKE %s", (SYNTHETIC_PHONE_PREFIX + "%",))
+        cursor.close()
+    db.invalidate_search_cache()
+    print(f"Removed {removed} synthetic listings")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000, help="listings to add (e.g. 1000, 10000, 100000)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--reset", action="store_true", help="remove synthetic listings and owners")
+    args = parser.parse_args()
+
+    if args.reset:
+        reset()
+    else:
+        seed(args.rows, args.batch_size)
+    db.disconnect()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+-- Migration 001: indexed location matching
+-- Replaces the leading-wildcard LIKE on area_name/neighborhood with
+-- normalized key columns that searches can match through an index.
+
+USE rasa_db;
+
+-- Lowercased, trimmed copies of the location columns, kept in sync by MySQL
+ALTER TABLE properties
+    ADD COLUMN area_key VARCHAR(100) AS (LOWER(TRIM(area_name))) STORED,
+    ADD COLUMN neighborhood_key VARCHAR(100) AS (LOWER(TRIM(neighborhood))) STORED;
+
+-- Searches match these with LIKE 'key%' (prefix only), which is a range scan
+ALTER TABLE properties ADD INDEX idx_area_key (area_key, is_available);
+ALTER TABLE properties ADD INDEX idx_neighborhood_key (neighborhood_key, is_available);
+
+-- Alternative spellings (Bangla, transliterations) mapped to a location key.
+-- Aliases are stored normalized: lowercase, no punctuation or numbers.
+CREATE TABLE location_aliases (
+    alias VARCHAR(100) PRIMARY KEY,
+    location_key VARCHAR(100) NOT NULL
+) DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_bin;
+
+ALTER TABLE location_aliases ADD INDEX idx_location_key (location_key);
+
+INSERT INTO location_aliases (alias, location_key) VALUES
+('ঢাকা', 'dhaka'),
+('dacca', 'dhaka'),
+('daka', 'dhaka'),
+('ধানমন্ডি', 'dhanmondi'),
+('ধানমণ্ডি', 'dhanmondi'),
+('dhanmondhi', 'dhanmondi'),
+('danmondi', 'dhanmondi'),
+('dhanmandi', 'dhanmondi'),
+('গুলশান', 'gulshan'),
+('gulshon', 'gulshan'),
+('বনানী', 'banani'),
+('উত্তরা', 'uttara'),
+('uttora', 'uttara'),
+('মোহাম্মদপুর', 'mohammadpur'),
+('mohammedpur', 'mohammadpur'),
+('muhammadpur', 'mohammadpur'),
+('mohammodpur', 'mohammadpur'),
+('মিরপুর', 'mirpur'),
+('চট্টগ্রাম', 'chittagong'),
+('chattogram', 'chittagong'),
+('ctg', 'chittagong'),
+('chittagang', 'chittagong'),
+('আগ্রাবাদ', 'agrabad'),
+('সিলেট', 'sylhet');
+
+SELECT 'Migration 001 applied' as status;
@@ -0,0 +1,77 @@
+-- Migration 002: normalized amenity index
+-- Amenity preference filters join through property_amenities instead of
+-- running JSON_SEARCH over every row. The amenities JSON column stays the
+-- source of truth; triggers keep the index tables in sync with it.
+
+USE rasa_db;
+
+CREATE TABLE amenities (
+    id INT PRIMARY KEY AUTO_INCREMENT,
+    -- Lowercase, alphanumeric only: 'Wi-Fi' and 'WiFi' both become 'wifi'
+    amenity_key VARCHAR(100) NOT NULL UNIQUE,
+    name VARCHAR(100) NOT NULL
+);
+
+CREATE TABLE property_amenities (
+    property_id INT NOT NULL,
+    amenity_id INT NOT NULL,
+    PRIMARY KEY (property_id, amenity_id),
+    FOREIGN KEY (property_id) REFERENCES properties(id) ON DELETE CASCADE,
+    FOREIGN KEY (amenity_id) REFERENCES amenities(id) ON DELETE CASCADE
+);
+
+-- Lets amenity filters find matching properties without touching properties
+ALTER TABLE property_amenities ADD INDEX idx_amenity_property (amenity_id, property_id);
+
+-- Backfill from the existing JSON column
+INSERT IGNORE INTO amenities (amenity_key, name)
+SELECT LOWER(REGEXP_REPLACE(jt.name, '[^A-Za-z0-9]', '')), jt.name
+FROM properties p,
+     JSON_TABLE(p.amenities, '$[*]' COLUMNS (name VARCHAR(100) PATH '$')) jt;
+
+INSERT IGNORE INTO property_amenities (property_id, amenity_id)
+SELECT p.id, a.id
+FROM properties p,
+     JSON_TABLE(p.amenities, '$[*]' COLUMNS (name VARCHAR(100) PATH '$')) jt
+JOIN amenities a ON a.amenity_key = LOWER(REGEXP_REPLACE(jt.name, '[^A-Za-z0-9]', ''));
+
+-- Keep property_amenities in sync with properties.amenities
+DELIMITER $$
+
+CREATE TRIGGER trg_properties_amenities_insert
+AFTER INSERT ON properties
+FOR EACH ROW
+BEGIN
+    INSERT IGNORE INTO amenities (amenity_key, name)
+    SELECT LOWER(REGEXP_REPLACE(jt.name, '[^A-Za-z0-9]', '')), jt.name
+    FROM JSON_TABLE(NEW.amenities, '$[*]' COLUMNS (name VARCHAR(100) PATH '$')) jt;
+
+    INSERT IGNORE INTO property_amenities (property_id, amenity_id)
+    SELECT NEW.id, a.id
+    FROM JSON_TABLE(NEW.amenities, '$[*]' COLUMNS (name VARCHAR(100) PATH '$')) jt
+    JOIN amenities a ON a.amenity_key = LOWER(REGEXP_REPLACE(jt.name, '[^A-Za-z0-9]', ''));
+END$$
+
+CREATE TRIGGER trg_properties_amenities_update
+AFTER UPDATE ON properties
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.amenities <=> OLD.amenities) THEN
+        DELETE FROM property_amenities WHERE property_id = NEW.id;
+
+        INSERT IGNORE INTO amenities (amenity_key, name)
+        SELECT LOWER(REGEXP_REPLACE(jt.name, '[^A-Za-z0-9]', '')), jt.name
+        FROM JSON_TABLE(NEW.amenities, '$[*]' COLUMNS (name VARCHAR(100) PATH '$')) jt;
+
+        INSERT IGNORE INTO property_amenities (property_id, amenity_id)
+        SELECT NEW.id, a.id
+        FROM JSON_TABLE(NEW.amenities, '$[*]' COLUMNS (name VARCHAR(100) PATH '$')) jt
+        JOIN amenities a ON a.amenity_key = LOWER(REGEXP_REPLACE(jt.name, '[^A-Za-z0-9]', ''));
+    END IF;
+END$$
+
+DELIMITER ;
+
+SELECT 'Migration 002 applied' as status;
+SELECT COUNT(*) as total_amenities FROM amenities;
+SELECT COUNT(*) as total_property_amenities FROM property_amenities;
@@ -0,0 +1,9 @@
+-- Migration 003: keyset pagination index
+-- Searches page with ORDER BY rent_amount, id and continue from the last
+-- (rent_amount, id) shown, so every page is a range scan on this index.
+
+USE rasa_db;
+
+ALTER TABLE properties ADD INDEX idx_available_rent (is_available, rent_amount, id);
+
+SELECT 'Migration 003 applied' as status;
@@ -0,0 +1,36 @@
+-- Migration 004: spatial index for radius search
+-- geo_point mirrors latitude/longitude as a POINT(longitude, latitude) with
+-- SRID 0 so MySQL will use the SPATIAL index for bounding-box prefilters.
+
+USE rasa_db;
+
+ALTER TABLE properties ADD COLUMN geo_point POINT NULL;
+
+UPDATE properties SET geo_point = POINT(longitude, latitude);
+
+-- SPATIAL indexes need NOT NULL, and MySQL 8 only uses them on columns with an SRID
+ALTER TABLE properties MODIFY geo_point POINT NOT NULL SRID 0;
+ALTER TABLE properties ADD SPATIAL INDEX idx_geo_point (geo_point);
+
+-- Keep geo_point in sync with the coordinate columns
+DELIMITER $$
+
+CREATE TRIGGER trg_properties_geo_point_insert
+BEFORE INSERT ON properties
+FOR EACH ROW
+BEGIN
+    SET NEW.geo_point = POINT(NEW.longitude, NEW.latitude);
+END$$
+
+CREATE TRIGGER trg_properties_geo_point_update
+BEFORE UPDATE ON properties
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.latitude <=> OLD.latitude AND NEW.longitude <=> OLD.longitude) THEN
+        SET NEW.geo_point = POINT(NEW.longitude, NEW.latitude);
+    END IF;
+END$$
+
+DELIMITER ;
+
+SELECT 'Migration 004 applied' as status;
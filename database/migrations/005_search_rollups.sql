@@ -0,0 +1,47 @@
+-- Migration 005: search_analytics rollups
+-- Hourly and daily search counts keyed by location, budget bucket and
+-- preference, maintained incrementally by actions/rollups.py so demand
+-- questions read a few hundred rollup rows instead of the raw table.
+
+USE rasa_db;
+
+-- preference_key '' holds one count per search; rows with a preference key
+-- (ac, wifi, ...) count the searches that asked for it, so summing every
+-- preference_key would count multi-preference searches more than once.
+-- budget_bucket is the bucket's lower bound, -1 when the search had no budget.
+CREATE TABLE search_rollup_hourly (
+    bucket_start DATETIME NOT NULL,
+    location_key VARCHAR(100) NOT NULL DEFAULT '',
+    budget_bucket INT NOT NULL DEFAULT -1,
+    preference_key VARCHAR(50) NOT NULL DEFAULT '',
+    searches INT NOT NULL DEFAULT 0,
+    zero_results INT NOT NULL DEFAULT 0,
+    results_total BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket_start, location_key, budget_bucket, preference_key)
+) DEFAULT CHARSET=utf8mb4;
+
+ALTER TABLE search_rollup_hourly ADD INDEX idx_location_bucket (location_key, bucket_start);
+
+CREATE TABLE search_rollup_daily (
+    bucket_date DATE NOT NULL,
+    location_key VARCHAR(100) NOT NULL DEFAULT '',
+    budget_bucket INT NOT NULL DEFAULT -1,
+    preference_key VARCHAR(50) NOT NULL DEFAULT '',
+    searches INT NOT NULL DEFAULT 0,
+    zero_results INT NOT NULL DEFAULT 0,
+    results_total BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket_date, location_key, budget_bucket, preference_key)
+) DEFAULT CHARSET=utf8mb4;
+
+ALTER TABLE search_rollup_daily ADD INDEX idx_location_bucket (location_key, bucket_date);
+
+-- Last raw row folded into the rollups, per job
+CREATE TABLE rollup_watermarks (
+    job_name VARCHAR(50) PRIMARY KEY,
+    last_id BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+INSERT INTO rollup_watermarks (job_name, last_id) VALUES ('search_analytics', 0);
+
+SELECT 'Migration 005 applied' as status;
@@ -0,0 +1,37 @@
+-- Migration 006: monthly partitions for the append-only log tables
+-- bot_conversations and search_analytics are partitioned by month on
+-- created_at so old months can be archived and dropped as a whole
+-- partition (actions/retention.py) instead of with large DELETEs.
+--
+-- MySQL requires the partitioning column in every unique key, so the
+-- primary keys become (id, created_at); id stays AUTO_INCREMENT. RANGE
+-- partitioning on a TIMESTAMP has to go through UNIX_TIMESTAMP().
+--
+-- Everything starts in p_future; the retention job splits it into one
+-- partition per month (pYYYYMM) and keeps a few months ahead.
+
+USE rasa_db;
+
+ALTER TABLE bot_conversations
+    MODIFY created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (id, created_at);
+
+ALTER TABLE bot_conversations ADD INDEX idx_created (created_at);
+
+ALTER TABLE bot_conversations
+    PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+        PARTITION p_future VALUES LESS THAN MAXVALUE
+    );
+
+ALTER TABLE search_analytics
+    MODIFY created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (id, created_at);
+
+ALTER TABLE search_analytics
+    PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+        PARTITION p_future VALUES LESS THAN MAXVALUE
+    );
+
+SELECT 'Migration 006 applied' as status;
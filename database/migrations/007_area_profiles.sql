@@ -0,0 +1,35 @@
+-- Migration 007: precomputed area profiles
+-- One row per area and per neighborhood with listing, nearby-place and
+-- transport statistics, rebuilt by actions/area_profiles.py, so area
+-- questions are answered with a single primary-key lookup.
+
+USE rasa_db;
+
+-- location_key matches properties.area_key / neighborhood_key; a key used as
+-- both has one row per level, and lookups prefer the neighborhood row.
+-- place_counts:    {"market": 4, ...} distinct places by type
+-- nearest_places:  {"market": [{"place_name": ..., "distance_meters": ...}], ...}
+-- transport_modes: {"bus": 12, ...} listings served by each mode
+CREATE TABLE area_profiles (
+    location_key VARCHAR(100) NOT NULL,
+    level ENUM('neighborhood', 'area') NOT NULL,
+    area_key VARCHAR(100) NOT NULL,
+    area_name VARCHAR(100) NOT NULL,
+    neighborhood VARCHAR(100),
+    listings INT NOT NULL DEFAULT 0,
+    available_listings INT NOT NULL DEFAULT 0,
+    min_rent DECIMAL(10,2),
+    avg_rent DECIMAL(10,2),
+    place_counts JSON,
+    nearest_places JSON,
+    transport_modes JSON,
+    source_updated_at TIMESTAMP NULL,
+    refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (location_key, level)
+) DEFAULT CHARSET=utf8mb4;
+
+-- Refreshes replace every profile of the areas that changed
+ALTER TABLE area_profiles ADD INDEX idx_area_key (area_key);
+ALTER TABLE area_profiles ADD INDEX idx_source_updated (source_updated_at);
+
+SELECT 'Migration 007 applied' as status;
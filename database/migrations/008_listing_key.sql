@@ -0,0 +1,11 @@
+-- Migration 008: stable listing keys for bulk imports
+-- listing_key is the partner's own id for a listing, so re-importing a
+-- catalog updates the existing rows (python -m actions.ingest) instead of
+-- adding duplicates. Listings entered by hand keep it NULL.
+
+USE rasa_db;
+
+ALTER TABLE properties ADD COLUMN listing_key VARCHAR(100) NULL;
+ALTER TABLE properties ADD UNIQUE INDEX idx_listing_key (listing_key);
+
+SELECT 'Migration 008 applied' as status;
@@ -0,0 +1,35 @@
+-- Migration 009: tables for the compact tracker store
+-- addons/tracker_store.py (endpoints.yml: type: addons.tracker_store.CompactTrackerStore)
+-- keeps each conversation as zlib-compressed event deltas plus one snapshot
+-- of the current session, instead of one JSON row per event in Rasa's
+-- `events` table. A turn writes one delta row; loading a conversation reads
+-- the snapshot and the deltas saved since it.
+
+USE rasa_db;
+
+-- One row per conversation. snapshot holds the current session's events
+-- (compacted past max_session_events); view_count is how many events a load
+-- returns, and snapshot_offset how many events had been saved when it was taken.
+CREATE TABLE IF NOT EXISTS tracker_snapshots (
+    sender_id VARCHAR(255) PRIMARY KEY,
+    snapshot MEDIUMBLOB NOT NULL,
+    snapshot_offset INT NOT NULL,
+    view_count INT NOT NULL,
+    event_count INT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_updated (updated_at)
+);
+
+-- Events saved by each turn; first_event is the position in the whole conversation
+CREATE TABLE IF NOT EXISTS tracker_event_deltas (
+    id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    sender_id VARCHAR(255) NOT NULL,
+    first_event INT NOT NULL,
+    event_count INT NOT NULL,
+    payload MEDIUMBLOB NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_sender_event (sender_id, first_event),
+    INDEX idx_created (created_at)
+);
+
+SELECT 'Migration 009 applied' as status;
@@ -0,0 +1,31 @@
+-- Migration 010: location keys written by the application
+-- area_key/neighborhood_key were LOWER(TRIM()) of the raw columns, while
+-- searches normalize and alias-map their input first, so "Sector 7, Uttara"
+-- or "Dhanmondhi" were never found by a search for uttara or dhanmondi.
+-- The keys are now computed with actions.locations.location_key() (same
+-- normalization and aliases, known place names first) by the importer and by
+-- `python -m actions.locations`, which re-keys every listing. Searches still
+-- match them with LIKE 'key%' (prefix only), so idx_area_key and
+-- idx_neighborhood_key keep working.
+
+USE rasa_db;
+
+-- Stored generated columns become plain columns; existing values and indexes are kept
+ALTER TABLE properties
+    MODIFY COLUMN area_key VARCHAR(100) NULL,
+    MODIFY COLUMN neighborhood_key VARCHAR(100) NULL;
+
+-- Rows inserted or moved without keys (by hand, phpMyAdmin) get the old rough key
+-- until `python -m actions.locations` is run
+CREATE TRIGGER properties_location_keys_insert BEFORE INSERT ON properties FOR EACH ROW
+SET NEW.area_key = COALESCE(NEW.area_key, LOWER(TRIM(NEW.area_name))),
+    NEW.neighborhood_key = COALESCE(NEW.neighborhood_key, LOWER(TRIM(NEW.neighborhood)));
+
+CREATE TRIGGER properties_location_keys_update BEFORE UPDATE ON properties FOR EACH ROW
+SET NEW.area_key = IF(NEW.area_name <=> OLD.area_name OR NOT (NEW.area_key <=> OLD.area_key),
+                      NEW.area_key, LOWER(TRIM(NEW.area_name))),
+    NEW.neighborhood_key = IF(NEW.neighborhood <=> OLD.neighborhood
+                              OR NOT (NEW.neighborhood_key <=> OLD.neighborhood_key),
+                              NEW.neighborhood_key, LOWER(TRIM(NEW.neighborhood)));
+
+SELECT 'Migration 010 applied' as status;
@@ -0,0 +1,11 @@
+-- Migration 011: last saved event per conversation for the compact tracker store
+-- addons/tracker_store.py finds a tracker's unsaved events from the last event
+-- it loaded or saved. last_timestamp is the fallback for trackers the store
+-- didn't load itself: events newer than it are unsaved. Existing rows get it on
+-- their next save.
+
+USE rasa_db;
+
+ALTER TABLE tracker_snapshots ADD COLUMN last_timestamp DOUBLE NULL AFTER event_count;
+
+SELECT 'Migration 011 applied' as status;
@@ -0,0 +1,53 @@
+-- Migration 012: change log for area profile refreshes
+-- Refreshes used to pick areas from properties.updated_at, which misses
+-- listings deleted outright, the area a listing moved away from, and edits
+-- that only touch nearby_places or transportation. These triggers record
+-- every area whose profile is out of date; `python -m actions.area_profiles`
+-- recomputes them and clears their rows. Run it once with --full afterwards.
+
+USE rasa_db;
+
+CREATE TABLE area_profile_changes (
+    area_key VARCHAR(100) PRIMARY KEY,
+    changed_at TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)
+) DEFAULT CHARSET=utf8mb4;
+
+CREATE TRIGGER properties_area_changes_insert AFTER INSERT ON properties FOR EACH ROW
+INSERT INTO area_profile_changes (area_key) VALUES (NEW.area_key)
+ON DUPLICATE KEY UPDATE changed_at = CURRENT_TIMESTAMP(6);
+
+-- Both areas when a listing moves
+CREATE TRIGGER properties_area_changes_update AFTER UPDATE ON properties FOR EACH ROW
+INSERT INTO area_profile_changes (area_key) VALUES (OLD.area_key), (NEW.area_key)
+ON DUPLICATE KEY UPDATE changed_at = CURRENT_TIMESTAMP(6);
+
+-- Also covers nearby_places/transportation rows removed by ON DELETE CASCADE, which fire no triggers
+CREATE TRIGGER properties_area_changes_delete AFTER DELETE ON properties FOR EACH ROW
+INSERT INTO area_profile_changes (area_key) VALUES (OLD.area_key)
+ON DUPLICATE KEY UPDATE changed_at = CURRENT_TIMESTAMP(6);
+
+CREATE TRIGGER nearby_places_area_changes_insert AFTER INSERT ON nearby_places FOR EACH ROW
+INSERT INTO area_profile_changes (area_key) SELECT area_key FROM properties WHERE id = NEW.property_id
+ON DUPLICATE KEY UPDATE changed_at = CURRENT_TIMESTAMP(6);
+
+CREATE TRIGGER nearby_places_area_changes_update AFTER UPDATE ON nearby_places FOR EACH ROW
+INSERT INTO area_profile_changes (area_key) SELECT area_key FROM properties WHERE id IN (OLD.property_id, NEW.property_id)
+ON DUPLICATE KEY UPDATE changed_at = CURRENT_TIMESTAMP(6);
+
+CREATE TRIGGER nearby_places_area_changes_delete AFTER DELETE ON nearby_places FOR EACH ROW
+INSERT INTO area_profile_changes (area_key) SELECT area_key FROM properties WHERE id = OLD.property_id
+ON DUPLICATE KEY UPDATE changed_at = CURRENT_TIMESTAMP(6);
+
+CREATE TRIGGER transportation_area_changes_insert AFTER INSERT ON transportation FOR EACH ROW
+INSERT INTO area_profile_changes (area_key) SELECT area_key FROM properties WHERE id = NEW.property_id
+ON DUPLICATE KEY UPDATE changed_at = CURRENT_TIMESTAMP(6);
+
+CREATE TRIGGER transportation_area_changes_update AFTER UPDATE ON transportation FOR EACH ROW
+INSERT INTO area_profile_changes (area_key) SELECT area_key FROM properties WHERE id IN (OLD.property_id, NEW.property_id)
+ON DUPLICATE KEY UPDATE changed_at = CURRENT_TIMESTAMP(6);
+
+CREATE TRIGGER transportation_area_changes_delete AFTER DELETE ON transportation FOR EACH ROW
+INSERT INTO area_profile_changes (area_key) SELECT area_key FROM properties WHERE id = OLD.property_id
+ON DUPLICATE KEY UPDATE changed_at = CURRENT_TIMESTAMP(6);
+
+SELECT 'Migration 012 applied' as status;
@@ -0,0 +1,12 @@
+-- Migration 013: search_analytics records the results shown, not a total
+-- Searches fetch one page plus one extra row, so the value logged per search
+-- is at most SEARCH_PAGE_SIZE + 1 (the extra row only says there are more).
+-- It is still exact for zero-result searches. The rollups' results_total is
+-- the sum of this value, not of every matching listing.
+
+USE rasa_db;
+
+ALTER TABLE search_analytics CHANGE COLUMN results_count results_shown INT
+    COMMENT 'Rows fetched for the first page, at most SEARCH_PAGE_SIZE + 1';
+
+SELECT 'Migration 013 applied' as status;
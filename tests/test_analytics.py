@@ -0,0 +1,44 @@
+import pytest
+
+pytest.importorskip('mysql.connector')
+pytest.importorskip('dotenv')
+pytest.importorskip('numpy')
+
+from actions.analytics import AnalyticsWriter  # noqa: E402
+
+
+class FlakyDatabase:
+    """Raises on the first search batch, then writes everything."""
+
+    def __init__(self):
+        self.calls = 0
+        self.searches = []
+        self.conversations = []
+
+    def insert_search_analytics_batch(self, rows):
+        self.calls += 1
+        if self.calls == 1:
+            raise RuntimeError('pool checkout failed')
+        self.searches.extend(rows)
+        return True
+
+    def insert_conversations_batch(self, rows):
+        self.conversations.extend(rows)
+        return True
+
+
+def test_worker_survives_a_failing_batch(monkeypatch):
+    monkeypatch.setenv('ANALYTICS_BATCH_SIZE', '1')
+    monkeypatch.setenv('ANALYTICS_FLUSH_INTERVAL', '0.05')
+    database = FlakyDatabase()
+    writer = AnalyticsWriter(database)
+    writer.enabled = True
+
+    writer.log_search_analytics('u1', 'dhanmondi', 15000, None, 3)
+    writer.log_search_analytics('u1', 'uttara', 12000, None, 0)
+    writer.log_conversation('u1', 's1', 'hi', 'hello', 'greet', 0.9, [])
+    writer.shutdown()
+
+    assert writer.stats() == {'queued': 0, 'written': 2, 'failed': 1, 'dropped': 0}
+    assert [row[1] for row in database.searches] == ['uttara']
+    assert len(database.conversations) == 1
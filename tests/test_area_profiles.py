@@ -0,0 +1,72 @@
+import pytest
+
+pytest.importorskip('mysql.connector')
+pytest.importorskip('dotenv')
+pytest.importorskip('numpy')
+
+from actions.area_profiles import AreaProfileBuilder  # noqa: E402
+from actions.database import area_profile_keys  # noqa: E402
+from actions.locations import location_key  # noqa: E402
+
+
+class FakeCursor:
+    """Answers the builder's three row queries from lists, recording the parameters."""
+
+    def __init__(self, properties, places=(), transport=()):
+        self.rows = {'nearby_places': list(places), 'transportation': list(transport), 'properties': properties}
+        self.executed = []
+        self.result = []
+
+    def execute(self, query, params=()):
+        self.executed.append((query, params))
+        table = next(name for name in ('nearby_places', 'transportation', 'properties') if name in query)
+        self.result = self.rows[table]
+
+    def fetchall(self):
+        return self.result
+
+
+def listing(area_key, neighborhood_key, rent, available=True):
+    return {'area_key': area_key, 'neighborhood_key': neighborhood_key, 'area_name': area_key.title(),
+            'neighborhood': neighborhood_key.title() if neighborhood_key else None,
+            'is_available': available, 'rent_amount': rent, 'updated_at': None}
+
+
+def by_key(profiles):
+    return {(profile.location_key, profile.level): profile.values() for profile in profiles}
+
+
+def test_shared_neighborhood_key_gets_one_profile():
+    cursor = FakeCursor([
+        listing('dhaka', 'new market', 10000),
+        listing('dhaka', 'new market', 12000),
+        listing('chittagong', 'new market', 8000),
+    ])
+    profiles = by_key(AreaProfileBuilder(None)._build(cursor, None, None))
+
+    assert set(profiles) == {('dhaka', 'area'), ('chittagong', 'area'), ('new market', 'neighborhood')}
+    neighborhood = profiles[('new market', 'neighborhood')]
+    assert neighborhood[2] == 'dhaka'      # filed under the area with most listings
+    assert neighborhood[5] == 3            # listings from both areas
+
+
+def test_incremental_build_only_rebuilds_requested_keys():
+    cursor = FakeCursor([
+        listing('dhaka', 'new market', 10000),
+        listing('chittagong', 'new market', 8000),
+        listing('chittagong', 'agrabad', 9000),
+    ])
+    profiles = by_key(AreaProfileBuilder(None)._build(cursor, ['dhaka'], ['new market']))
+
+    assert set(profiles) == {('dhaka', 'area'), ('new market', 'neighborhood')}
+    assert profiles[('dhaka', 'area')][5] == 1
+    assert profiles[('new market', 'neighborhood')][5] == 2
+    query, params = cursor.executed[0]
+    assert 'OR p.neighborhood_key IN' in query and params == ('dhaka', 'new market')
+
+
+def test_profile_lookup_uses_stored_location_key():
+    stored, alias = area_profile_keys('  Sector 7, Uttara ')
+    assert stored == location_key('Sector 7, Uttara')
+    assert stored != 'sector 7, uttara'
+    assert alias
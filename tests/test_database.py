@@ -0,0 +1,102 @@
+import pytest
+
+pytest.importorskip('mysql.connector')
+pytest.importorskip('dotenv')
+pytest.importorskip('numpy')
+
+from actions import database  # noqa: E402
+
+
+def test_order_by_ids_skips_missing_and_repeated_ids():
+    rows = [{'id': 3}, {'id': 1}]
+    assert database.order_by_ids(rows, [1, 2, 3, 1]) == [{'id': 1}, {'id': 3}]
+
+
+def test_order_by_ids_keeps_positions_of_missing_listings():
+    rows = [{'id': 3}, {'id': 1}]
+    assert database.order_by_ids(rows, [1, 2, 3], keep_missing=True) == [{'id': 1}, None, {'id': 3}]
+
+
+def test_invalidate_search_cache_uses_stored_location_keys():
+    database.search_cache.clear()
+    for location in ('uttara', 'dhanmondi', ''):
+        database.search_cache.set((location, None, (), None, 10), [])
+
+    database.db.invalidate_search_cache('Dhaka', 'Sector 7, Uttara')
+    assert database.search_cache.get(('uttara', None, (), None, 10))[0] is False
+    assert database.search_cache.get(('', None, (), None, 10))[0] is False
+    assert database.search_cache.get(('dhanmondi', None, (), None, 10))[0] is True
+
+
+def test_candidate_query_limits_by_relevance():
+    query, params = database.build_candidate_query('dhanmondi', 15000, ('wifi', 'furnished'), 'bachelor', limit=50)
+    assert query.count('%s') == len(params)
+    assert 'ORDER BY' in query and 'DESC, p.rent_amount, p.id LIMIT %s' in query
+    assert params[-1] == 50
+    assert 'bachelor' in params and 'wifi' in params
+
+
+def test_relevance_order_skips_unused_signals():
+    relevance, params = database.relevance_order()
+    assert 'rent_amount' not in relevance and 'property_amenities' not in relevance
+    assert relevance.count('%s') == len(params)
+
+
+def test_relevance_order_normalizes_nlu_occupancy():
+    relevance, params = database.relevance_order(occupancy='Female')
+    assert 'p.occupancy_type' in relevance and 'female_only' in params
+    assert 'p.occupancy_type' not in database.relevance_order(occupancy='anyone')[0]
+
+
+class DeadSocket:
+    """Raw connection whose server went away: every round trip fails."""
+
+    def __init__(self):
+        self.disconnected = False
+
+    def ping(self, **kwargs):
+        raise database.Error('ping on dead socket')
+
+    def reset_session(self):
+        raise database.Error('reset on dead socket')
+
+    def disconnect(self):
+        self.disconnected = True
+
+
+class FakePool:
+    reset_session = True
+
+    def __init__(self):
+        self.returned = []
+        self.raw = DeadSocket()
+
+    def get_connection(self):
+        from mysql.connector.pooling import PooledMySQLConnection
+        # Skips the constructor's type checks; close() and attribute proxying are the real ones
+        connection = PooledMySQLConnection.__new__(PooledMySQLConnection)
+        connection._cnx_pool, connection._cnx = self, self.raw
+        return connection
+
+    def add_connection(self, cnx):
+        self.returned.append(cnx)
+
+
+def test_dead_pooled_connection_is_discarded_without_raising():
+    connection = database.DatabaseConnection()
+    connection.pool = FakePool()
+    connection.pool_timeout = 0
+    connection.retry_backoff = 0
+
+    with connection.get_connection() as checked_out:
+        assert checked_out is None
+    # The slot goes back disconnected, so the pool reconnects it on its next checkout
+    assert connection.pool.raw.disconnected
+    assert connection.pool.returned == [connection.pool.raw]
+
+
+def test_failed_session_reset_on_release_does_not_raise():
+    connection = database.DatabaseConnection()
+    pool = FakePool()
+    connection._release(pool.get_connection())
+    assert pool.returned == [pool.raw]
@@ -0,0 +1,34 @@
+import pytest
+
+pytest.importorskip('mysql.connector')
+pytest.importorskip('dotenv')
+pytest.importorskip('numpy')
+
+from actions import ingest  # noqa: E402
+
+LISTING = {
+    'listing_key': 'p-1', 'owner_phone': '01711111111', 'owner_name': 'Owner', 'title': 'Room',
+    'latitude': '23.74', 'longitude': '90.37', 'address': 'Road 5', 'area_name': 'Dhaka',
+    'neighborhood': 'Dhanmondi', 'property_type': 'Single_Room', 'occupancy_type': 'bachelor',
+    'rent_amount': '12000', 'amenities': 'WiFi|AC',
+}
+
+
+def test_property_upsert_uses_row_alias():
+    assert 'VALUES(' not in ingest.PROPERTY_UPSERT
+    assert 'AS new' in ingest.PROPERTY_UPSERT
+    assert 'rent_amount = new.rent_amount' in ingest.PROPERTY_UPSERT
+    assert 'listing_key = new.listing_key' not in ingest.PROPERTY_UPSERT
+
+
+def test_validate_listing_normalizes_fields():
+    listing, error = ingest.validate_listing(LISTING)
+    assert error is None
+    assert listing['property_type'] == 'single_room'
+    assert listing['rent_amount'] == 12000
+    assert listing['amenities'] == '["WiFi", "AC"]'
+
+
+def test_validate_listing_reports_missing_and_bad_values():
+    assert ingest.validate_listing(dict(LISTING, title=''))[1] == 'missing title'
+    assert 'unknown property_type' in ingest.validate_listing(dict(LISTING, property_type='castle'))[1]
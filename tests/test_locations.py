@@ -0,0 +1,52 @@
+from actions.cache import TTLCache
+from actions.locations import LocationIndex, like_prefix, location_key, location_matches, normalize_location
+
+
+def test_normalize_location_drops_numbers_and_noise():
+    assert normalize_location('  Dhanmondi-27, Road 5 ') == 'dhanmondi'
+    assert normalize_location('ধানমন্ডি ২৭') == 'ধানমন্ডি'
+    assert normalize_location('') == ''
+
+
+def test_resolve_maps_aliases_and_tokens():
+    index = LocationIndex()
+    assert index.resolve('Dhanmondhi') == 'dhanmondi'
+    assert index.resolve('উত্তরা সেক্টর ৭') == 'uttara'
+    assert index.resolve('near gulshon 2') == 'gulshan'
+
+
+def test_location_key_uses_search_aliases():
+    assert location_key('Dhanmondhi') == 'dhanmondi'
+    assert location_key('ধানমন্ডি ২৭') == 'dhanmondi'
+    assert location_key('Chattogram') == 'chittagong'
+    assert location_key(None) is None
+    assert location_key('  ') is None
+
+
+def test_location_key_puts_known_places_first():
+    # Searches match keys by prefix, so the place name has to lead
+    assert location_key('Sector 7, Uttara') == 'uttara'
+    assert location_key('Lake Road, Dhanmondi') == 'dhanmondi lake'
+    assert location_key('New Market') == 'new market'
+
+
+def test_search_key_matches_stored_key_of_longer_name():
+    index = LocationIndex()
+    for search, stored in (('uttara', 'Sector 7, Uttara'), ('Dhanmondhi', 'Lake Road, Dhanmondi'),
+                           ('ধানমন্ডি', 'Dhanmondi 27')):
+        search_key = index.resolve(search)
+        assert like_prefix(search_key) == search_key + '%'
+        assert location_matches(search_key, [location_key(stored), None])
+    assert not location_matches('gulshan', [location_key('Banani'), location_key('Road 11, Banani')])
+    assert location_matches('', [location_key('Banani')])
+
+
+def test_invalidation_drops_searches_that_could_return_the_listing():
+    cache = TTLCache()
+    for key in ('uttara', 'dhanmondi', 'gulshan', ''):
+        cache.set((key, None, (), None, 10), ['rows'])
+
+    property_keys = [location_key('Uttara'), location_key('Sector 7, Uttara')]
+    assert cache.invalidate(lambda key: location_matches(key[0], property_keys)) == 2
+    assert cache.get(('dhanmondi', None, (), None, 10)) == (True, ['rows'])
+    assert cache.get(('uttara', None, (), None, 10))[0] is False
@@ -0,0 +1,11 @@
+from actions.logs import env_float, env_int
+
+
+def test_env_helpers_fall_back_on_unset_or_malformed(monkeypatch):
+    monkeypatch.delenv('TEST_ENV_SETTING', raising=False)
+    assert env_int('TEST_ENV_SETTING', 3) == 3
+    monkeypatch.setenv('TEST_ENV_SETTING', '2.5')
+    assert env_int('TEST_ENV_SETTING', 3) == 3
+    assert env_float('TEST_ENV_SETTING', 1.0) == 2.5
+    monkeypatch.setenv('TEST_ENV_SETTING', 'lots')
+    assert env_float('TEST_ENV_SETTING', 1.0) == 1.0
@@ -0,0 +1,62 @@
+import re
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+from actions import metrics
+from actions.cache import TTLCache
+from actions.profiler import query_profiler
+
+
+def test_cache_gauges_render_one_family_per_metric():
+    search, rooms = TTLCache(), TTLCache()
+    search.set('a', 1)
+    search.get('a')
+    rooms.get('missing')
+    metrics.register_cache('test_search', search)
+    metrics.register_cache('test_rooms', rooms)
+
+    text = metrics.registry.render()
+    families = re.findall(r'^# TYPE (\S+) ', text, re.M)
+    assert len(families) == len(set(families))
+    assert len(re.findall(r'^# HELP (\S+) ', text, re.M)) == len(families)
+    assert 'rental_cache_size{cache="test_search"} 1' in text
+    assert 'rental_cache_hits{cache="test_search"} 1' in text
+    assert 'rental_cache_misses{cache="test_rooms"} 1' in text
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram('test_seconds', 'Test.', ('method',), buckets=(0.1, 1.0))
+    histogram.observe(0.05, 'search')
+    histogram.observe(0.5, 'search')
+    lines = histogram.render()
+    assert 'test_seconds_bucket{method="search",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{method="search",le="+Inf"} 2' in lines
+    assert 'test_seconds_count{method="search"} 2' in lines
+
+
+def _get(server, path, headers=None):
+    request = urllib.request.Request(f"http://127.0.0.1:{server.server_address[1]}{path}", headers=headers or {})
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def test_queries_report_needs_admin_token(monkeypatch):
+    monkeypatch.setattr(query_profiler, 'enabled', True)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), metrics._MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        monkeypatch.setattr(metrics, 'METRICS_ADMIN_TOKEN', '')
+        assert _get(server, '/queries') == 404
+        monkeypatch.setattr(metrics, 'METRICS_ADMIN_TOKEN', 'secret')
+        assert _get(server, '/queries') == 403
+        assert _get(server, '/queries', {'X-Admin-Token': 'wrong'}) == 403
+        assert _get(server, '/queries', {'X-Admin-Token': 'secret'}) == 200
+        assert _get(server, '/metrics') == 200
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,85 @@
+import pytest
+
+from actions.parsing import LAST_ROOM, budget_amount, parse_budget, parse_room_number
+
+# (message, expected (low, high) or None)
+BUDGET_CASES = [
+    ("15000", (15000, 15000)),
+    ("15000 taka", (15000, 15000)),
+    ("15,000 tk", (15000, 15000)),
+    ("৳20000", (20000, 20000)),
+    ("15k", (15000, 15000)),
+    ("15K per month", (15000, 15000)),
+    ("15 hazar", (15000, 15000)),
+    ("15 hajar taka", (15000, 15000)),
+    ("১৫০০০", (15000, 15000)),
+    ("১৫ হাজার", (15000, 15000)),
+    ("১৫ হাজার টাকা", (15000, 15000)),
+    ("1.5 lakh", (150000, 150000)),
+    ("10-15k", (10000, 15000)),
+    ("10k to 15k", (10000, 15000)),
+    ("10000 - 15000", (10000, 15000)),
+    ("12000-15k", (12000, 15000)),
+    ("১০ থেকে ১৫ হাজার", (10000, 15000)),
+    ("under 12k, 5 min from the bus stop", (12000, 12000)),
+    ("2 km from campus, 15000 max", (15000, 15000)),
+    ("cheap", None),
+    ("", None),
+]
+
+# (message, expected room number or None)
+ROOM_CASES = [
+    ("room 1", 1),
+    ("Room 2 please", 2),
+    ("room 12", 12),
+    ("tell me about room no. 4", 4),
+    ("number 5", 5),
+    ("#3", 3),
+    ("3", 3),
+    ("২", 2),
+    ("রুম ২", 2),
+    ("৩ নম্বর", 3),
+    ("first room", 1),
+    ("details of the second one", 2),
+    ("the 2nd", 2),
+    ("I like 3rd", 3),
+    ("দ্বিতীয় রুম", 2),
+    ("the last one", LAST_ROOM),
+    ("শেষ রুম", LAST_ROOM),
+    ("2 number", 2),
+    ("1 no room", 1),
+    ("2 no.", 2),
+    ("3 nombor ta", 3),
+    ("3?", 3),
+    ("what about 2", None),
+    ("prothom ta", 1),
+    ("ditiyo room", 2),
+    ("shesh er ta", LAST_ROOM),
+    ("rooms under 15000", None),
+    ("tell me more", None),
+    ("is there an attached bathroom 2 people can share", None),
+    ("the casino 5 min away", None),
+    ("2 km from campus please", None),
+    ("dhanmondi 27", None),
+    ("road 11 please", None),
+    ("house 12, road 11", None),
+    ("sector 7", None),
+]
+
+
+
+@pytest.mark.parametrize('message, expected', BUDGET_CASES)
+def test_parse_budget(message, expected):
+    budget = parse_budget(message)
+    assert ((budget.low, budget.high) if budget else None) == expected
+
+
+@pytest.mark.parametrize('message, expected', ROOM_CASES)
+def test_parse_room_number(message, expected):
+    assert parse_room_number(message) == expected
+
+
+def test_budget_amount_is_top_of_range():
+    assert budget_amount('10-15k') == 15000
+    assert budget_amount(12000) == 12000
+    assert budget_amount(None) is None
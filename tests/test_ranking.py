@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from actions.ranking import normalize_occupancy, rank_properties, top_k  # noqa: E402
+
+NOW = datetime.now()
+
+
+def listing(property_id, rent, amenities=(), occupancy='bachelor', rating=4.0, featured=False, days_old=1):
+    return {'id': property_id, 'rent_amount': rent, 'amenities': list(amenities), 'furnished': False,
+            'occupancy_type': occupancy, 'owner_rating': rating, 'featured': featured,
+            'updated_at': NOW - timedelta(days=days_old)}
+
+
+def test_rank_prefers_matching_amenities_over_cheapest():
+    rows = [listing(1, 8000), listing(2, 12000, amenities=['WiFi', 'AC'])]
+    ranked = rank_properties(rows, budget=12000, preferences=['wifi', 'ac'], k=2)
+    assert [row['id'] for row in ranked] == [2, 1]
+    assert ranked[0]['score'] > ranked[1]['score']
+
+
+def test_rank_penalizes_rent_over_budget():
+    rows = [listing(1, 15000), listing(2, 10000)]
+    assert [row['id'] for row in rank_properties(rows, budget=10000, k=2)] == [2, 1]
+
+
+def test_rank_matches_occupancy_with_mixed_as_partial():
+    rows = [listing(1, 10000, occupancy='family'), listing(2, 10000, occupancy='mixed'),
+            listing(3, 10000, occupancy='bachelor')]
+    assert [row['id'] for row in rank_properties(rows, occupancy='bachelor', k=3)] == [3, 2, 1]
+
+
+def test_top_k_is_best_first_and_bounded():
+    scores = np.array([0.1, 0.9, 0.5, 0.7], dtype=np.float32)
+    assert list(top_k(scores, 2)) == [1, 3]
+    assert list(top_k(scores, 10)) == [1, 3, 2, 0]
+    assert list(top_k(scores, 0)) == []
+
+
+@pytest.mark.parametrize('slot_value, expected', [
+    ('Bachelor', 'bachelor'), ('Family', 'family'), ('Female', 'female_only'), ('Male', 'male_only'),
+    ('female only', 'female_only'), ('mixed', 'mixed'), ('anyone', None), (None, None),
+])
+def test_normalize_occupancy_accepts_nlu_spellings(slot_value, expected):
+    assert normalize_occupancy(slot_value) == expected
+
+
+def test_rank_matches_occupancy_from_nlu_slot_value():
+    rows = [listing(1, 10000, occupancy='male_only'), listing(2, 10000, occupancy='mixed'),
+            listing(3, 10000, occupancy='female_only')]
+    assert [row['id'] for row in rank_properties(rows, occupancy='Female', k=3)] == [3, 2, 1]
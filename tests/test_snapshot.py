@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from actions.snapshot import ListingSnapshot  # noqa: E402
+
+START = datetime(2025, 1, 1)
+
+
+def row(property_id, rent, area='dhanmondi', available=True, minutes=0):
+    return {'id': property_id, 'rent_amount': rent, 'area_key': area, 'neighborhood_key': None,
+            'amenities': ['WiFi'], 'furnished': False, 'occupancy_type': 'bachelor', 'latitude': 23.7,
+            'longitude': 90.4, 'is_available': available, 'updated_at': START + timedelta(minutes=minutes)}
+
+
+class FakeDatabase:
+    def __init__(self, rows):
+        self.rows = {item['id']: item for item in rows}
+        self.invalidated = []
+
+    def fetch_snapshot_rows(self, since=None):
+        if since is None:
+            return [item for item in self.rows.values() if item['is_available']]
+        return [item for item in self.rows.values() if item['updated_at'] >= since]
+
+    def fetch_snapshot_ids(self):
+        return [property_id for property_id, item in self.rows.items() if item['is_available']]
+
+    def invalidate_listings(self, areas=(), property_ids=()):
+        self.invalidated.append(set(property_ids))
+
+
+def test_refresh_drops_deleted_and_unavailable_listings():
+    database = FakeDatabase([row(1, 9000, minutes=-3), row(2, 10000, minutes=-2), row(3, 11000, minutes=-1)])
+    snapshot = ListingSnapshot()
+    assert snapshot.refresh(database) == 3
+    assert snapshot.search('dhanmondi') == [1, 2, 3]
+
+    del database.rows[2]
+    database.rows[3] = row(3, 11000, available=False, minutes=5)
+    database.rows[4] = row(4, 8000, minutes=5)
+    assert snapshot.refresh(database) == 3
+
+    assert snapshot.search('dhanmondi') == [4, 1]
+    assert len(snapshot.columns) == 2
+    assert database.invalidated == [{2, 3, 4}]
+
+
+def test_refresh_invalidates_rows_that_changed():
+    database = FakeDatabase([row(1, 9000)])
+    snapshot = ListingSnapshot()
+    snapshot.refresh(database)
+    database.rows[1] = row(1, 7000, minutes=1)
+    snapshot.refresh(database)
+    assert database.invalidated[-1] == {1}
+    assert snapshot.search('dhanmondi', budget=7000) == [1]
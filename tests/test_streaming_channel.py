@@ -0,0 +1,42 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip('rasa')
+pytest.importorskip('sanic')
+
+from addons.streaming_channel import StreamingInput  # noqa: E402
+
+
+class FakeSocket:
+    def __init__(self, messages):
+        self.incoming = list(messages)
+        self.sent = []
+
+    async def recv(self):
+        return self.incoming.pop(0) if self.incoming else None
+
+    async def send(self, data):
+        self.sent.append(json.loads(data))
+
+
+def test_errors_reach_the_client_without_details():
+    async def failing(message):
+        raise RuntimeError("Access denied for user 'root'@'localhost'")
+
+    ws = FakeSocket([json.dumps({'sender': 'user_1', 'message': 'rooms in dhanmondi', 'id': 3})])
+    asyncio.run(StreamingInput()._serve(ws, failing))
+
+    assert ws.sent == [{'event': 'error', 'reply_to': 3, 'error': 'could not handle the message, please try again'}]
+
+
+def test_replies_end_with_done():
+    async def handled(message):
+        await message.output_channel.send_text_message(message.sender_id, 'Found 2 rooms.')
+
+    ws = FakeSocket(['not json', json.dumps({'sender': 'user_1', 'message': 'hi', 'id': 4})])
+    asyncio.run(StreamingInput()._serve(ws, handled))
+
+    assert [message['event'] for message in ws.sent] == ['error', 'bot_message', 'done']
+    assert ws.sent[1]['message']['text'] == 'Found 2 rooms.'
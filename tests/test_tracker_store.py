@@ -0,0 +1,75 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('rasa')
+
+from rasa.shared.core.domain import Domain  # noqa: E402
+from rasa.shared.core.events import ActionExecuted, BotUttered, SlotSet, UserUttered  # noqa: E402
+
+from addons.tracker_store import CompactTrackerStore, unsaved_events  # noqa: E402
+
+# MySQL database with migrations 009 and 011, e.g. mysql+pymysql://root@localhost:3306/rasa_db
+TEST_URL = os.getenv('TRACKER_STORE_TEST_URL')
+
+
+def turn(number):
+    return [
+        UserUttered(f"rooms in dhanmondi {number}", timestamp=number),
+        ActionExecuted('action_search_rooms', timestamp=number + 0.1),
+        SlotSet('location', 'dhanmondi', timestamp=number + 0.2),
+        BotUttered(f"Found {number} rooms", timestamp=number + 0.3),
+        ActionExecuted('action_listen', timestamp=number + 0.4),
+    ]
+
+
+def test_unsaved_events_follow_the_last_saved_event():
+    events = turn(1) + turn(2)
+    assert unsaved_events(events, last_saved=events[4]) == events[5:]
+    assert unsaved_events(events, last_saved=events[-1]) == []
+
+
+def test_unsaved_events_when_the_cap_dropped_the_last_saved_event():
+    saved = turn(1)
+    capped = (saved + turn(2))[-4:]
+    assert unsaved_events(capped, last_saved=saved[-1]) == capped
+
+
+def test_unsaved_events_fall_back_to_timestamp_then_length():
+    events = turn(1) + turn(2)
+    assert unsaved_events(events, last_timestamp=1.4) == events[5:]
+    assert unsaved_events(events, view_count=3) == events[3:]
+
+
+@pytest.mark.skipif(not TEST_URL, reason='TRACKER_STORE_TEST_URL not set')
+def test_round_trip_with_max_event_history():
+    async def run():
+        store = CompactTrackerStore(Domain.load('domain.yml'), host=TEST_URL, max_event_history=6,
+                                    snapshot_every=7)
+        sender_id = f"test-tracker-{uuid.uuid4().hex[:8]}"
+        expected = []
+        try:
+            for number in range(1, 6):
+                tracker = await store.retrieve(sender_id) or await store.get_or_create_tracker(sender_id)
+                for event in turn(number):
+                    tracker.update(event)
+                expected.extend(turn(number))
+                await store.save(tracker)
+                # A second save of the same tracker writes nothing
+                await store.save(tracker)
+
+            full = await store.retrieve_full_tracker(sender_id)
+            texts = [event.text for event in full.events if isinstance(event, UserUttered)]
+            assert texts == [f"rooms in dhanmondi {number}" for number in range(1, 6)]
+            tracker = await store.retrieve(sender_id)
+            assert len(tracker.events) == 6
+            assert tracker.get_slot('location') == 'dhanmondi'
+        finally:
+            with store.engine.begin() as connection:
+                for table in ('tracker_event_deltas', 'tracker_snapshots'):
+                    connection.exec_driver_sql(f"DELETE FROM {table} WHERE sender_id = %s", (sender_id,))
+
+    asyncio.run(run())